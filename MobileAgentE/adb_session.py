@@ -0,0 +1,204 @@
+import queue
+import subprocess
+import threading
+import uuid
+
+
+class AdbSessionError(RuntimeError):
+    """
+    adb shell 会话执行命令失败。sent 为 True 表示命令已经写入会话（设备可能已经执行了它），
+    此时不能重发，否则可能重复点击或重复输入。
+    """
+
+    def __init__(self, message, sent=False):
+        super().__init__(message)
+        self.sent = sent
+
+
+class AdbShellSession:
+    """
+    一个常驻的 `adb shell` 会话。命令通过 stdin 逐条写入设备端 shell，
+    每条命令的输出以一个随机哨兵行结尾，从而在同一个会话中复用多次。
+
+    参数:
+        adb_path (str): adb 命令，例如 "adb" 或 "adb -s <serial>"。
+        timeout (float): 单条命令等待输出的默认超时（秒）。
+    """
+
+    def __init__(self, adb_path, timeout=30):
+        self.adb_path = adb_path
+        self.timeout = timeout
+        self.sentinel = f"__MAE_{uuid.uuid4().hex}__"
+        self.process = None
+        self._lines = None
+        self._reader = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.adb_path + " shell",
+            shell=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self._lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read_stdout, args=(self.process.stdout, self._lines), daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def _read_stdout(stdout, lines):
+        for line in iter(stdout.readline, b""):
+            lines.put(line)
+        lines.put(None)  # EOF
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, command, timeout=None):
+        """
+        在会话中执行一条设备端 shell 命令。
+
+        返回:
+            subprocess.CompletedProcess: stdout 为合并后的输出文本（stderr 重定向到 stdout）。
+        """
+        if not self.alive:
+            raise AdbSessionError("adb shell 会话未启动或已退出")
+        timeout = self.timeout if timeout is None else timeout
+        # 命令的 stdin 指向 /dev/null，避免其读走后续写入的命令；哨兵行前补一个换行，保证它独占一行
+        line = f"{{ {command}\n}} </dev/null 2>&1; printf '\\n%s %s\\n' {self.sentinel} \"$?\"\n"
+        try:
+            self.process.stdin.write(line.encode("utf-8"))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise AdbSessionError(f"写入 adb shell 会话失败: {e}")
+
+        output = []
+        while True:
+            try:
+                raw = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                self.close()
+                raise AdbSessionError(f"命令超时 ({timeout}s): {command}", sent=True)
+            if raw is None:
+                self.close()
+                raise AdbSessionError(f"adb shell 会话意外退出: {command}", sent=True)
+            text = raw.decode("utf-8", errors="replace")
+            if text.startswith(self.sentinel):
+                returncode = int(text.split()[-1])
+                break
+            output.append(text)
+        stdout = "".join(output)
+        if stdout.endswith("\n"):
+            stdout = stdout[:-1]
+        return subprocess.CompletedProcess(command, returncode, stdout=stdout, stderr="")
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+
+class AdbSessionPool:
+    """
+    每台设备维护若干个常驻 `adb shell` 会话，并把命令分发到空闲会话上执行。
+    会话在首次使用时才建立；命令写入之前发现会话已断开时自动重连并重试。命令写入之后超时或会话退出时
+    直接抛出 AdbSessionError（会话被关闭，下一条命令重连），不重发该命令。
+
+    可以直接作为 `adb_path` 传给 `MobileAgentE.controller` 中的函数、`Operator` 和 `Perceptor`。
+
+    参数:
+        adb_path (str): adb 命令，例如 "adb" 或 "adb -s <serial>"。
+        size (int): 会话数量上限。
+        timeout (float): 单条命令的默认超时（秒）。
+        max_reconnects (int): 单条命令在写入之前失败时最多重连重试的次数。
+    """
+
+    def __init__(self, adb_path, size=1, timeout=30, max_reconnects=2):
+        self.adb_path = adb_path
+        self.size = size
+        self.timeout = timeout
+        self.max_reconnects = max_reconnects
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise AdbSessionError("会话池已关闭")
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                return AdbShellSession(self.adb_path, timeout=self.timeout)
+        return self._idle.get()
+
+    def _release(self, session):
+        if self._closed:
+            session.close()
+        else:
+            self._idle.put(session)
+
+    def run(self, command, timeout=None):
+        session = self._acquire()
+        try:
+            for attempt in range(self.max_reconnects + 1):
+                try:
+                    if not session.alive:
+                        session.close()
+                        session.start()
+                    return session.run(command, timeout=timeout)
+                except AdbSessionError as e:
+                    session.close()
+                    if e.sent or attempt == self.max_reconnects:
+                        raise
+                    print(f"WARNING: adb shell 会话失败，正在重连 ({attempt + 1}/{self.max_reconnects}): {e}")
+        finally:
+            self._release(session)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while not self._idle.empty():
+            self._idle.get().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"AdbSessionPool({self.adb_path!r}, size={self.size})"
+
+
+def connect(adb_path, backend="subprocess", num_sessions=1):
+    """
+    根据后端类型返回可传给 controller 函数的 adb 句柄。
+
+    参数:
+        backend (str): "subprocess"（每次调用启动一个新的 adb 进程）或 "session"（常驻会话池）。
+    """
+    if isinstance(adb_path, AdbSessionPool):
+        return adb_path
+    if backend == "subprocess":
+        return adb_path
+    elif backend == "session":
+        return AdbSessionPool(adb_path, size=num_sessions)
+    raise ValueError(f"Unknown adb backend: {backend}")
+
+
+def adb_command(adb_path):
+    """返回 adb 句柄对应的 adb 命令字符串，用于 pull、exec-out 等非 shell 子命令。"""
+    if isinstance(adb_path, AdbSessionPool):
+        return adb_path.adb_path
+    return adb_path
@@ -2,50 +2,45 @@ from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
 from dataclasses import dataclass, field
-from MobileAgentE.api import encode_image
-from MobileAgentE.controller import tap, swipe, type, back, home, switch_app, enter, save_screenshot_to_file
-from MobileAgentE.text_localization import ocr
-import copy
+from MobileAgentE.api import image_data_url
+from MobileAgentE.controller import tap, swipe, type_text, back, home, switch_app, enter, save_screenshot_to_file
+from MobileAgentE.adb_session import connect
+from MobileAgentE.settle import wait_for_settle
+from MobileAgentE.label_index import LabelIndex
+from MobileAgentE.app_index import AppIndex
+from MobileAgentE.streaming import SectionParser, first_json_object
 import re
 import json
 import time
 import os
 
+OPERATOR_SECTIONS = ("### 思考 ###", "### 操作 ###", "### 描述 ###")
+
 ### Helper Functions ###
 
 def add_response(role, prompt, chat_history, image=None):
-    new_chat_history = copy.deepcopy(chat_history)
+    # 对话历史是不可变的元组：返回追加了新消息的新元组，已有的消息（包括其中的图像 data URL）直接共用而不做深拷贝；
+    # 元组可以直接被 json 序列化，inference_chat 不需要转换
+    content = (
+        {
+            "type": "text", 
+            "text": prompt
+        },
+    )
     if image:
-        base64_image = encode_image(image)
-        content = [
-            {
-                "type": "text", 
-                "text": prompt
-            },
+        content += (
             {
                 "type": "image_url", 
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
+                    "url": image_data_url(image)
                 }
             },
-        ]
-    else:
-        content = [
-            {
-            "type": "text", 
-            "text": prompt
-            },
-        ]
-    new_chat_history.append([role, content])
-    return new_chat_history
+        )
+    return tuple(chat_history) + ((role, content),)
 
 
 def add_response_two_image(role, prompt, chat_history, image):
-    new_chat_history = copy.deepcopy(chat_history)
-
-    base64_image1 = encode_image(image[0])
-    base64_image2 = encode_image(image[1])
-    content = [
+    content = (
         {
             "type": "text", 
             "text": prompt
@@ -53,19 +48,17 @@ def add_response_two_image(role, prompt, chat_history, image):
         {
             "type": "image_url", 
             "image_url": {
-                "url": f"data:image/jpeg;base64,{base64_image1}"
+                "url": image_data_url(image[0])
             }
         },
         {
             "type": "image_url", 
             "image_url": {
-                "url": f"data:image/jpeg;base64,{base64_image2}"
+                "url": image_data_url(image[1])
             }
         },
-    ]
-
-    new_chat_history.append([role, content])
-    return new_chat_history
+    )
+    return tuple(chat_history) + ((role, content),)
 
 
 def print_status(chat_history):
@@ -324,8 +317,30 @@ INIT_SHORTCUTS = {
 
 
 class Operator(BaseAgent):
-    def __init__(self, adb_path):
-        self.adb = adb_path
+    def __init__(self, adb_path, adb_backend="subprocess", num_sessions=1, adaptive_settle=False, settle_configs=None, app_index_dir=None, app_aliases=None):
+        # adb_backend: "subprocess" 每个操作启动一个 adb 进程；"session" 复用常驻的 adb shell 会话
+        self.adb = connect(adb_path, backend=adb_backend, num_sessions=num_sessions)
+        # adaptive_settle: 操作后轮询截图、界面稳定即返回；为 False 时使用固定的等待时间
+        self.adaptive_settle = adaptive_settle
+        self.settle_configs = settle_configs
+        self.settle_log = [] # 最近一次 execute 中每次等待的实际时长
+        # app_index_dir: 应用索引的缓存目录；设置后 Open_App 优先通过包名直接启动应用
+        self.app_index_dir = app_index_dir
+        self.app_aliases = app_aliases
+        self._app_index = None
+
+    def get_app_index(self) -> AppIndex:
+        if self._app_index is None:
+            self._app_index = AppIndex.load_or_build(self.adb, self.app_index_dir, aliases=self.app_aliases)
+        return self._app_index
+
+    def wait_after(self, action: str, fixed_seconds: float) -> None:
+        if not self.adaptive_settle:
+            time.sleep(fixed_seconds)
+            self.settle_log.append({"action": action, "duration": fixed_seconds, "settled": None})
+            return
+        result = wait_for_settle(self.adb, action, overrides=self.settle_configs)
+        self.settle_log.append({"action": action, "duration": result.duration, "settled": result.settled})
 
     def init_chat(self):
         operation_history = []
@@ -453,58 +468,70 @@ class Operator(BaseAgent):
         prompt += "对所选操作和预期结果的简要描述。"
         return prompt
 
-    def execute_atomic_action(self, action: str, arguments: dict, **kwargs) -> None:
+    def execute_atomic_action(self, action: str, arguments: dict, **kwargs) -> str:
+        """执行一个原子操作。操作无法执行时返回错误描述（不等待），否则返回 None。"""
         adb_path = self.adb
         
         if "Open_App".lower() == action.lower():
-            screenshot_file = kwargs["screenshot_file"]
-            ocr_detection = kwargs["ocr_detection"]
-            ocr_recognition = kwargs["ocr_recognition"]
             app_name = arguments["app_name"].strip()
-            text, coordinate = ocr(screenshot_file, ocr_detection, ocr_recognition)
-            for ti in range(len(text)):
-                if app_name == text[ti]:
-                    name_coordinate = [int((coordinate[ti][0] + coordinate[ti][2])/2), int((coordinate[ti][1] + coordinate[ti][3])/2)]
-                    tap(adb_path, name_coordinate[0], name_coordinate[1]- int(coordinate[ti][3] - coordinate[ti][1]))# 
-                    break
-            if app_name in ['Fandango', 'Walmart', 'Best Buy']:
-                # additional wait time for app loading
-                time.sleep(10)
-            time.sleep(10)
+            wait_seconds = 20 if app_name in ['Fandango', 'Walmart', 'Best Buy'] else 10 # additional wait time for app loading
+            if self.app_index_dir is not None:
+                package = self.get_app_index().launch(adb_path, app_name)
+                if package is not None:
+                    print(f"\t Open_App: launched {package} directly")
+                    self.wait_after("Open_App", wait_seconds)
+                    return None
+            # 应用索引中找不到时，使用本步骤感知到的文本标签查找应用名称，不再重新运行 OCR
+            info_pool = kwargs["info_pool"]
+            match = LabelIndex(info_pool.perception_infos_pre).find(app_name)
+            if match is None:
+                error = f"Open_App failed: no app label matching \"{app_name}\" on the current screen"
+                print(error)
+                return error
+            info, label, score, box = match
+            print(f"\t Open_App: \"{app_name}\" matched label \"{label}\" (score {score:.2f})")
+            if box is not None:
+                # 点击标签上方的应用图标：按匹配的那一行（而不是整个文本块）的位置和高度计算
+                x1, y1, x2, y2 = box
+                tap(adb_path, int((x1 + x2)/2), int((y1 + y2)/2) - int(y2 - y1))
+            else:
+                tap(adb_path, info["coordinates"][0], info["coordinates"][1])
+            self.wait_after("Open_App", wait_seconds)
         
         elif "Tap".lower() == action.lower():
             x, y = int(arguments["x"]), int(arguments["y"])
             tap(adb_path, x, y)
-            time.sleep(5)
+            self.wait_after("Tap", 5)
         
         elif "Swipe".lower() == action.lower():
             x1, y1, x2, y2 = int(arguments["x1"]), int(arguments["y1"]), int(arguments["x2"]), int(arguments["y2"])
             swipe(adb_path, x1, y1, x2, y2)
-            time.sleep(5)
+            self.wait_after("Swipe", 5)
             
         elif "Type".lower() == action.lower():
             text = arguments["text"]
-            type(adb_path, text)
-            time.sleep(3)
+            type_text(adb_path, text)
+            self.wait_after("Type", 3)
 
         elif "Enter".lower() == action.lower():
             enter(adb_path)
-            time.sleep(10)
+            self.wait_after("Enter", 10)
 
         elif "Back".lower() == action.lower():
             back(adb_path)
-            time.sleep(3)
+            self.wait_after("Back", 3)
         
         elif "Home".lower() == action.lower():
             home(adb_path)
-            time.sleep(3)
+            self.wait_after("Home", 3)
         
         elif "Switch_App".lower() == action.lower():
             switch_app(adb_path)
-            time.sleep(3)
+            self.wait_after("Switch_App", 3)
         
         elif "Wait".lower() == action.lower():
-            time.sleep(10)
+            self.wait_after("Wait", 10)
+        return None
         
     def execute(self, action_str: str, info_pool: InfoPool, screenshot_log_dir=None, iter="", **kwargs) -> None:
         action_object = extract_json_object(action_str)
@@ -513,13 +540,17 @@ class Operator(BaseAgent):
             return None, 0, None
         action, arguments = action_object["name"], action_object["arguments"]
         action = action.strip()
+        self.settle_log = []
 
         # execute atomic action
         if action in ATOMIC_ACTION_SIGNITURES:
             print("Executing atomic action: ", action, arguments)
-            self.execute_atomic_action(action, arguments, info_pool=info_pool, **kwargs)
+            error = self.execute_atomic_action(action, arguments, info_pool=info_pool, **kwargs)
+            if error is not None:
+                return action_object, 0, error
             if screenshot_log_dir is not None:
-                time.sleep(1)
+                if not self.adaptive_settle:
+                    time.sleep(1)
                 screenshot_file = os.path.join(screenshot_log_dir, f"{iter}__{action.replace(' ', '')}.png")
                 save_screenshot_to_file(self.adb, screenshot_file)
             return action_object, 1, None # number of atomic actions executed
@@ -540,15 +571,18 @@ class Operator(BaseAgent):
                             else: # if not: the values are directly passed
                                 atomic_action_args[atomic_arg_key] = value
                     print(f"\t Executing sub-step {i}:", atomic_action_name, atomic_action_args, "...")
-                    self.execute_atomic_action(atomic_action_name, atomic_action_args, info_pool=info_pool, **kwargs)
+                    error = self.execute_atomic_action(atomic_action_name, atomic_action_args, info_pool=info_pool, **kwargs)
+                    if error is not None:
+                        return action_object, i, f"{error}\nError in executing step {i}: {atomic_action_name} {atomic_action_args}"
                     # log screenshot during shortcut execution
                     if screenshot_log_dir is not None:
-                        time.sleep(1)
+                        if not self.adaptive_settle:
+                            time.sleep(1)
                         screenshot_file = os.path.join(screenshot_log_dir, f"{iter}__{action.replace(' ', '')}__{i}-{atomic_action_name.replace(' ', '')}.png")
                         save_screenshot_to_file(self.adb, screenshot_file)
                         
                 except Exception as e:
-                    e += f"\nError in executing step {i}: {atomic_action_name} {atomic_action_args}"
+                    e = f"{e}\nError in executing step {i}: {atomic_action_name} {atomic_action_args}"
                     print("Error in executing shortcut: ", action, e)
                     return action_object, i, e
             return action_object, len(shortcut["atomic_action_sequence"]), None
@@ -566,6 +600,23 @@ class Operator(BaseAgent):
         description = response.split("### 描述 ###")[-1].replace("\n", " ").replace("  ", " ").strip()
         return {"thought": thought, "action": action, "description": description}
 
+    def parse_partial_response(self, parser: SectionParser) -> dict:
+        """
+        流式输出中 ### 操作 ### 部分已完整（### 描述 ### 已出现，或其中的 JSON 已配平）时返回 thought 和 action，
+        否则返回 None。parser 为 SectionParser(OPERATOR_SECTIONS)，已更新到目前收到的文本。
+        """
+        action = parser.section("### 操作 ###")
+        if action is None:
+            return None
+        if not parser.closed("### 操作 ###"):
+            action = first_json_object(action)
+            if action is None:
+                return None
+        thought = parser.section("### 思考 ###") or ""
+        thought = thought.replace("\n", " ").replace("  ", " ").strip()
+        action = action.replace("\n", " ").replace("  ", " ").strip()
+        return {"thought": thought, "action": action}
+
 
 class ActionReflector(BaseAgent):
     def init_chat(self) -> list:
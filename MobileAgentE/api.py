@@ -1,13 +1,48 @@
 import base64
-import requests
-from time import sleep
 import json
+import os
+import threading
+from collections import OrderedDict
+from MobileAgentE.frame import Frame
+from MobileAgentE import http_client
+from MobileAgentE.retry import call_with_retry, RetryError, CHAT_POLICY
+from MobileAgentE.streaming import ChatStream
 
 def encode_image(image_path):
+    # image_path 也可以是 Frame：直接使用其（只编码一次的）JPEG 字节，不再读取文件
+    if isinstance(image_path, Frame):
+        return base64.b64encode(image_path.jpeg).decode('utf-8')
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode('utf-8')
 
 
+IMAGE_PAYLOAD_CACHE_SIZE = 8  # 按文件缓存的 data URL 数量（每步只用到当前和上一张截图）
+_image_payloads = OrderedDict()
+_image_payloads_lock = threading.Lock()
+
+
+def image_data_url(image):
+    """
+    返回图像的 data URL（data:image/jpeg;base64,...）。Frame 使用其缓存的 data_url；
+    文件按 (st_dev, st_ino, st_mtime_ns, st_size) 缓存，文件改名（截图变为 last_screenshot.jpg）后仍然命中，
+    被覆盖写入后则重新编码。同一张图像的各个 agent 请求共用同一个字符串。
+    """
+    if isinstance(image, Frame):
+        return image.data_url
+    st = os.stat(image)
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+    with _image_payloads_lock:
+        if key in _image_payloads:
+            _image_payloads.move_to_end(key)
+            return _image_payloads[key]
+    data_url = f"data:image/jpeg;base64,{encode_image(image)}"
+    with _image_payloads_lock:
+        _image_payloads[key] = data_url
+        while len(_image_payloads) > IMAGE_PAYLOAD_CACHE_SIZE:
+            _image_payloads.popitem(last=False)
+    return data_url
+
+
 def track_usage(res_json, api_key):
     """
     {'id': 'chatcmpl-AbJIS3o0HMEW9CWtRjU43bu2Ccrdu', 'object': 'chat.completion', 'created': 1733455676, 'model': 'gpt-4o-2024-11-20', 'choices': [...], 'usage': {'prompt_tokens': 2731, 'completion_tokens': 235, 'total_tokens': 2966, 'prompt_tokens_details': {'cached_tokens': 0, 'audio_tokens': 0}, 'completion_tokens_details': {'reasoning_tokens': 0, 'audio_tokens': 0, 'accepted_prediction_tokens': 0, 'rejected_prediction_tokens': 0}}, 'system_fingerprint': 'fp_28935134ad'}
@@ -48,7 +83,8 @@ def track_usage(res_json, api_key):
         "completion_token_price": completion_token_price
     }
 
-def inference_chat(chat, model, api_url, token, usage_tracking_jsonl = None, max_tokens = 2048, temperature = 0.0):
+def build_request(chat, model, api_url, token, max_tokens = 2048, temperature = 0.0):
+    """返回 (headers, data)：Claude 官方接口使用 Messages API 的格式，其余使用 OpenAI 兼容格式。"""
     if token is None:
         raise ValueError("API key is required")
     
@@ -96,39 +132,66 @@ def inference_chat(chat, model, api_url, token, usage_tracking_jsonl = None, max
     else:
         for role, content in chat:
             data["messages"].append({"role": role, "content": content})
+    return headers, data
 
-    max_retry = 5
-    sleep_sec = 20
 
-    while True:
-        try:
-            if "claude" in model:
-                res = requests.post(api_url, headers=headers, data=json.dumps(data))
-                res_json = res.json()
-                # print(res_json)
-                res_content = res_json['content'][0]['text']
-            else:
-                res = requests.post(api_url, headers=headers, json=data)
-                res_json = res.json()
-                # print(res_json)
-                res_content = res_json['choices'][0]['message']['content']
-            if usage_tracking_jsonl:
-                usage = track_usage(res_json, api_key=token)
-                with open(usage_tracking_jsonl, "a") as f:
-                    f.write(json.dumps(usage) + "\n")
-        except:
-            print("Network Error:")
-            try:
-                print(res.json())
-            except:
-                print("Request Failed")
-        else:
-            break
-        print(f"Sleep {sleep_sec} before retry...")
-        sleep(sleep_sec)
-        max_retry -= 1
-        if max_retry < 0:
-            print(f"Failed after {max_retry} retries...")
-            return None
-    
-    return res_content
\ No newline at end of file
+def record_usage(usage_tracking_jsonl, res_json, token):
+    usage = track_usage(res_json, api_key=token)
+    with open(usage_tracking_jsonl, "a") as f:
+        f.write(json.dumps(usage) + "\n")
+
+
+def inference_chat(chat, model, api_url, token, usage_tracking_jsonl = None, max_tokens = 2048, temperature = 0.0):
+    headers, data = build_request(chat, model, api_url, token, max_tokens=max_tokens, temperature=temperature)
+
+    def send():
+        if "claude" in model:
+            return http_client.post(api_url, headers=headers, data=json.dumps(data))
+        return http_client.post(api_url, headers=headers, json=data)
+
+    def parse(res):
+        res_json = res.json()
+        if "claude" in model:
+            return res_json, res_json['content'][0]['text']
+        return res_json, res_json['choices'][0]['message']['content']
+
+    # 重试策略（按失败类别退避、遵循 Retry-After、按端点熔断和限制重试预算）见 MobileAgentE/retry.py
+    try:
+        res_json, res_content = call_with_retry(http_client.endpoint(api_url), send, parse, policy=CHAT_POLICY)
+    except RetryError as e:
+        print(f"Request Failed: {e}")
+        return None
+    if usage_tracking_jsonl:
+        record_usage(usage_tracking_jsonl, res_json, token)
+
+    return res_content
+
+
+def inference_chat_stream(chat, model, api_url, token, usage_tracking_jsonl = None, max_tokens = 2048, temperature = 0.0):
+    """
+    以 SSE 流式调用模型，返回在后台读取回复的 ChatStream（见 MobileAgentE/streaming.py）；
+    连接失败或服务端不支持流式输出时返回 None，调用方可改用 inference_chat。
+    只有建立连接和响应头之前的失败会按重试策略重试，读取过程中的错误记录在 ChatStream.error 中。
+    """
+    headers, data = build_request(chat, model, api_url, token, max_tokens=max_tokens, temperature=temperature)
+    data["stream"] = True
+    if usage_tracking_jsonl and "claude" not in model:
+        # OpenAI 兼容接口只在请求 include_usage 时才在最后一个事件中返回用量
+        data["stream_options"] = {"include_usage": True}
+
+    try:
+        res = call_with_retry(http_client.endpoint(api_url), lambda: http_client.post(api_url, headers=headers, json=data, stream=True), lambda res: res, policy=CHAT_POLICY)
+    except RetryError as e:
+        print(f"Streaming Request Failed: {e}")
+        return None
+    if "text/event-stream" not in res.headers.get("content-type", ""):
+        # 不重试：同样的请求仍会得到非流式的回复
+        print(f"Streaming not supported by {api_url}: {res.headers.get('content-type')}")
+        res.close()
+        return None
+
+    def on_finish(text, res_model, usage):
+        if usage_tracking_jsonl and usage:
+            record_usage(usage_tracking_jsonl, {"model": res_model or model, "usage": usage}, token)
+
+    return ChatStream(res, on_finish=on_finish)
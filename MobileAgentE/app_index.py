@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from MobileAgentE.adb_session import adb_command
+from MobileAgentE.controller import shell
+from MobileAgentE.label_index import normalize_label
+
+# 常用应用的显示名称/别名 -> 包名。只有设备上已安装的包才会进入索引；
+# 同一个别名可以对应多个候选包（例如不同厂商的笔记应用），按顺序取第一个已安装的。
+APP_ALIASES = {
+    "Notes": ["com.samsung.android.app.notes", "com.google.android.keep", "com.miui.notes", "com.android.notes"],
+    "Samsung Notes": ["com.samsung.android.app.notes"],
+    "Keep": ["com.google.android.keep"],
+    "Google Keep": ["com.google.android.keep"],
+    "Maps": ["com.google.android.apps.maps"],
+    "Google Maps": ["com.google.android.apps.maps"],
+    "Google": ["com.google.android.googlequicksearchbox"],
+    "Chrome": ["com.android.chrome"],
+    "YouTube": ["com.google.android.youtube"],
+    "Gmail": ["com.google.android.gm"],
+    "Settings": ["com.android.settings"],
+    "设置": ["com.android.settings"],
+    "Camera": ["com.sec.android.app.camera", "com.android.camera", "com.google.android.GoogleCamera"],
+    "X": ["com.twitter.android"],
+    "Twitter": ["com.twitter.android"],
+    "Tripadvisor": ["com.tripadvisor.tripadvisor"],
+    "Amazon": ["com.amazon.mShop.android.shopping"],
+    "Amazon Shopping": ["com.amazon.mShop.android.shopping"],
+    "Walmart": ["com.walmart.android"],
+    "Lemon8": ["com.bd.nproject"],
+    "Fandango": ["com.fandango"],
+    "Booking": ["com.booking"],
+    "Booking.com": ["com.booking"],
+    "Best Buy": ["com.bestbuy.android"],
+    "McDonald's": ["com.mcdonalds.app"],
+    "微信": ["com.tencent.mm"],
+    "WeChat": ["com.tencent.mm"],
+    "QQ": ["com.tencent.mobileqq"],
+    "支付宝": ["com.eg.android.AlipayGphone"],
+    "淘宝": ["com.taobao.taobao"],
+    "小红书": ["com.xingin.xhs"],
+    "抖音": ["com.ss.android.ugc.aweme"],
+    "美团": ["com.sankuai.meituan"],
+    "京东": ["com.jingdong.app.mall"],
+    "拼多多": ["com.xunmeng.pinduoduo"],
+    "高德地图": ["com.autonavi.minimap"],
+    "百度地图": ["com.baidu.BaiduMap"],
+    "哔哩哔哩": ["tv.danmaku.bili"],
+    "bilibili": ["tv.danmaku.bili"],
+    "微博": ["com.sina.weibo"],
+    "知乎": ["com.zhihu.android"],
+    "钉钉": ["com.alibaba.android.rimet"],
+}
+
+LAUNCHER_COMPONENT = re.compile(r"^\s*([\w.]+)/([\w.$]+)\s*$")
+LAUNCHER_QUERY = "cmd package query-activities -a android.intent.action.MAIN -c android.intent.category.LAUNCHER"
+
+
+def device_serial(adb_path):
+    """读取设备序列号，用作磁盘缓存的文件名。"""
+    result = subprocess.run(adb_command(adb_path) + " get-serialno", capture_output=True, text=True, shell=True)
+    serial = result.stdout.strip()
+    return re.sub(r"[^\w.-]", "_", serial) if result.returncode == 0 and serial else "default"
+
+
+def list_packages(adb_path):
+    result = shell(adb_path, "pm list packages")
+    return sorted(line[len("package:"):].strip() for line in result.stdout.splitlines() if line.startswith("package:"))
+
+
+def list_launcher_activities(adb_path):
+    """返回 {包名: 启动 Activity}。旧系统不支持 query-activities 时返回空字典，之后用 monkey 启动。"""
+    result = shell(adb_path, LAUNCHER_QUERY.replace("query-activities", "query-activities --brief"))
+    activities = {}
+    for line in result.stdout.splitlines():
+        match = LAUNCHER_COMPONENT.match(line)
+        if match and match.group(1) not in activities:
+            activities[match.group(1)] = match.group(2)
+    return activities
+
+
+def list_launcher_labels(adb_path):
+    """
+    返回包管理器中启动 Activity 的显示名称 {包名: 名称}。
+
+    query-activities 的完整输出只包含直接写在清单中的名称（nonLocalizedLabel）；名称来自资源文件的应用
+    （labelRes）没有可读的名称，不会出现在结果中，这些应用只能通过别名或屏幕上的文字标签打开。
+    """
+    result = shell(adb_path, LAUNCHER_QUERY)
+    labels = {}
+    package = None
+    for line in result.stdout.splitlines():
+        line = line.strip()
+        if line.startswith("packageName="):
+            package = line[len("packageName="):]
+        elif "nonLocalizedLabel=" in line and package is not None:
+            label = line.split("nonLocalizedLabel=", 1)[1].split(" icon=")[0].strip()
+            if label and label != "null":
+                labels.setdefault(package, label)
+            package = None
+    return labels
+
+
+class AppIndex:
+    """
+    设备上已安装应用的索引：显示名称/别名 -> 包名和启动 Activity，用于直接启动应用而无需在屏幕上查找图标。
+
+    索引按设备序列号缓存在磁盘上，并记录包列表的指纹；包列表变化（安装或卸载应用）时重新构建。
+
+    参数:
+        packages (list): 已安装的包名。
+        activities (dict): {包名: 启动 Activity}。
+        fingerprint (str): 包列表的指纹。
+        aliases (dict): 额外的别名表 {名称: [候选包名]}，优先于 APP_ALIASES。
+        display_labels (dict): 包管理器中的显示名称 {包名: 名称}，见 list_launcher_labels。
+    """
+
+    def __init__(self, packages, activities, fingerprint, aliases=None, display_labels=None):
+        self.packages = packages
+        self.activities = activities
+        self.fingerprint = fingerprint
+        self.display_labels = display_labels or {}
+        self.labels = {}  # 规范化后的名称 -> 包名
+        installed = set(packages)
+        for package, label in sorted(self.display_labels.items()):
+            if package in installed:
+                self.labels.setdefault(normalize_label(label), package)
+        # 别名覆盖包管理器中的显示名称
+        for table in (APP_ALIASES, aliases or {}):
+            for name, candidates in table.items():
+                for package in candidates:
+                    if package in installed:
+                        self.labels[normalize_label(name)] = package
+                        break
+
+    @staticmethod
+    def fingerprint_packages(packages):
+        return hashlib.sha1("\n".join(packages).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def build(cls, adb_path, aliases=None):
+        packages = list_packages(adb_path)
+        return cls(packages, list_launcher_activities(adb_path), cls.fingerprint_packages(packages), aliases,
+                   list_launcher_labels(adb_path))
+
+    @classmethod
+    def load_or_build(cls, adb_path, cache_dir, aliases=None):
+        """从 cache_dir 加载当前设备的索引；缓存不存在或包列表已变化时重新构建并写入缓存。"""
+        cache_path = os.path.join(cache_dir, f"{device_serial(adb_path)}.json")
+        packages = list_packages(adb_path)
+        fingerprint = cls.fingerprint_packages(packages)
+        if os.path.exists(cache_path):
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") == fingerprint and "display_labels" in cached:
+                return cls(cached["packages"], cached["activities"], fingerprint, aliases, cached["display_labels"])
+            print("INFO: 设备上的应用列表已变化，重新构建应用索引")
+        index = cls(packages, list_launcher_activities(adb_path), fingerprint, aliases, list_launcher_labels(adb_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump({"fingerprint": fingerprint, "packages": index.packages, "activities": index.activities,
+                       "display_labels": index.display_labels}, f, indent=4, ensure_ascii=False)
+        return index
+
+    def resolve(self, app_name):
+        """
+        返回 app_name 对应的包名。只接受规范化后与显示名称或别名完全相同的名称：相近的名称可能属于另一个应用，
+        而直接启动成功后不会再在屏幕上查找，因此找不到时返回 None，由调用方改用屏幕上的文字标签。
+        """
+        return self.labels.get(normalize_label(app_name))
+
+    def launch_command(self, package):
+        activity = self.activities.get(package)
+        if activity:
+            return f"am start -n '{package}/{activity}'"
+        return f"monkey -p {package} -c android.intent.category.LAUNCHER 1"
+
+    def launch(self, adb_path, app_name):
+        """
+        直接启动应用。
+
+        返回:
+            str: 启动的包名；索引中没有该应用或启动失败时返回 None。
+        """
+        package = self.resolve(app_name)
+        if package is None:
+            return None
+        result = shell(adb_path, self.launch_command(package), quote=True)
+        if result.returncode != 0 or "Error" in result.stdout or "aborted" in result.stdout:
+            print(f"WARNING: 启动 {package} 失败: {result.stdout.strip()}")
+            return None
+        return package
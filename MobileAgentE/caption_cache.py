@@ -0,0 +1,82 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def caption_key(image, caption_model, prompt):
+    """图标描述的缓存键：裁剪图像的像素内容 + 描述模型 + 提示词。"""
+    digest = hashlib.sha256()
+    digest.update(f"{caption_model}\0{prompt}\0{image.mode}\0{image.size[0]}x{image.size[1]}\0".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class CaptionCache:
+    """
+    持久化的图标描述缓存（SQLite），按内容寻址，超出容量时淘汰最久未使用的条目。
+
+    参数:
+        path (str): SQLite 数据库路径；None 时只保存在内存中。
+        capacity (int): 最多保存的描述数量。
+    """
+
+    def __init__(self, path=None, capacity=100000):
+        self.path = path
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS captions (key TEXT PRIMARY KEY, caption TEXT NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS captions_last_used ON captions (last_used)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+
+    def get_many(self, keys):
+        """返回 {key: caption}，只包含命中的键。"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(f"SELECT key, caption FROM captions WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE captions SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, captions):
+        """写入 {key: caption}，并按最近使用时间淘汰超出容量的条目。"""
+        if not captions:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO captions (key, caption, last_used) VALUES (?, ?, ?)",
+                [(key, caption, now) for key, caption in captions.items()],
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+            if count > self.capacity:
+                self._conn.execute(
+                    "DELETE FROM captions WHERE key IN (SELECT key FROM captions ORDER BY last_used LIMIT ?)",
+                    (count - self.capacity,),
+                )
+            self._conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
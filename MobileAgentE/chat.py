@@ -1,5 +1,4 @@
-import copy
-from MobileAgentE.api import encode_image
+from MobileAgentE.api import image_data_url
 
 
 def init_action_chat():
@@ -24,38 +23,28 @@ def init_memory_chat():
 
 
 def add_response(role, prompt, chat_history, image=None):
-    new_chat_history = copy.deepcopy(chat_history)
+    # 对话历史是不可变的元组：返回追加了新消息的新元组，已有的消息（包括其中的图像 data URL）直接共用而不做深拷贝；
+    # 元组可以直接被 json 序列化，inference_chat 不需要转换
+    content = (
+        {
+            "type": "text", 
+            "text": prompt
+        },
+    )
     if image:
-        base64_image = encode_image(image)
-        content = [
-            {
-                "type": "text", 
-                "text": prompt
-            },
+        content += (
             {
                 "type": "image_url", 
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
+                    "url": image_data_url(image)
                 }
             },
-        ]
-    else:
-        content = [
-            {
-            "type": "text", 
-            "text": prompt
-            },
-        ]
-    new_chat_history.append([role, content])
-    return new_chat_history
+        )
+    return tuple(chat_history) + ((role, content),)
 
 
 def add_response_two_image(role, prompt, chat_history, image):
-    new_chat_history = copy.deepcopy(chat_history)
-
-    base64_image1 = encode_image(image[0])
-    base64_image2 = encode_image(image[1])
-    content = [
+    content = (
         {
             "type": "text", 
             "text": prompt
@@ -63,19 +52,17 @@ def add_response_two_image(role, prompt, chat_history, image):
         {
             "type": "image_url", 
             "image_url": {
-                "url": f"data:image/jpeg;base64,{base64_image1}"
+                "url": image_data_url(image[0])
             }
         },
         {
             "type": "image_url", 
             "image_url": {
-                "url": f"data:image/jpeg;base64,{base64_image2}"
+                "url": image_data_url(image[1])
             }
         },
-    ]
-
-    new_chat_history.append([role, content])
-    return new_chat_history
+    )
+    return tuple(chat_history) + ((role, content),)
 
 
 def print_status(chat_history):
@@ -1,56 +1,114 @@
 import os
-import time
+import base64
+import shlex
+import struct
 import subprocess
-from PIL import Image
 from time import sleep
+from MobileAgentE.adb_session import AdbSessionPool, adb_command
+from MobileAgentE.frame import Frame
+
+SCREENSHOT_TIMEOUT = 15  # 秒；adb 卡住（设备断开、adb server 无响应）时单次截图的最长等待时间
+
+
+def shell(adb_path, command, quote=False):
+    """
+    在设备上执行一条 shell 命令。
+
+    参数:
+        adb_path (str | AdbSessionPool): adb 命令字符串（每次启动一个新的 adb 进程），
+            或常驻会话池（复用已建立的 adb shell 会话）。
+        command (str): 设备端 shell 命令。
+        quote (bool): 为 True 时先对整条命令做宿主机 shell 转义，保证设备端收到的命令与 command 完全一致。
+
+    返回:
+        subprocess.CompletedProcess
+    """
+    if isinstance(adb_path, AdbSessionPool):
+        return adb_path.run(command)
+    if quote:
+        command = _quote_for_host(command)
+    return subprocess.run(adb_path + " shell " + command, capture_output=True, text=True, shell=True)
+
+
+def _quote_for_host(command):
+    if os.name == "nt":
+        return '"' + command.replace('"', '\\"') + '"'
+    return shlex.quote(command)
+
+
+def capture_screenshot(adb_path, raw=False, retries=2, timeout=SCREENSHOT_TIMEOUT):
+    """
+    通过 `adb exec-out screencap` 将截图直接读入内存，不经过设备上的 /sdcard 文件。
+
+    参数:
+        raw (bool): True 时读取未压缩的原始帧缓冲（省去设备端的 PNG 压缩），
+            像素数据以 NumPy 数组的形式零拷贝地保存在返回的 Frame 中。
+        timeout (float): 单次截图的超时时间（秒）；超时与截图失败一样重试。
+
+    返回:
+        Frame: 内存中的截图，解码和 JPEG 编码按需进行。
+    """
+    command = adb_command(adb_path) + (" exec-out screencap" if raw else " exec-out screencap -p")
+    for attempt in range(retries + 1):
+        try:
+            result = subprocess.run(command, capture_output=True, shell=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            error = f"{timeout} 秒内没有返回"
+        else:
+            error = result.stderr.decode("utf-8", errors="replace")
+            if result.returncode == 0:
+                try:
+                    return Frame.from_raw(result.stdout) if raw else Frame.from_png(result.stdout)
+                except (ValueError, struct.error) as e:
+                    error += str(e)
+        if attempt < retries:
+            print(f"WARNING: 截图失败，正在重试 ({attempt + 1}/{retries}): {error}")
+    raise RuntimeError("Error: 在设备上捕获屏幕截图失败")
+
+
+def get_screenshot(adb_path, save_path=None, raw=False):
+    """
+    捕获当前屏幕。只有提供 save_path 时才把截图写入文件（JPEG 副本），否则只保存在内存中。
+
+    返回:
+        Frame
+    """
+    frame = capture_screenshot(adb_path, raw=raw)
+    if save_path is not None:
+        frame.save(save_path)
+    return frame
 
-def get_screenshot(adb_path):
-    command = adb_path + " shell rm /sdcard/screenshot.png"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
-    time.sleep(0.5)
-    command = adb_path + " shell screencap -p /sdcard/screenshot.png"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
-    time.sleep(0.5)
-    command = adb_path + " pull /sdcard/screenshot.png ./screenshot"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
-    image_path = "./screenshot/screenshot.png"
-    save_path = "./screenshot/screenshot.jpg"
-    image = Image.open(image_path)
-    image.convert("RGB").save(save_path, "JPEG")
-    os.remove(image_path)
 
 def start_recording(adb_path):
     print("Remove existing screenrecord.mp4")
-    command = adb_path + " shell rm /sdcard/screenrecord.mp4"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "rm /sdcard/screenrecord.mp4")
     print("开始!")
     # Use subprocess.Popen to allow terminating the recording process later
-    command = adb_path + " shell screenrecord /sdcard/screenrecord.mp4"
+    command = adb_command(adb_path) + " shell screenrecord /sdcard/screenrecord.mp4"
     process = subprocess.Popen(command, shell=True)
     return process
 
 def end_recording(adb_path, output_recording_path):
     print("正在停止录制...")
     # 发送 SIGINT 信号优雅地停止 screenrecord 进程
-    stop_command = adb_path + " shell pkill -SIGINT screenrecord"
-    subprocess.run(stop_command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "pkill -SIGINT screenrecord")
     sleep(1)  # 留出一些时间确保录制已停止
 
     print("正在从设备拉取录制文件...")
-    pull_command = f"{adb_path} pull /sdcard/screenrecord.mp4 {output_recording_path}"
+    pull_command = f"{adb_command(adb_path)} pull /sdcard/screenrecord.mp4 {output_recording_path}"
     subprocess.run(pull_command, capture_output=True, text=True, shell=True)
     print(f"录制已保存到 {output_recording_path}")
 
 
 def save_screenshot_to_file(adb_path, file_path="screenshot.png"):
     """
-    使用 ADB 从 Android 设备捕获截图，保存到本地，并从设备中删除截图。
+    使用 ADB 从 Android 设备捕获截图并保存到本地。
 
     参数:
         adb_path (str): adb 可执行文件的路径。
 
     返回:
-        str: 保存的截图路径，失败时抛出异常。
+        str: 保存的截图路径，失败时返回 None。
     """
     # 定义截图的本地文件名
     local_file = file_path
@@ -58,35 +116,8 @@ def save_screenshot_to_file(adb_path, file_path="screenshot.png"):
     if os.path.dirname(local_file) != "":
         os.makedirs(os.path.dirname(local_file), exist_ok=True)
 
-    # 定义 Android 设备上的临时文件路径
-    device_file = "/sdcard/screenshot.png"
-    
     try:
-        # print("\t 正在从安卓设备中删除现有截图...")
-        command = adb_path + " shell rm /sdcard/screenshot.png"
-        subprocess.run(command, capture_output=True, text=True, shell=True)
-        time.sleep(0.5)
-
-        # Capture the screenshot on the device
-        # print("\tCapturing screenshot on the Android device...")
-        result = subprocess.run(f"{adb_path} shell screencap -p {device_file}", capture_output=True, text=True, shell=True)
-        time.sleep(0.5)
-        if result.returncode != 0:
-            raise RuntimeError(f"Error: 在设备上捕获屏幕截图失败. {result.stderr}")
-        
-        # Pull the screenshot to the local computer
-        # print("\tTransferring screenshot to local computer...")
-        result = subprocess.run(f"{adb_path} pull {device_file} {local_file}", capture_output=True, text=True, shell=True)
-        time.sleep(0.5)
-        if result.returncode != 0:
-            raise RuntimeError(f"Error: 将截图传输到本地计算机失败. {result.stderr}")
-        
-        # Remove the screenshot from the device
-        # print("\tRemoving screenshot from the Android device...")
-        result = subprocess.run(f"{adb_path} shell rm {device_file}", capture_output=True, text=True, shell=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Error: 从设备中删除截图失败. {result.stderr}")
-        
+        get_screenshot(adb_path, save_path=local_file)
         print(f"\t 原子操作截图已保存至 {local_file}")
         return local_file
     
@@ -96,48 +127,94 @@ def save_screenshot_to_file(adb_path, file_path="screenshot.png"):
 
 
 def tap(adb_path, x, y):
-    command = adb_path + f" shell input tap {x} {y}"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, f"input tap {x} {y}")
 
 
 def type(adb_path, text):
     text = text.replace("\\n", "_").replace("\n", "_")
     for char in text:
         if char == ' ':
-            command = adb_path + f" shell input text %s"
-            subprocess.run(command, capture_output=True, text=True, shell=True)
+            shell(adb_path, "input text %s")
         elif char == '_':
-            command = adb_path + f" shell input keyevent 66"
-            subprocess.run(command, capture_output=True, text=True, shell=True)
+            shell(adb_path, "input keyevent 66")
         elif 'a' <= char <= 'z' or 'A' <= char <= 'Z' or char.isdigit():
-            command = adb_path + f" shell input text {char}"
-            subprocess.run(command, capture_output=True, text=True, shell=True)
+            shell(adb_path, f"input text {char}")
         elif char in '-.,!?@\'°/:;()':
-            command = adb_path + f" shell input text \"{char}\""
-            subprocess.run(command, capture_output=True, text=True, shell=True)
+            shell(adb_path, f"input text \"{char}\"")
         else:
-            command = adb_path + f" shell am broadcast -a ADB_INPUT_TEXT --es msg \"{char}\""
-            subprocess.run(command, capture_output=True, text=True, shell=True)
+            shell(adb_path, f"am broadcast -a ADB_INPUT_TEXT --es msg \"{char}\"")
+
+
+# `input text` 可以直接输入的字符，其余字符通过 ADB Keyboard 广播输入
+INPUT_TEXT_SAFE_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 _-.,!?@'/:;()")
+
+
+def split_text_runs(text):
+    """
+    把待输入文本切分为连续的片段。
+
+    返回:
+        list[tuple[str, str]]: (类型, 内容) 列表。类型为 "text"（`input text` 可直接输入的 ASCII 字符）、
+            "keyboard"（需要通过 ADB Keyboard 输入的字符）或 "enter"（换行，内容为换行的个数个 "\n"）。
+    """
+    text = text.replace("\\n", "\n")
+    runs = []
+    for char in text:
+        if char == "\n":
+            kind = "enter"
+        elif char in INPUT_TEXT_SAFE_CHARS:
+            kind = "text"
+        else:
+            kind = "keyboard"
+        if runs and runs[-1][0] == kind:
+            runs[-1] = (kind, runs[-1][1] + char)
+        else:
+            runs.append((kind, char))
+    return runs
+
+
+def type_text_commands(text, use_b64=True):
+    """把文本转换为设备端命令列表，每个片段一条命令。"""
+    commands = []
+    for kind, chunk in split_text_runs(text):
+        if kind == "enter":
+            commands.append("input keyevent" + " 66" * len(chunk))
+        elif kind == "text":
+            escaped = chunk.replace(" ", "%s").replace("'", "'\\''")
+            commands.append(f"input text '{escaped}'")
+        elif use_b64:
+            encoded = base64.b64encode(chunk.encode("utf-8")).decode("ascii")
+            commands.append(f"am broadcast -a ADB_INPUT_B64 --es msg {encoded}")
+        else:
+            escaped = chunk.replace("'", "'\\''")
+            commands.append(f"am broadcast -a ADB_INPUT_TEXT --es msg '{escaped}'")
+    return commands
+
+
+def type_text(adb_path, text, use_b64=True):
+    """
+    批量输入文本：按片段生成命令，并合并为一次设备端 shell 调用，而不是每个字符启动一个 adb 进程。
+
+    与 `type` 的区别：只有换行（"\n" 或字面的 "\\n"）输入为回车，字面的 "_" 按普通字符输入。
+    """
+    commands = type_text_commands(text, use_b64=use_b64)
+    if commands:
+        shell(adb_path, " ; ".join(commands), quote=True)
 
 def enter(adb_path):
-    command = adb_path + f" shell input keyevent KEYCODE_ENTER"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "input keyevent KEYCODE_ENTER")
 
 def swipe(adb_path, x1, y1, x2, y2):
-    command = adb_path + f" shell input swipe {x1} {y1} {x2} {y2} 500"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, f"input swipe {x1} {y1} {x2} {y2} 500")
 
 
 def back(adb_path):
-    command = adb_path + f" shell input keyevent 4"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "input keyevent 4")
     
     
 def home(adb_path):
     # command = adb_path + f" shell am start -a android.intent.action.MAIN -c android.intent.category.HOME"
-    command = adb_path + f" shell input keyevent KEYCODE_HOME"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "input keyevent KEYCODE_HOME")
 
 def switch_app(adb_path):
-    command = adb_path + f" shell input keyevent KEYCODE_APP_SWITCH"
-    subprocess.run(command, capture_output=True, text=True, shell=True)
+    shell(adb_path, "input keyevent KEYCODE_APP_SWITCH")
@@ -0,0 +1,160 @@
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+import torch
+
+# 自动调优时尝试的最少线程数；更少的线程在截图尺寸的输入上几乎总是更慢
+MIN_TUNED_THREADS = 2
+
+
+def available_cores():
+    """当前进程可用的 CPU 核数（考虑 taskset/cgroup 的 CPU 亲和性限制）。"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def set_threads(num_threads):
+    """设置 PyTorch 算子内并行和 OpenCV 的线程数。"""
+    torch.set_num_threads(num_threads)
+    try:
+        # 只能在第一次并行计算之前设置；之后再调用会抛出 RuntimeError，保持原值即可
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    cv2.setNumThreads(num_threads)
+
+
+def thread_candidates(cores):
+    """候选线程数：全部核数，以及依次减半直到 MIN_TUNED_THREADS。"""
+    candidates = []
+    n = cores
+    while n >= MIN_TUNED_THREADS:
+        candidates.append(n)
+        n //= 2
+    return candidates or [cores]
+
+
+def synthetic_screen(width=1080, height=2340):
+    """
+    合成一张类似手机界面的 BGR 截图（状态栏、应用图标网格和图标下方的名称、几行列表文字），
+    在拿不到设备截图时用于线程数测速，使 OCR 识别和图标检测都有实际的工作量。
+    """
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(image, (0, 0), (width, 80), (60, 60, 60), -1)
+    cv2.putText(image, "12:30  Wi-Fi  87%", (30, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+    cell = width // 4
+    names = ["Settings", "Chrome", "Maps", "YouTube", "Notes", "Camera", "Photos", "Clock"]
+    for i, name in enumerate(names):
+        x, y = (i % 4) * cell + cell // 2, 220 + (i // 4) * 300
+        color = ((i * 67) % 256, (i * 131 + 80) % 256, (i * 29 + 160) % 256)
+        cv2.rectangle(image, (x - 70, y - 70), (x + 70, y + 70), color, -1)
+        cv2.circle(image, (x, y), 35, (255, 255, 255), -1)
+        cv2.putText(image, name, (x - 18 * len(name) // 2, y + 120), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    for row in range(12):
+        y = 900 + row * 110
+        cv2.putText(image, f"Message {row + 1}: meeting at {row + 8}:00 tomorrow", (40, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (20, 20, 20), 2)
+        cv2.line(image, (40, y + 35), (width - 40, y + 35), (200, 200, 200), 2)
+    return image
+
+
+def tuning_key(*parts):
+    """测速结果的缓存键：主机名、可用核数、PyTorch 版本，以及 parts 中影响推理速度的配置（模型、是否量化等）。"""
+    return "|".join(str(part) for part in (platform.node(), available_cores(), torch.__version__) + parts)
+
+
+def load_tuned_threads(path, key):
+    """读取缓存的测速结果，返回 (线程数, {线程数: 耗时})；没有缓存或文件损坏时返回 None。"""
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)[key]
+        return int(entry["num_threads"]), {int(n): t for n, t in entry["timings"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_tuned_threads(path, key, num_threads, timings):
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    entries[key] = {"num_threads": num_threads, "timings": timings}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def autotune_threads(run, candidates=None, rounds=2, cache_path=None, cache_key=None):
+    """
+    对每个候选线程数运行 run() rounds 次，取最快的线程数并设置。
+
+    测速要在每个候选线程数下完整推理 rounds + 1 次，加载时耗时较长；提供 cache_path 时结果按 cache_key
+    （见 tuning_key）保存在该 JSON 文件中，同一台主机之后的加载（包括每台设备各加载一份模型时）直接复用。
+
+    参数:
+        run (callable): 一次有代表性的推理（例如在样例截图上做一次 OCR 检测和图标检测）。
+        candidates (list): 候选线程数，默认见 thread_candidates。
+
+    返回:
+        (最佳线程数, {线程数: 最短耗时(秒)})
+    """
+    if cache_path:
+        cached = load_tuned_threads(cache_path, cache_key)
+        if cached is not None:
+            set_threads(cached[0])
+            return cached
+    candidates = candidates or thread_candidates(available_cores())
+    timings = {}
+    with torch.inference_mode():
+        for num_threads in candidates:
+            set_threads(num_threads)
+            run()  # 预热：首次运行包含内存分配和算子选择
+            best = float("inf")
+            for _ in range(rounds):
+                start = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - start)
+            timings[num_threads] = best
+    num_threads = min(timings, key=timings.get)
+    set_threads(num_threads)
+    if cache_path:
+        save_tuned_threads(cache_path, cache_key, num_threads, timings)
+    return num_threads, timings
+
+
+def pipeline_module(pipe):
+    """返回 ModelScope 管线内部的 torch 模型（nn.Module），找不到时返回 None。"""
+    model = getattr(pipe, "model", None)
+    for _ in range(2):
+        if isinstance(model, torch.nn.Module):
+            return model
+        model = getattr(model, "model", None)
+    return None
+
+
+def quantize_pipeline(pipe):
+    """
+    对管线中模型的所有 nn.Linear 做动态 int8 量化（权重 int8，激活在运行时量化），原地替换。
+
+    卷积层保持 fp32：动态量化只支持 Linear/RNN 类层，因此对以卷积为主的 DBNet 检测模型几乎没有作用，
+    主要加速 GroundingDINO 的 Transformer/BERT 部分和 ConvNeXt 识别模型中的逐点 Linear 层。
+
+    量化后的输出没有与 fp32 对比验证，识别文字和检测框可能有偏差，因此只在显式开启（CPU_INT8=1）时使用。
+
+    返回:
+        int: 被量化的 Linear 层数量。
+    """
+    module = pipeline_module(pipe)
+    if module is None:
+        return 0
+    num_linear = sum(1 for m in module.modules() if type(m) is torch.nn.Linear)
+    if num_linear:
+        torch.ao.quantization.quantize_dynamic(module.eval(), {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return num_linear
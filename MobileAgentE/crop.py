@@ -70,6 +70,37 @@ def calculate_iou(box1, box2):
     return iou
 
 
+def suppress_boxes(boxes, size, iou_threshold=0.5, size_ratio=0.05):
+    """
+    向量化的框过滤：先去掉面积超过屏幕 size_ratio 的框，再按下标顺序做贪心非极大值抑制
+    （保留一个框后，去掉其后与它 IoU >= iou_threshold 的框）。
+
+    返回:
+        list: 保留的框的下标（升序）。
+    """
+    if len(boxes) == 0:
+        return []
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    alive = ~(areas > size_ratio * size[0] * size[1])
+
+    keep = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(len(boxes)):
+            if not alive[i]:
+                continue
+            keep.append(i)
+            rest = i + 1 + np.flatnonzero(alive[i + 1:])
+            if len(rest) == 0:
+                break
+            inter = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])) * \
+                np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            iou = inter / (areas[i] + areas[rest] - inter)
+            alive[rest[iou >= iou_threshold]] = False
+    return keep
+
+
 def crop(image, box, i, text_data=None):
     image = Image.open(image)
 
@@ -0,0 +1,182 @@
+import base64
+import io
+import struct
+import cv2
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# screencap 原始帧缓冲的像素格式（android/hardware PixelFormat）
+RAW_PIXEL_FORMATS = {
+    1: "RGBA",  # RGBA_8888
+    2: "RGBX",  # RGBX_8888
+    5: "BGRA",  # BGRA_8888
+}
+
+
+class Frame:
+    """
+    一帧屏幕截图，保存在内存中。
+
+    解码后的图像（`image`）、像素数组（`array`、`bgr`）、JPEG 编码（`jpeg`）及其 data URL（`data_url`）
+    都在第一次访问时才计算并缓存，因此只需要尺寸或原始字节的调用方不会触发解码。
+
+    参数:
+        data (bytes): 设备返回的 PNG 编码字节（`screencap -p`）。
+        image (PIL.Image.Image): 已解码的 RGB 图像。
+        array (np.ndarray): HxWx4 的 RGBA 像素数组（原始帧缓冲），或 HxWx3 的 RGB 像素数组。
+        以上至少提供一个。
+    """
+
+    def __init__(self, data=None, image=None, array=None):
+        if data is None and image is None and array is None:
+            raise ValueError("Frame requires encoded data, a decoded image or a pixel array")
+        self.data = data
+        self._image = image
+        self._array = array
+        self._bgr = None
+        self._jpeg = None
+        self._data_url = None
+        self._scaled = {}
+
+    @classmethod
+    def from_png(cls, data):
+        if not data.startswith(PNG_SIGNATURE):
+            raise ValueError("截图数据不是有效的 PNG")
+        return cls(data=data)
+
+    @classmethod
+    def from_raw(cls, data):
+        """
+        解析 `screencap`（不带 -p）输出的原始帧缓冲。
+
+        头部为小端 uint32 的 width、height、format，Android 9 起还多一个 colorspace 字段。
+        像素数据通过 np.frombuffer 直接映射到一个只读的 RGBA 数组，不做拷贝。
+        """
+        width, height, pixel_format = struct.unpack_from("<III", data, 0)
+        payload = width * height * 4
+        header = len(data) - payload
+        if header not in (12, 16):
+            raise ValueError(f"无法解析原始截图: {len(data)} 字节, {width}x{height}")
+        if pixel_format not in RAW_PIXEL_FORMATS:
+            raise ValueError(f"不支持的像素格式: {pixel_format}")
+        array = np.frombuffer(data, dtype=np.uint8, count=payload, offset=header).reshape(height, width, 4)
+        if RAW_PIXEL_FORMATS[pixel_format] == "BGRA":
+            array = array[..., [2, 1, 0, 3]]
+        return cls(array=array)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(PNG_SIGNATURE):
+            return cls(data=data)
+        frame = cls(image=Image.open(io.BytesIO(data)).convert("RGB"))
+        if data[:2] == b"\xff\xd8":
+            frame._jpeg = data
+        return frame
+
+    @property
+    def image(self):
+        if self._image is None:
+            if self._array is not None:
+                self._image = Image.fromarray(np.ascontiguousarray(self._array[..., :3]))
+            else:
+                self._image = Image.open(io.BytesIO(self.data)).convert("RGB")
+        return self._image
+
+    @property
+    def array(self):
+        """RGBA（原始帧缓冲）或 RGB 像素数组。"""
+        if self._array is None:
+            self._array = np.asarray(self.image)
+        return self._array
+
+    @property
+    def bgr(self):
+        """OpenCV 约定的 BGR 像素数组，与 cv2.imread 的结果一致。"""
+        if self._bgr is None:
+            array = self.array
+            code = cv2.COLOR_RGBA2BGR if array.shape[2] == 4 else cv2.COLOR_RGB2BGR
+            self._bgr = cv2.cvtColor(array, code)
+        return self._bgr
+
+    @property
+    def size(self):
+        if self._array is not None:
+            return self._array.shape[1], self._array.shape[0]
+        if self._image is None and self.data is not None:
+            # 直接读取 PNG 的 IHDR 头，无需解码
+            return struct.unpack(">II", self.data[16:24])
+        return self.image.size
+
+    @property
+    def jpeg(self):
+        if self._jpeg is None:
+            buffer = io.BytesIO()
+            self.image.save(buffer, "JPEG")
+            self._jpeg = buffer.getvalue()
+        return self._jpeg
+
+    @property
+    def data_url(self):
+        """JPEG 编码的 base64 data URL，一帧只生成一次；同一帧的各个模型请求引用同一个字符串。"""
+        if self._data_url is None:
+            self._data_url = "data:image/jpeg;base64," + base64.b64encode(self.jpeg).decode("ascii")
+        return self._data_url
+
+    def scaled(self, scale):
+        """
+        返回按 scale 缩小（区域平均）后的 Frame，同一缩放倍数只计算一次；scale 为 1 时返回自身。
+        """
+        if scale == 1:
+            return self
+        if scale not in self._scaled:
+            width, height = self.size
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            self._scaled[scale] = Frame(array=cv2.resize(np.ascontiguousarray(self.array[..., :3]), size, interpolation=cv2.INTER_AREA))
+        return self._scaled[scale]
+
+    def as_file(self):
+        """返回一个可供 PIL.Image.open 读取的内存文件对象。原始帧以无压缩的 BMP 编码。"""
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        buffer = io.BytesIO()
+        self.image.save(buffer, "BMP")
+        buffer.seek(0)
+        return buffer
+
+    def save(self, path):
+        """保存到文件：.jpg/.jpeg 写入 JPEG 编码，.png 直接写入原始 PNG 字节。"""
+        ext = path.lower().rsplit(".", 1)[-1]
+        if ext in ("jpg", "jpeg"):
+            content = self.jpeg
+        elif ext == "png" and self.data is not None:
+            content = self.data
+        else:
+            self.image.save(path)
+            return path
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+
+def as_frame(image):
+    """
+    把截图路径、Frame 或像素数组统一转换为 Frame。
+
+    像素数组按截图来源约定通道顺序：4 通道为 RGBA（原始帧缓冲），3 通道为 BGR（与 cv2.imread 一致）。
+    """
+    if isinstance(image, Frame):
+        return image
+    if isinstance(image, str):
+        return Frame.open(image)
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3 and image.shape[2] == 4:
+            return Frame(array=image)
+        if image.ndim == 3 and image.shape[2] == 3:
+            frame = Frame(array=cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            frame._bgr = image
+            return frame
+    raise TypeError(f"Unsupported screenshot type: {type(image)}")
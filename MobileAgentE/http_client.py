@@ -0,0 +1,102 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", default="10"))  # 秒
+# 读取超时（秒）；默认不限制（与直接调用 requests.post 时相同），推理模型的长回复可能需要很长时间
+HTTP_READ_TIMEOUT = os.environ.get("HTTP_READ_TIMEOUT") or None
+HTTP_READ_TIMEOUT = float(HTTP_READ_TIMEOUT) if HTTP_READ_TIMEOUT is not None else None
+HTTP_POOL_SIZE = 16  # 每个端点保持的最大空闲连接数（多台设备并发时共用）
+HTTP2 = os.environ.get("HTTP2", default="0") == "1"  # 需要安装 httpx[http2]
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def endpoint(url):
+    """连接池的键：scheme://host:port。"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+class Http2Client:
+    """httpx.Client 的薄封装，提供与 requests.Session.post 相同的调用方式。"""
+
+    def __init__(self, pool_size):
+        import httpx
+        self._httpx = httpx
+        self.client = httpx.Client(http2=True, limits=httpx.Limits(max_keepalive_connections=pool_size, max_connections=pool_size))
+
+    def request(self, method, url, headers=None, data=None, json=None, timeout=None, stream=False):
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        request = self.client.build_request(method, url, headers=headers, content=data, json=json,
+                                            timeout=self._httpx.Timeout(read, connect=connect))
+        return self.client.send(request, stream=stream)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.client.close()
+
+
+def _new_client(http2):
+    if http2:
+        try:
+            return Http2Client(HTTP_POOL_SIZE)
+        except ImportError:
+            print("WARNING: 未安装 httpx[http2]，使用 HTTP/1.1 连接池")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_client(url, http2=HTTP2):
+    """
+    返回 url 所在端点共用的 HTTP 客户端（requests.Session，或 http2=True 时的 Http2Client）。
+    同一端点的请求复用保持连接（keep-alive）的连接池，不再为每次调用重新做 TCP 和 TLS 握手。
+    """
+    key = (endpoint(url), http2)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _new_client(http2)
+        return _clients[key]
+
+
+def post(url, headers=None, data=None, json=None, timeout=None, stream=False):
+    """通过端点的连接池发送 POST 请求；timeout 默认为 (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)。"""
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    return get_client(url).post(url, headers=headers, data=data, json=json, timeout=timeout, stream=stream)
+
+
+def prewarm(urls, background=True):
+    """
+    预先建立到各端点的连接（发送一个 HEAD 请求，不关心返回的状态码），使第一次模型调用不必等待握手。
+    background 为 True 时在后台线程中进行，立即返回。
+    """
+    def warm():
+        for url in dict.fromkeys(url for url in urls if url):
+            try:
+                get_client(url).request("HEAD", url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_CONNECT_TIMEOUT)).close()
+            except Exception as e:
+                print(f"WARNING: 预连接 {endpoint(url)} 失败: {e}")
+
+    if not background:
+        warm()
+        return None
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+
+def close_all():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,32 +1,25 @@
-from MobileAgentE.crop import calculate_size, calculate_iou
+from MobileAgentE.crop import suppress_boxes
+from MobileAgentE.frame import as_frame
 from PIL import Image
 import torch
 
 def remove_boxes(boxes_filt, size, iou_threshold=0.5):
-    boxes_to_remove = set()
-
-    for i in range(len(boxes_filt)):
-        if calculate_size(boxes_filt[i]) > 0.05*size[0]*size[1]:
-            boxes_to_remove.add(i)
-        for j in range(len(boxes_filt)):
-            if calculate_size(boxes_filt[j]) > 0.05*size[0]*size[1]:
-                boxes_to_remove.add(j)
-            if i == j:
-                continue
-            if i in boxes_to_remove or j in boxes_to_remove:
-                continue
-            iou = calculate_iou(boxes_filt[i], boxes_filt[j])
-            if iou >= iou_threshold:
-                boxes_to_remove.add(j)
-
-    boxes_filt = [box for idx, box in enumerate(boxes_filt) if idx not in boxes_to_remove]
-    
-    return boxes_filt
-
-
-def det(input_image_path, caption, groundingdino_model, box_threshold=0.05, text_threshold=0.5):
-    image = Image.open(input_image_path)
-    size = image.size
+    # 过大的框（超过屏幕面积的 5%）直接去掉，其余按下标顺序做贪心 NMS，与逐对比较的结果一致
+    keep = suppress_boxes(boxes_filt, size, iou_threshold=iou_threshold)
+    return [boxes_filt[i] for i in keep]
+
+
+def det(input_image_path, caption, groundingdino_model, box_threshold=0.05, text_threshold=0.5, screen_size=None, scale=1.0):
+    # input_image_path 也可以是 Frame 或像素数组；此时以内存文件对象的形式传给模型
+    # 只检测屏幕的一部分时，screen_size 传入整个屏幕的尺寸，过大框的阈值仍按整个屏幕计算
+    # scale < 1 时把缩小后的截图交给模型；模型输出的是归一化坐标，按原始尺寸换算即回到原始分辨率
+    if isinstance(input_image_path, str) and scale == 1:
+        image = Image.open(input_image_path)
+        size = image.size
+    else:
+        frame = as_frame(input_image_path)
+        size = frame.size
+        input_image_path = frame.scaled(scale).as_file()
 
     caption = caption.lower()
     caption = caption.strip()
@@ -43,14 +36,14 @@ def det(input_image_path, caption, groundingdino_model, box_threshold=0.05, text
     result = groundingdino_model(inputs)
     boxes_filt = result['boxes']
 
+    # (cx, cy, w, h) 归一化坐标 -> 像素坐标 (x1, y1, x2, y2)
     H, W = size[1], size[0]
-    for i in range(boxes_filt.size(0)):
-        boxes_filt[i] = boxes_filt[i] * torch.Tensor([W, H, W, H])
-        boxes_filt[i][:2] -= boxes_filt[i][2:] / 2
-        boxes_filt[i][2:] += boxes_filt[i][:2]
+    boxes_filt = boxes_filt * torch.tensor([W, H, W, H], dtype=boxes_filt.dtype, device=boxes_filt.device)
+    boxes_filt[:, :2] -= boxes_filt[:, 2:] / 2
+    boxes_filt[:, 2:] += boxes_filt[:, :2]
 
     boxes_filt = boxes_filt.cpu().int().tolist()
-    filtered_boxes = remove_boxes(boxes_filt, size)  # [:9]
+    filtered_boxes = remove_boxes(boxes_filt, screen_size or size)  # [:9]
     coordinates = []
     for box in filtered_boxes:
         coordinates.append([box[0], box[1], box[2], box[3]])
@@ -0,0 +1,266 @@
+import copy
+
+import cv2
+import numpy as np
+
+from MobileAgentE.frame import Frame
+
+DIRTY_CELL_SIZE = 16  # 按 16x16 像素的网格统计变化
+DIRTY_PIXEL_THRESHOLD = 24  # 任一通道的差值超过该值的像素视为发生变化
+DIRTY_REGION_PADDING = 24  # 脏区域向外扩展的像素，避免切断边缘上的文字或图标
+
+
+def dirty_cells(prev_frame, frame, cell=DIRTY_CELL_SIZE, threshold=DIRTY_PIXEL_THRESHOLD):
+    """返回 (rows, cols) 的布尔网格，标记两帧之间发生变化的单元格。"""
+    channels = cv2.split(cv2.absdiff(prev_frame.array, frame.array))[:3]
+    diff = cv2.max(cv2.max(channels[0], channels[1]), channels[2])
+    _, mask = cv2.threshold(diff, threshold, 255, cv2.THRESH_BINARY)
+    height, width = mask.shape
+    rows, cols = -(-height // cell), -(-width // cell)
+    mask = cv2.copyMakeBorder(mask, 0, rows * cell - height, 0, cols * cell - width, cv2.BORDER_CONSTANT, value=0)
+    # 整数倍的区域平均缩放：单元格内只要有一个变化的像素，平均值就不为 0
+    return cv2.resize(mask, (cols, rows), interpolation=cv2.INTER_AREA) > 0
+
+
+def dirty_regions(prev_frame, frame, cell=DIRTY_CELL_SIZE, threshold=DIRTY_PIXEL_THRESHOLD, padding=DIRTY_REGION_PADDING):
+    """
+    对比两帧截图，返回发生变化的矩形区域 [[x1, y1, x2, y2], ...]（像素坐标）。
+
+    相邻（含对角）的变化单元格合并为一个区域；两帧尺寸不同时返回整个屏幕。
+    """
+    width, height = frame.size
+    if prev_frame.size != frame.size:
+        return [[0, 0, width, height]]
+    cells = dirty_cells(prev_frame, frame, cell, threshold)
+    if not cells.any():
+        return []
+    count, _, stats, _ = cv2.connectedComponentsWithStats(cells.astype(np.uint8), connectivity=8)
+    regions = []
+    for x, y, w, h, _ in stats[1:count]:
+        regions.append([
+            max(0, int(x * cell) - padding), max(0, int(y * cell) - padding),
+            min(width, int((x + w) * cell) + padding), min(height, int((y + h) * cell) + padding),
+        ])
+    return merge_regions(regions)
+
+
+def intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def merge_regions(regions):
+    """把相互重叠的区域合并为它们的外接矩形，直到没有区域重叠。"""
+    regions = [list(region) for region in regions]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if intersects(regions[i], regions[j]):
+                    a, b = regions[i], regions.pop(j)
+                    regions[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    merged = True
+                    break
+            if merged:
+                break
+    return sorted(regions, key=lambda region: (region[1], region[0]))
+
+
+def expand_regions(regions, boxes):
+    """
+    扩大脏区域，使其完整覆盖与之相交的上一帧元素，避免元素被区域边界切断后只识别出一部分。
+    """
+    regions = merge_regions(regions)
+    changed = True
+    while changed:
+        changed = False
+        for box in boxes:
+            for region in regions:
+                if intersects(box, region) and not (region[0] <= box[0] and region[1] <= box[1] and box[2] <= region[2] and box[3] <= region[3]):
+                    region[0], region[1] = min(region[0], box[0]), min(region[1], box[1])
+                    region[2], region[3] = max(region[2], box[2]), max(region[3], box[3])
+                    changed = True
+        if changed:
+            regions = merge_regions(regions)
+    return regions
+
+
+def region_fraction(regions, size):
+    """区域占屏幕面积的比例（merge_regions 之后区域互不重叠）。"""
+    width, height = size
+    return sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions) / float(width * height)
+
+
+def region_frames(frame, regions):
+    """
+    依次返回 (子帧, (x 偏移, y 偏移))；regions 为 None 时返回整帧。
+    子帧直接从已解码的像素数组中切出，不重新编码。
+    """
+    if regions is None:
+        yield frame, (0, 0)
+        return
+    array = frame.array
+    for x1, y1, x2, y2 in regions:
+        yield Frame(array=np.ascontiguousarray(array[y1:y2, x1:x2])), (x1, y1)
+
+
+def carry_over(previous_infos, regions):
+    """返回上一帧中与所有脏区域都不相交的感知信息（需要 "box" 字段）。"""
+    return [copy.deepcopy(info) for info in previous_infos if not any(intersects(info["box"], region) for region in regions)]
+
+
+def merge_perception(carried, new_infos):
+    """
+    合并沿用的元素与脏区域内重新感知的元素。顺序与完整感知一致：先文本后图标，
+    各自按屏幕位置从上到下、从左到右排列。
+    """
+    def order(infos):
+        return sorted(infos, key=lambda info: (info["box"][1], info["box"][0]))
+    infos = carried + new_infos
+    texts = [info for info in infos if info["text"].startswith("text: ")]
+    icons = [info for info in infos if not info["text"].startswith("text: ")]
+    return order(texts) + order(icons)
+
+
+SCROLL_CANDIDATES = 16  # 验证互相关得分最高的若干个候选偏移（列表内容的周期性会产生多个相近的峰）
+SCROLL_MIN_SHIFT = 8  # 小于该偏移（像素）不视为滚动
+SCROLL_MIN_OVERLAP = 0.25  # 候选偏移下两帧至少重叠的屏幕比例
+SCROLL_MIN_MATCH = 0.5  # 滚动区域中至少该比例的行与平移后的上一帧一致，才采用估计的偏移
+SCROLL_DESCRIPTOR_WIDTH = 32  # 每行压缩为 32 个灰度值，用于快速验证候选偏移
+SCROLL_DESCRIPTOR_TOLERANCE = 8
+
+
+def gray(frame):
+    array = frame.array
+    return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+
+def changed_rows(a, b, threshold=DIRTY_PIXEL_THRESHOLD):
+    """逐行比较两个形状相同的灰度图，返回每一行是否有像素差值超过 threshold。"""
+    _, mask = cv2.threshold(cv2.absdiff(a, b), threshold, 255, cv2.THRESH_BINARY)
+    return cv2.reduce(mask, 1, cv2.REDUCE_MAX).ravel() > 0
+
+
+def shifted_rows(prev, cur, offset, threshold=DIRTY_PIXEL_THRESHOLD):
+    """
+    返回长度为 H 的布尔数组：当前帧第 y 行与上一帧第 y+offset 行一致时为 True，
+    对应行在上一帧中不存在时为 False。
+    """
+    height = cur.shape[0]
+    match = np.zeros(height, dtype=bool)
+    lo, hi = max(0, -offset), min(height, height - offset)
+    if lo < hi:
+        match[lo:hi] = ~changed_rows(prev[lo + offset:hi + offset], cur[lo:hi], threshold)
+    return match
+
+
+def estimate_scroll(prev_frame, frame, candidates=SCROLL_CANDIDATES, min_shift=SCROLL_MIN_SHIFT):
+    """
+    估计两帧之间内容的垂直滚动偏移 offset：当前帧第 y 行的内容来自上一帧第 y+offset 行
+    （向上滑动时 offset > 0）。
+
+    每行先压缩为 SCROLL_DESCRIPTOR_WIDTH 个灰度值，对各列的行剖面做互相关（FFT）得到候选偏移，
+    再逐个验证候选：取与平移后的上一帧一致、且与上一帧同一位置不一致的行数最多的候选。
+
+    返回:
+        int: 偏移像素；无法可靠估计（没有滚动或尺寸不同）时返回 None。
+    """
+    if prev_frame.size != frame.size:
+        return None
+    prev, cur = gray(prev_frame), gray(frame)
+    height = cur.shape[0]
+    d_prev = cv2.resize(prev, (SCROLL_DESCRIPTOR_WIDTH, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+    d_cur = cv2.resize(cur, (SCROLL_DESCRIPTOR_WIDTH, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    # 各列行剖面互相关之和：corr[k] = sum_y <d_prev[y+k], d_cur[y]>（负偏移回绕到末尾）
+    n = 2 * height
+    p_prev = np.fft.rfft(d_prev - d_prev.mean(axis=0), n, axis=0)
+    p_cur = np.fft.rfft(d_cur - d_cur.mean(axis=0), n, axis=0)
+    corr = np.fft.irfft((p_prev * np.conj(p_cur)).sum(axis=1), n)
+    offsets = np.arange(n)
+    offsets[offsets >= height] -= n
+    overlap = height - np.abs(offsets)
+    # 只考虑局部极大值，且要求足够的重叠，避免重叠很少的偏移因归一化而得分虚高
+    peaks = (corr >= np.roll(corr, 1)) & (corr >= np.roll(corr, -1))
+    valid = peaks & (np.abs(offsets) >= min_shift) & (overlap >= height * SCROLL_MIN_OVERLAP)
+    if not valid.any():
+        return None
+    score = corr[valid] / overlap[valid]
+    top = offsets[valid][np.argsort(score)[::-1][:candidates]]
+
+    static = np.abs(d_prev - d_cur).max(axis=1) <= SCROLL_DESCRIPTOR_TOLERANCE
+    best, best_rows = None, 0
+    for offset in top:
+        offset = int(offset)
+        lo, hi = max(0, -offset), min(height, height - offset)
+        match = np.abs(d_prev[lo + offset:hi + offset] - d_cur[lo:hi]).max(axis=1) <= SCROLL_DESCRIPTOR_TOLERANCE
+        # 与上一帧同一位置也一致的行（空白行、固定的标题栏）不能区分偏移，不计入得分
+        rows = int((match & ~static[lo:hi]).sum())
+        if rows > best_rows:
+            best, best_rows = offset, rows
+    return best
+
+
+def scroll_regions(prev_frame, frame, previous_infos, offset=None, min_match=SCROLL_MIN_MATCH):
+    """
+    滑动后复用上一帧的感知结果：固定的顶部/底部区域（与上一帧逐行一致）中的元素原样沿用，
+    滚动区域中的元素按偏移平移；新露出的条带、与上一帧都不一致的行以及被区域边界截断的元素需要重新感知。
+
+    参数:
+        previous_infos (list): 上一帧的感知信息（需要 "box" 字段）。
+        offset (int): 已知的滚动偏移；为 None 时用 estimate_scroll 估计。
+
+    返回:
+        (offset, regions, infos): 需要重新感知的区域和已平移/沿用的感知信息；无法确定滚动时返回 None。
+    """
+    if offset is None:
+        offset = estimate_scroll(prev_frame, frame)
+    if offset is None:
+        return None
+    prev, cur = gray(prev_frame), gray(frame)
+    width, height = frame.size
+    static = ~changed_rows(prev, cur)
+    shifted = shifted_rows(prev, cur, offset)
+
+    # 固定的顶部/底部：从屏幕边缘开始连续与上一帧同一位置一致的行
+    top = int(np.argmin(static)) if not static.all() else height
+    bottom = height - int(np.argmin(static[::-1])) if not static.all() else height
+    if top >= bottom or shifted[top:bottom].mean() < min_match:
+        return None
+
+    infos, boxes, regions = [], [], []
+    for info in previous_infos:
+        x1, y1, x2, y2 = info["box"]
+        if y2 <= top or y1 >= bottom:
+            infos.append(copy.deepcopy(info))
+            boxes.append(info["box"])
+            continue
+        if y1 < top or y2 > bottom:
+            continue  # 跨越固定区域边界的元素在上一帧中已被部分遮挡，丢弃
+        ny1, ny2 = y1 - offset, y2 - offset
+        if ny2 <= top or ny1 >= bottom:
+            continue  # 滚出了可见区域
+        box = [x1, max(ny1, top), x2, min(ny2, bottom)]
+        if ny1 >= top and ny2 <= bottom and shifted[ny1:ny2].all():
+            moved = copy.deepcopy(info)
+            moved["box"] = [x1, ny1, x2, ny2]
+            moved["coordinates"] = [info["coordinates"][0], info["coordinates"][1] - offset]
+            infos.append(moved)
+        else:
+            regions.append(box)  # 部分滚出或部分新露出的元素，重新感知可见部分
+        boxes.append(box)
+
+    # 滚动区域中与平移后的上一帧不一致的行（新露出的条带或内容变化）按整行宽度重新感知；
+    # 条带向两侧扩展到最近的空白行，覆盖在上一帧中只露出一部分（因而没有被感知到）的元素
+    blank = cv2.reduce(cv2.absdiff(cur[:, 1:], cur[:, :-1]), 1, cv2.REDUCE_MAX).ravel() <= DIRTY_PIXEL_THRESHOLD
+    dirty = ~shifted[top:bottom]
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], dirty.astype(np.int8), [0]])))
+    for start, end in zip(edges[::2] + top, edges[1::2] + top):
+        while start > top and not blank[start - 1]:
+            start -= 1
+        while end < bottom and not blank[end]:
+            end += 1
+        regions.append([0, max(0, int(start) - DIRTY_REGION_PADDING), width, min(height, int(end) + DIRTY_REGION_PADDING)])
+
+    regions = expand_regions(regions, boxes)
+    return offset, regions, carry_over(infos, regions)
@@ -0,0 +1,77 @@
+import difflib
+import re
+import unicodedata
+
+# 匹配时忽略的字符：空白和常见的中英文标点
+IGNORED_CHARS = re.compile(r"[\s\.\,\:\;\!\?\-_'\"`·•|/\\()（）【】\[\]《》<>、，。：；！？“”‘’]+")
+
+
+def normalize_label(text):
+    """统一全角/半角与大小写，并去掉空白和标点，例如 "Google  Maps" 和 "google maps" 都得到 "googlemaps"。"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return IGNORED_CHARS.sub("", text)
+
+
+def line_boxes(box, num_lines):
+    """
+    多行文本块中每一行的边框。merge_text_blocks 只合并高度相近、间距很小的行，
+    因此按行数等分文本块的高度；box 为 None 时返回 [None] * num_lines。
+    """
+    if box is None:
+        return [None] * num_lines
+    x1, y1, x2, y2 = box
+    height = (y2 - y1) / num_lines
+    return [[x1, int(y1 + k * height), x2, int(y1 + (k + 1) * height)] for k in range(num_lines)]
+
+
+class LabelIndex:
+    """
+    当前屏幕上文本标签的索引，用于按名称查找应用图标下方的文字等标签，无需再次运行 OCR。
+
+    参数:
+        perception_infos (list): Perceptor.get_perception_infos 返回的感知信息；
+            只使用以 "text: " 开头的条目，多行文本块中的每一行也单独建立索引。
+    """
+
+    def __init__(self, perception_infos):
+        self.entries = []  # (规范化后的标签, 原始标签, 感知信息, 标签所在行的边框)
+        for info in perception_infos:
+            if not info["text"].startswith("text: "):
+                continue
+            text = info["text"][len("text: "):]
+            lines = text.split("\n")
+            boxes = line_boxes(info.get("box"), len(lines))
+            # 整个文本块匹配时使用第一行的边框：应用图标在标签的上方
+            candidates = [(text, boxes[0])] + (list(zip(lines, boxes)) if len(lines) > 1 else [])
+            for line, box in candidates:
+                normalized = normalize_label(line)
+                if normalized:
+                    self.entries.append((normalized, line, info, box))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, name, min_score=0.8):
+        """
+        查找与 name 最匹配的标签。
+
+        规范化后完全相同的标签得分为 1；其余按编辑相似度打分。标签只是在名称后多了数字时
+        （例如未读角标 "微信 (2)"）得分为 0.9。得分相同时取屏幕上靠前的标签。
+
+        返回:
+            (perception_info, label, score, box)，box 为匹配的那一行的边框（感知信息没有 "box" 字段时为 None）；
+            没有得分不低于 min_score 的标签时返回 None。
+        """
+        target = normalize_label(name)
+        if not target:
+            return None
+        best = None
+        for normalized, label, info, box in self.entries:
+            if normalized == target:
+                return info, label, 1.0, box
+            score = difflib.SequenceMatcher(None, target, normalized).ratio()
+            if normalized.startswith(target) and normalized[len(target):].isdigit():
+                score = max(score, 0.9)
+            if score >= min_score and (best is None or score > best[2]):
+                best = (info, label, score, box)
+        return best
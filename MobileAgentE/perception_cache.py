@@ -0,0 +1,156 @@
+import base64
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+PERCEPTION_HASH_SIZE = 32  # 差值哈希的边长，共 PERCEPTION_HASH_SIZE**2 位
+PERCEPTION_HASH_STEP = 4  # 计算哈希前按步长抽取像素，减少缩放的开销
+# 哈希只用于查找候选条目：差值哈希对小范围的文字变化（数量 3 -> 4、输入框中的文字）不敏感，
+# 因此每个条目还保存一张 1/PERCEPTION_THUMBNAIL_SCALE 分辨率的灰度缩略图，只有缩略图逐像素的
+# 最大差异不超过 PERCEPTION_VERIFY_THRESHOLD 时才算命中
+PERCEPTION_THUMBNAIL_SCALE = 2
+PERCEPTION_VERIFY_THRESHOLD = 8
+
+
+def perceptual_hash(frame, hash_size=PERCEPTION_HASH_SIZE, step=PERCEPTION_HASH_STEP):
+    """
+    截图的差值哈希：先按区域平均缩放为 hash_size x (hash_size+1) 的灰度图，再比较水平相邻像素。
+
+    返回:
+        np.ndarray: 打包后的哈希位 (uint8)。
+    """
+    pixels = frame.array[::step, ::step, :3].astype(np.float32)
+    gray = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1])
+
+
+def thumbnail(frame, scale=PERCEPTION_THUMBNAIL_SCALE):
+    """按区域平均缩小的灰度图（uint8），单个字符的变化在其中仍有数十个灰度级的差异。"""
+    pixels = frame.array
+    gray = cv2.cvtColor(pixels, cv2.COLOR_RGBA2GRAY if pixels.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    height, width = gray.shape
+    return cv2.resize(gray, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+
+
+def same_screen(a, b, threshold=PERCEPTION_VERIFY_THRESHOLD):
+    return a.shape == b.shape and int(cv2.absdiff(a, b).max()) <= threshold
+
+
+def encode_thumbnail(image):
+    return base64.b64encode(cv2.imencode(".png", image)[1].tobytes()).decode("ascii")
+
+
+def decode_thumbnail(data):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(data), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def hamming_distance(a, b):
+    return int(np.unpackbits(np.bitwise_xor(a, b)).sum())
+
+
+class PerceptionCache:
+    """
+    以截图感知哈希为键的感知结果 LRU 缓存。界面没有变化时（例如点击未生效或执行了 Wait），
+    直接复用上一次的 perception_infos，跳过 OCR、图标检测和图标描述。哈希相同（或在 tolerance 之内）
+    的条目还要与截图的缩略图逐像素比较，确认屏幕内容没有变化才命中。
+
+    参数:
+        capacity (int): 最多缓存的截图数量，超出后淘汰最久未使用的条目。
+        tolerance (int): 查找候选条目时允许的最大哈希汉明距离；0 表示只比较哈希完全一致的条目。
+        path (str): 可选的 JSON 持久化路径；创建时加载，每次写入后保存。
+    """
+
+    def __init__(self, capacity=64, tolerance=0, path=None):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (hash hex, width, height) -> (hash, thumbnail, perception_infos)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _find(self, key, bits, thumb):
+        if key in self._entries:
+            return key if same_screen(thumb, self._entries[key][1]) else None
+        if self.tolerance <= 0:
+            return None
+        best, best_distance = None, self.tolerance + 1
+        for other, (other_bits, other_thumb, _) in self._entries.items():
+            if other[1:] != key[1:]:
+                continue
+            distance = hamming_distance(bits, other_bits)
+            if distance < best_distance and same_screen(thumb, other_thumb):
+                best, best_distance = other, distance
+        return best
+
+    def get(self, frame):
+        """
+        查找与 frame 内容相同的截图的感知结果。
+
+        返回:
+            (lookup, perception_infos): 未命中时 perception_infos 为 None，lookup 可用于随后的 put。
+        """
+        bits = perceptual_hash(frame)
+        thumb = thumbnail(frame)
+        width, height = frame.size
+        key = (bits.tobytes().hex(), width, height)
+        with self._lock:
+            found = self._find(key, bits, thumb)
+            if found is None:
+                self.misses += 1
+                return (key, thumb), None
+            self.hits += 1
+            self._entries.move_to_end(found)
+            return (key, thumb), copy.deepcopy(self._entries[found][2])
+
+    def put(self, lookup, perception_infos):
+        key, thumb = lookup
+        with self._lock:
+            bits = np.frombuffer(bytes.fromhex(key[0]), dtype=np.uint8)
+            self._entries[key] = (bits, thumb, copy.deepcopy(perception_infos))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save(self.path)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "size": len(self._entries)}
+
+    def load(self, path):
+        with open(path, "r") as f:
+            entries = json.load(f)
+        with self._lock:
+            for entry in entries[-self.capacity:]:
+                if "thumbnail" not in entry:
+                    continue  # 旧版本的缓存文件没有缩略图，无法确认内容，丢弃
+                key = (entry["hash"], entry["width"], entry["height"])
+                bits = np.frombuffer(bytes.fromhex(entry["hash"]), dtype=np.uint8)
+                self._entries[key] = (bits, decode_thumbnail(entry["thumbnail"]), entry["perception_infos"])
+
+    def save(self, path=None):
+        with self._lock:
+            self._save(path or self.path)
+
+    def _save(self, path):
+        entries = [
+            {"hash": key[0], "width": key[1], "height": key[2], "thumbnail": encode_thumbnail(thumb), "perception_infos": perception_infos}
+            for key, (_, thumb, perception_infos) in self._entries.items()
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
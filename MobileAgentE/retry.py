@@ -0,0 +1,302 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+# 失败的类别
+RATE_LIMIT = "rate_limit"  # 429：按 Retry-After 等待后重试，不计入熔断
+SERVER = "server"  # 5xx、408：指数退避后重试，计入熔断
+NETWORK = "network"  # 连接失败、超时等发送时抛出的异常：同 SERVER
+MALFORMED = "malformed"  # 2xx 但响应体无法解析：最多重试 max_malformed_attempts 次
+CLIENT = "client"  # 其他 4xx（参数错误、鉴权失败等）：重试没有意义，立即放弃
+
+RETRYABLE = {RATE_LIMIT, SERVER, NETWORK, MALFORMED}
+BREAKER_FAILURES = {SERVER, NETWORK}
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 6  # 包括第一次请求
+    max_malformed_attempts: int = 2
+    base_delay: float = 1.0  # 第 n 次重试前的退避上限为 base_delay * multiplier ** (n - 1)，不超过 max_delay
+    multiplier: float = 2.0
+    max_delay: float = 30.0
+    max_retry_after: float = 60.0  # 服务端要求的等待时间超过该值时直接放弃
+    max_elapsed: float = 120.0  # 单次调用（含等待）的总时长上限（秒）
+    breaker_threshold: int = 5  # 连续多少次调用以 SERVER/NETWORK 失败告终（用尽重试后放弃）后熔断
+    breaker_reset: float = 30.0  # 熔断后多久放行一次试探请求（秒）
+    budget_ratio: float = 0.2  # 重试预算：时间窗口内的重试次数不超过请求数的该比例……
+    budget_min_retries: int = 10  # ……或该最小值（取较大者）
+    budget_window: float = 60.0  # 秒
+
+    def delay(self, attempt, retry_after=None):
+        """第 attempt 次重试前的等待时间：Retry-After（加少量抖动），否则为带抖动的指数退避（取上限的一半到全部）。"""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, min(1.0, self.base_delay))
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+
+# 模型调用（管理者、操作者等）：失败会中断这一步，值得多等
+CHAT_POLICY = RetryPolicy()
+# 图标描述：失败时使用占位描述，并且一步中会并发发出很多请求，因此少重试、早放弃
+CAPTION_POLICY = RetryPolicy(max_attempts=3, max_malformed_attempts=1, max_delay=5.0, max_retry_after=10.0, max_elapsed=15.0)
+
+
+class RetryError(Exception):
+    """放弃调用：category 为最后一次失败的类别，或 "circuit_open" / "budget" / "deadline"。"""
+
+    def __init__(self, endpoint, category, attempts, detail):
+        super().__init__(f"{endpoint}: {category} after {attempts} attempt(s): {detail}")
+        self.endpoint = endpoint
+        self.category = category
+        self.attempts = attempts
+        self.detail = detail
+
+
+def classify_status(status):
+    if status == 429:
+        return RATE_LIMIT
+    if status >= 500 or status == 408:
+        return SERVER
+    return CLIENT
+
+
+def parse_retry_after(headers):
+    """解析 Retry-After（秒数或 HTTP 日期）以及部分服务商使用的 retry-after-ms，返回秒数或 None。"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def describe(response):
+    """失败响应的简短描述，用于日志。"""
+    read = getattr(response, "read", None)
+    if callable(read):
+        try:
+            read()  # httpx 的流式响应要先读取响应体才能访问 text
+        except Exception:
+            pass
+    try:
+        text = response.text
+    except Exception:  # 没有 text 属性（DashScope），或读取响应体失败
+        text = None
+    if isinstance(text, str):
+        return f"HTTP {response.status_code}: {text[:500]}"
+    # DashScope 的响应没有原始响应体，只有 code 和 message
+    return f"HTTP {response.status_code}: {getattr(response, 'code', '')} {getattr(response, 'message', '')}".strip()
+
+
+class CircuitBreaker:
+    """
+    连续 threshold 次调用失败后熔断（open），熔断期间的调用立即失败；reset 秒后进入半开（half_open）状态，
+    只放行一个试探请求：成功则恢复（closed），失败则重新熔断。
+
+    按调用而不是按尝试计数：一次调用自身的重试不会让熔断器打开，否则一次短暂的故障就会让
+    正在重试的调用以 circuit_open 提前放弃。
+    """
+
+    def __init__(self, threshold, reset):
+        self.threshold = threshold
+        self.reset = reset
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self, final=True):
+        """
+        final 为 True 表示一次调用用尽重试后失败，计入连续失败次数；为 False 表示调用中的一次失败尝试，
+        只在它是半开状态的试探请求时重新熔断。
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return
+            if not final:
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """试探请求以不计入熔断的结果（限流、响应体格式错误等）结束时，允许下一个请求继续试探。"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic() - self.reset
+
+
+class RetryBudget:
+    """滑动时间窗口内的重试预算：重试次数不超过 max(min_retries, ratio * 请求数)，避免故障时重试把请求量放大数倍。"""
+
+    def __init__(self, ratio, min_retries, window):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.requests = deque()
+        self.retries = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        for events in (self.requests, self.retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self.requests.append(now)
+
+    def withdraw(self):
+        """为一次重试扣除预算；预算不足时返回 False。"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self.retries) >= max(self.min_retries, self.ratio * len(self.requests)):
+                return False
+            self.retries.append(now)
+            return True
+
+
+class EndpointState:
+    def __init__(self, policy):
+        self.breaker = CircuitBreaker(policy.breaker_threshold, policy.breaker_reset)
+        self.budget = RetryBudget(policy.budget_ratio, policy.budget_min_retries, policy.budget_window)
+        self.stats = {"calls": 0, "retries": 0, "gave_up": 0, "slept": 0.0}
+        self.lock = threading.Lock()
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + value
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def endpoint_state(endpoint, policy):
+    with _endpoints_lock:
+        if endpoint not in _endpoints:
+            _endpoints[endpoint] = EndpointState(policy)
+        return _endpoints[endpoint]
+
+
+def stats():
+    """各端点的调用、重试、各类失败次数、累计等待时间和熔断状态。"""
+    with _endpoints_lock:
+        return {endpoint: dict(state.stats, breaker=state.breaker.state) for endpoint, state in _endpoints.items()}
+
+
+def reset():
+    with _endpoints_lock:
+        _endpoints.clear()
+
+
+def call_with_retry(endpoint, send, parse, policy=CHAT_POLICY, sleep=time.sleep):
+    """
+    按 policy 发送请求并在可重试的失败后重试。
+
+    参数:
+        endpoint (str): 熔断和重试预算的键，例如 http_client.endpoint(api_url)。
+        send (callable): 发送一次请求，返回带 status_code（可选 headers）的响应；抛出的异常视为 NETWORK 失败。
+        parse (callable): 从成功的响应中取出结果；抛出异常时视为 MALFORMED 失败。
+
+    返回:
+        parse 的结果。放弃时抛出 RetryError。
+    """
+    state = endpoint_state(endpoint, policy)
+    state.count("calls")
+    state.budget.record_request()
+    deadline = time.monotonic() + policy.max_elapsed
+    attempt = 0
+    malformed = 0
+    while True:
+        if not state.breaker.allow():
+            state.count("gave_up")
+            raise RetryError(endpoint, "circuit_open", attempt, f"{policy.breaker_threshold} consecutive failures")
+        attempt += 1
+        retry_after = None
+        try:
+            response = send()
+        except Exception as e:
+            category, detail = NETWORK, f"{type(e).__name__}: {e}"
+        else:
+            status = getattr(response, "status_code", 200)
+            if 200 <= status < 300:
+                try:
+                    result = parse(response)
+                except Exception as e:
+                    category, detail = MALFORMED, f"{type(e).__name__}: {e}; {describe(response)}"
+                    malformed += 1
+                else:
+                    state.breaker.record_success()
+                    return result
+            else:
+                category, detail = classify_status(status), describe(response)
+                retry_after = parse_retry_after(getattr(response, "headers", None))
+                close = getattr(response, "close", None)
+                if callable(close):
+                    close()  # 流式请求的失败响应不会被调用方读取，不关闭会一直占用连接池中的连接
+
+        state.count(category)
+        if category in BREAKER_FAILURES:
+            state.breaker.record_failure(final=False)
+        else:
+            state.breaker.release()
+
+        reason, delay = None, 0.0
+        if category not in RETRYABLE or attempt >= policy.max_attempts or malformed >= policy.max_malformed_attempts:
+            reason = category
+        elif retry_after is not None and retry_after > policy.max_retry_after:
+            reason, detail = category, f"Retry-After {retry_after:.0f}s; {detail}"
+        else:
+            delay = policy.delay(attempt, retry_after)
+            if time.monotonic() + delay > deadline:
+                reason = "deadline"
+            elif not state.budget.withdraw():
+                reason = "budget"
+        if reason is not None:
+            if category in BREAKER_FAILURES:
+                state.breaker.record_failure()  # 整个调用失败，计入熔断一次
+            state.count("gave_up")
+            raise RetryError(endpoint, reason, attempt, detail)
+        print(f"{category} ({detail[:200]}); retry {attempt} in {delay:.1f}s...")
+        state.count("retries")
+        state.count("slept", delay)
+        sleep(delay)
@@ -0,0 +1,134 @@
+import queue
+import re
+import subprocess
+import threading
+import time
+
+from MobileAgentE.controller import home
+
+
+def device_adb_path(adb_path, serial):
+    """为指定序列号的设备构造 adb 命令；serial 为 None 时使用默认设备。"""
+    if serial is None:
+        return adb_path
+    return f"{adb_path} -s {serial}"
+
+
+TIP_NUMBER = re.compile(r"^\s*\d+\.\s*")
+
+
+def merge_tips(existing, updated):
+    """
+    合并共享的持久化提示：保留 existing（当前文件内容）中的全部提示，只把 updated 中新出现的提示
+    按顺序编号后追加到末尾。比较时忽略行首的编号，因此其他设备写入的提示不会被覆盖或重复。
+    """
+    lines = existing.rstrip("\n").splitlines()
+    known = {TIP_NUMBER.sub("", line).strip() for line in lines}
+    number = sum(1 for line in lines if TIP_NUMBER.match(line))
+    for line in updated.splitlines():
+        tip = TIP_NUMBER.sub("", line).strip()
+        if tip and tip not in known:
+            lines.append(f"{number}. {tip}")
+            known.add(tip)
+            number += 1
+    return "\n".join(lines) + "\n"
+
+
+### 任务之间的设备重置步骤 ###
+
+def reset_none(adb_path, serial):
+    pass
+
+
+def reset_home(adb_path, serial):
+    home(adb_path)
+    time.sleep(2)
+
+
+def reset_interactive(adb_path, serial):
+    print("IMPORTANT: Please reset the device as needed before running the next task!")
+    input(f"Press Enter to continue to next task on {serial or 'default device'} ...")
+
+
+def make_command_reset(command):
+    """
+    使用外部命令重置设备。命令中的 {adb} 和 {serial} 会被替换为当前设备的 adb 命令和序列号，
+    例如 "{adb} shell am force-stop com.android.chrome"。
+    """
+    def reset(adb_path, serial):
+        result = subprocess.run(command.format(adb=adb_path, serial=serial or ""), shell=True)
+        if result.returncode != 0:
+            print(f"WARNING: reset command failed on {serial}: {command}")
+    return reset
+
+
+RESET_HOOKS = {
+    "none": reset_none,
+    "home": reset_home,
+    "interactive": reset_interactive,
+}
+
+
+class DeviceScheduler:
+    """
+    在多台设备上并发执行任务：每台设备一个工作线程，从共享队列中领取下一个任务，
+    因此吞吐量随设备数量近似线性增长。重置失败的设备不再领取任务，剩余任务由其他设备继续执行；
+    所有设备都停止后仍未执行的任务计入失败任务。
+
+    参数:
+        serials (list): 设备序列号列表；[None] 表示只使用默认设备。
+        run_task (callable): run_task(serial, index, task)，在指定设备上执行一个任务。
+        reset (callable): reset(adb_path, serial)，每个任务结束后调用。
+        adb_path (str): 基础 adb 命令。
+    """
+
+    def __init__(self, serials, run_task, reset=reset_none, adb_path="adb"):
+        self.serials = serials
+        self.run_task = run_task
+        self.reset = reset
+        self.adb_path = adb_path
+        self.errors = []
+        self.failed_devices = []  # 重置失败、已停止领取任务的设备
+        self._errors_lock = threading.Lock()
+
+    def _worker(self, serial, tasks):
+        device_adb = device_adb_path(self.adb_path, serial)
+        while True:
+            try:
+                index, task = tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.run_task(serial, index, task)
+            except Exception as e:
+                print(f"[{serial}] Failed when doing task: {task.get('instruction')}")
+                print(f"[{serial}] ERROR:", e)
+                with self._errors_lock:
+                    self.errors.append((index, task))
+            finally:
+                try:
+                    self.reset(device_adb, serial)
+                except Exception as e:  # adb 出错，或交互式重置时 stdin 已关闭（EOFError）
+                    print(f"[{serial}] reset failed, stopping this device: {type(e).__name__}: {e}")
+                    with self._errors_lock:
+                        self.failed_devices.append(serial)
+                    return
+
+    def run(self, tasks):
+        """执行全部任务并返回失败任务的 (index, task) 列表（按任务顺序）。"""
+        task_queue = queue.Queue()
+        for item in enumerate(tasks):
+            task_queue.put(item)
+        if len(self.serials) == 1:
+            self._worker(self.serials[0], task_queue)
+        else:
+            threads = [threading.Thread(target=self._worker, args=(serial, task_queue), name=f"device-{serial}") for serial in self.serials]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        while not task_queue.empty():
+            index, task = task_queue.get_nowait()
+            print(f"Task not run, no device left: {task.get('instruction')}")
+            self.errors.append((index, task))
+        return sorted(self.errors, key=lambda item: item[0])
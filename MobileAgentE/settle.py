@@ -0,0 +1,128 @@
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from MobileAgentE.controller import capture_screenshot
+
+# 各操作后等待界面稳定的参数:
+#   min_wait: 操作后至少等待的时间（秒），给界面开始响应留出时间；会发起加载的操作（Open_App、Enter、Wait）更长，
+#             避免加载开始前的几帧被误判为已稳定
+#   max_wait: 最长等待时间（秒），超时后不再等待
+#   interval: 两次采样之间的间隔（秒）
+#   threshold: 相邻两帧被视为相同时允许的最大差异（pixel: 发生变化的网格单元数；hash: 分块差值哈希的汉明距离）
+#   stable_frames: 连续多少对相邻帧相同才认为界面已稳定
+DEFAULT_SETTLE_CONFIG = {"min_wait": 0.3, "max_wait": 5, "interval": 0.3, "threshold": 0, "stable_frames": 2, "method": "pixel"}
+
+SETTLE_CONFIGS = {
+    "Open_App": {"min_wait": 2.0, "max_wait": 20, "stable_frames": 3},
+    "Tap": {"max_wait": 5},
+    "Swipe": {"max_wait": 5},
+    "Type": {"min_wait": 0.2, "max_wait": 3},
+    "Enter": {"min_wait": 2.0, "max_wait": 10, "stable_frames": 3},
+    "Back": {"max_wait": 3},
+    "Home": {"max_wait": 3},
+    "Switch_App": {"max_wait": 3},
+    "Wait": {"min_wait": 5.0, "max_wait": 10, "stable_frames": 3},
+}
+
+SETTLE_DOWNSAMPLE = 4  # 采样帧在每个方向上的缩小倍数（区域平均，细小的元素不会被跳过）
+# 与 incremental.dirty_cells 相同：按网格取每个单元格内的最大差值，局部的加载动画不会被整屏平均值稀释
+SETTLE_CELL_SIZE = 8  # 单元格边长（缩小后的像素，即屏幕上的 32 像素）
+SETTLE_PIXEL_THRESHOLD = 24  # 灰度差值超过该值的像素视为发生变化
+SETTLE_HASH_GRID = (16, 8)  # hash 方法把画面分为 行 x 列 块，每块单独计算差值哈希
+
+
+@dataclass
+class SettleResult:
+    action: str
+    duration: float
+    settled: bool  # False 表示等待达到 max_wait 仍未稳定
+    polls: int
+
+
+def get_settle_config(action, overrides=None):
+    config = dict(DEFAULT_SETTLE_CONFIG)
+    config.update(SETTLE_CONFIGS.get(action, {}))
+    if overrides:
+        config.update(overrides.get("default", {}))
+        config.update(overrides.get(action, {}))
+    return config
+
+
+def low_res_gray(frame, step=SETTLE_DOWNSAMPLE):
+    """把截图转为灰度并按区域平均缩小 step 倍。"""
+    array = frame.array
+    gray = cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    height, width = gray.shape
+    return cv2.resize(gray, (max(1, width // step), max(1, height // step)), interpolation=cv2.INTER_AREA)
+
+
+def changed_cells(a, b, cell=SETTLE_CELL_SIZE, threshold=SETTLE_PIXEL_THRESHOLD):
+    """返回两帧之间最大差值超过 threshold 的单元格数。"""
+    diff = cv2.absdiff(a, b)
+    height, width = diff.shape
+    rows, cols = -(-height // cell), -(-width // cell)
+    diff = cv2.copyMakeBorder(diff, 0, rows * cell - height, 0, cols * cell - width, cv2.BORDER_CONSTANT, value=0)
+    cell_max = diff.reshape(rows, cell, cols, cell).max(axis=(1, 3))
+    return int(np.count_nonzero(cell_max > threshold))
+
+
+def dhash(gray, grid=SETTLE_HASH_GRID, hash_size=8):
+    """分块差值哈希：每块区域平均缩放为 (hash_size+1) x hash_size 后比较相邻像素。"""
+    rows, cols = grid
+    small = cv2.resize(gray, (cols * (hash_size + 1), rows * hash_size), interpolation=cv2.INTER_AREA)
+    small = small.reshape(rows * hash_size, cols, hash_size + 1)
+    return (small[..., 1:] > small[..., :-1]).flatten()
+
+
+def frame_difference(a, b, method="pixel"):
+    if method == "hash":
+        return int(np.count_nonzero(dhash(a) != dhash(b)))
+    return changed_cells(a, b)
+
+
+def wait_for_settle(adb_path, action="default", overrides=None):
+    """
+    操作后轮询低分辨率截图，连续多帧没有明显变化时立即返回，最长等待 max_wait 秒。
+
+    返回:
+        SettleResult: 实际等待时长及是否在超时前稳定。
+    """
+    config = get_settle_config(action, overrides)
+    start = time.time()
+    time.sleep(config["min_wait"])
+
+    raw = True
+    previous = None
+    stable = 0
+    polls = 0
+    settled = False
+    while True:
+        try:
+            current = low_res_gray(capture_screenshot(adb_path, raw=raw, retries=0))
+        except Exception as e:
+            if raw:
+                raw = False  # 设备不支持原始帧缓冲时退回 PNG
+                continue
+            print(f"WARNING: 等待界面稳定时截图失败，改为固定等待: {e}")
+            time.sleep(max(0, config["max_wait"] - (time.time() - start)))
+            break
+        polls += 1
+        if previous is not None and current.shape == previous.shape:
+            if frame_difference(previous, current, config["method"]) <= config["threshold"]:
+                stable += 1
+            else:
+                stable = 0
+        previous = current
+        if stable >= config["stable_frames"]:
+            settled = True
+            break
+        if time.time() - start + config["interval"] >= config["max_wait"]:
+            break
+        time.sleep(config["interval"])
+
+    result = SettleResult(action=action, duration=time.time() - start, settled=settled, polls=polls)
+    print(f"\t 等待界面稳定 ({action}): {result.duration:.2f}s, 采样 {polls} 帧, {'已稳定' if settled else '超时'}")
+    return result
@@ -0,0 +1,187 @@
+import json
+import threading
+
+# result() 等待剩余回复的默认最长时间（秒）；超时后关闭连接，不再无限期阻塞调用方
+RESULT_TIMEOUT = 300
+
+
+class StreamError(Exception):
+    pass
+
+
+def iter_sse_events(response):
+    """逐个返回 SSE 响应中 data 字段的 JSON 对象（OpenAI 的 [DONE] 结束标记处停止）。"""
+    if hasattr(response, "iter_content"):
+        # requests：chunk_size=None 时数据到达即返回，默认的 512 字节会把多个事件攒在一起
+        lines = response.iter_lines(chunk_size=None)
+    else:
+        lines = response.iter_lines()  # httpx
+    data = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif line == "" and data:
+            payload = "\n".join(data)
+            data = []
+            if payload == "[DONE]":
+                return
+            yield json.loads(payload)
+    if data and data != ["[DONE]"]:
+        yield json.loads("\n".join(data))
+
+
+def event_text(event):
+    """事件中新增的回复文本：OpenAI 兼容格式的 choices[0].delta.content，或 Claude 的 content_block_delta。"""
+    if event.get("type") == "error" or "error" in event and "choices" not in event:
+        raise StreamError(json.dumps(event.get("error", event), ensure_ascii=False))
+    if event.get("type") == "content_block_delta":
+        return event["delta"].get("text", "")
+    choices = event.get("choices")
+    if choices:
+        # 思考模型的推理过程在 delta.reasoning_content 中，与非流式调用一样只取 content
+        return choices[0].get("delta", {}).get("content") or ""
+    return ""
+
+
+def event_usage(event, usage):
+    """把事件中的用量（OpenAI 最后一个事件的 usage，Claude 的 message_start / message_delta）合并到 usage。"""
+    if event.get("type") == "message_start":
+        usage.update(event["message"].get("usage", {}))
+    elif event.get("usage"):
+        usage.update(event["usage"])
+
+
+class ChatStream:
+    """
+    在后台线程中读取一次流式模型调用的回复。text 为到目前为止收到的文本；
+    wait_until 在回复满足条件时立即返回，剩余部分可以继续在后台读取（result）或取消（cancel）。
+
+    参数:
+        response: requests 或 httpx 的流式响应。
+        on_finish (callable): 回复完整读取后以 (text, model, usage) 调用，例如记录用量。
+    """
+
+    def __init__(self, response, on_finish=None):
+        self.response = response
+        self.on_finish = on_finish
+        self.text = ""
+        self.model = None
+        self.usage = {}
+        self.error = None
+        self.cancelled = False
+        self._cond = threading.Condition()
+        self._done = False
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        try:
+            for event in iter_sse_events(self.response):
+                delta = event_text(event)
+                self.model = self.model or event.get("model") or event.get("message", {}).get("model")
+                event_usage(event, self.usage)
+                if delta:
+                    with self._cond:
+                        self.text += delta
+                        self._cond.notify_all()
+        except Exception as e:
+            if not self.cancelled:
+                self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.response.close()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+        if self.on_finish is not None and self.error is None and not self.cancelled:
+            self.on_finish(self.text, self.model, self.usage)
+
+    @property
+    def done(self):
+        return self._done
+
+    def wait_until(self, predicate, timeout=None):
+        """等待 predicate(text) 为真；回复结束时仍不满足（或超时）返回 False。"""
+        with self._cond:
+            return self._cond.wait_for(lambda: predicate(self.text) or self._done, timeout) and predicate(self.text)
+
+    def result(self, timeout=RESULT_TIMEOUT):
+        """等待回复结束并返回完整文本；出错、已取消或 timeout 秒内没有结束（此时关闭连接）时返回 None。"""
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self.cancel()
+            return None
+        return None if self.error or self.cancelled else self.text
+
+    def cancel(self):
+        """关闭连接，服务端随即停止生成（不再计费剩余的输出 token）。"""
+        self.cancelled = True
+        self.response.close()
+
+
+def first_json_object(text):
+    """text 中第一个括号配平的完整 JSON 对象（考虑字符串中的括号和转义），尚未完整时返回 None。"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+class SectionParser:
+    """
+    把逐步到达的回复按 "### 标题 ###" 切分为各个部分。每次 update 传入到目前为止的完整文本，
+    只在新增的部分中查找下一个标题；标题按 headers 的顺序出现。
+    """
+
+    def __init__(self, headers):
+        self.headers = list(headers)
+        self.starts = {}  # 标题 -> 该部分内容的起始位置
+        self.ends = {}  # 标题 -> 下一个标题的起始位置（该部分已完整）
+        self.text = ""
+        self._scanned = 0
+
+    def update(self, text):
+        self.text = text
+        longest = max(len(h) for h in self.headers)
+        while len(self.starts) < len(self.headers):
+            header = self.headers[len(self.starts)]
+            position = text.find(header, max(self._scanned - longest, self._last_start()))
+            if position < 0:
+                break
+            if self.starts:
+                self.ends[self.headers[len(self.starts) - 1]] = position
+            self.starts[header] = position + len(header)
+        self._scanned = len(text)
+        return self
+
+    def _last_start(self):
+        return max(self.starts.values()) if self.starts else 0
+
+    def section(self, header):
+        """该部分到目前为止的内容；标题尚未出现时返回 None。"""
+        if header not in self.starts:
+            return None
+        return self.text[self.starts[header]:self.ends.get(header, len(self.text))]
+
+    def closed(self, header):
+        """该部分之后的标题已经出现，即该部分已完整。"""
+        return header in self.ends
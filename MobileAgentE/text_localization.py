@@ -1,6 +1,8 @@
+import bisect
 import cv2
 import numpy as np
 from MobileAgentE.crop import crop_image
+from MobileAgentE.frame import as_frame
 
 
 def order_point(coor):
@@ -31,20 +33,108 @@ def longest_common_substring_length(str1, str2):
     return dp[m][n]
 
 
-def ocr(image_path, ocr_detection, ocr_recognition):
+OCR_RECOGNITION_BATCH_SIZE = 32  # 每批送入识别模型的文本行数；1 表示逐行识别
+AXIS_ALIGNED_TOLERANCE = 1.0  # 四边形顶点与外接矩形的最大偏差（像素），不超过时直接切片代替透视变换
+
+
+def rectify_crop(image, pts, tolerance=AXIS_ALIGNED_TOLERANCE):
+    """
+    裁剪并拉正文本行。四边形实际上是与坐标轴对齐的矩形时，直接对原图切片（不复制像素），
+    得到与 crop_image 相同尺寸的图像；否则使用 crop_image 的透视变换。
+    注意 crop_image 会把 w 个像素的区间映射到 w-1 个像素的跨度上并做双线性插值，切片得到的像素与之
+    并不相同（合成截图上平均每像素相差约 16），识别结果可能改变，因此 ocr 默认不使用（fast_crop=False）。
+    """
+    xs = np.sort(pts[:, 0])
+    ys = np.sort(pts[:, 1])
+    if xs[1] - xs[0] <= tolerance and xs[3] - xs[2] <= tolerance and ys[1] - ys[0] <= tolerance and ys[3] - ys[2] <= tolerance:
+        # 与 crop_image 一致：宽高取对边中点之间的距离并向下取整
+        width = int((xs[2] + xs[3]) / 2 - (xs[0] + xs[1]) / 2)
+        height = int((ys[2] + ys[3]) / 2 - (ys[0] + ys[1]) / 2)
+        x1 = max(int(round((xs[0] + xs[1]) / 2)), 0)
+        y1 = max(int(round((ys[0] + ys[1]) / 2)), 0)
+        crop = image[y1:y1 + height, x1:x1 + width]
+        if crop.shape[0] == height and crop.shape[1] == width and width > 0 and height > 0:
+            return crop
+    return crop_image(image, pts)
+
+
+def recognize_one(ocr_recognition, image_crop):
+    try:
+        return ocr_recognition(image_crop)['text'][0]
+    except:
+        return None
+
+
+def recognize_batch(ocr_recognition, image_crops, batch_size=OCR_RECOGNITION_BATCH_SIZE):
+    """
+    批量识别文本行，返回与 image_crops 顺序一致的文本列表（识别失败的行为 None）。
+
+    同一批中的图像在识别模型的预处理中会被填充到相同尺寸，因此先按宽高比排序，让长度相近的行
+    分在同一批以减少填充。第一次批量识别时会与逐行识别的结果比对，不一致（或识别管线不支持批量输入）
+    时该管线退回逐行识别。
+    """
+    results = [None] * len(image_crops)
+    if batch_size <= 1 or len(image_crops) <= 1 or getattr(ocr_recognition, "_batch_unsupported", False):
+        for i, image_crop in enumerate(image_crops):
+            results[i] = recognize_one(ocr_recognition, image_crop)
+        return results
+
+    order = sorted(range(len(image_crops)), key=lambda i: image_crops[i].shape[1] / max(image_crops[i].shape[0], 1))
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        batch = [image_crops[i] for i in indices]
+        try:
+            outputs = ocr_recognition(batch, batch_size=len(batch))
+            texts = [output['text'][0] for output in outputs]
+            if len(texts) != len(batch):
+                raise ValueError("batch size mismatch")
+            if not getattr(ocr_recognition, "_batch_verified", False):
+                if any(recognize_one(ocr_recognition, image_crop) != text for image_crop, text in zip(batch[:2], texts[:2])):
+                    raise ValueError("batched output differs from single-line output")
+                ocr_recognition._batch_verified = True
+        except Exception as e:
+            print(f"WARNING: 批量文本识别不可用，退回逐行识别: {e}")
+            ocr_recognition._batch_unsupported = True
+            for i in order[start:]:
+                results[i] = recognize_one(ocr_recognition, image_crops[i])
+            return results
+        for i, text in zip(indices, texts):
+            results[i] = text
+    return results
+
+
+def ocr(image_path, ocr_detection, ocr_recognition, batch_size=OCR_RECOGNITION_BATCH_SIZE, fast_crop=False,
+        scale=1.0, full_res_recognition=True):
+    # image_path 也可以是 Frame 或像素数组（例如原始帧缓冲的 RGBA 数组）
+    # scale < 1 时在缩小的截图上做文本检测，检测框映射回原始分辨率；full_res_recognition 为 True 时
+    # 从原始分辨率的截图中裁剪文本行做识别，否则直接使用缩小后的裁剪。返回的坐标始终是原始分辨率的像素坐标。
+    # fast_crop 为 True 时与坐标轴对齐的文本行用切片代替透视变换（见 rectify_crop），像素与逐行识别时不同
     text_data = []
     coordinate = []
     
-    image_full = cv2.imread(image_path)
-    det_result = ocr_detection(image_full)
+    if isinstance(image_path, str):
+        image_full = cv2.imread(image_path)
+        image_det = image_full if scale == 1 else cv2.resize(image_full, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        frame = as_frame(image_path)
+        image_full = frame.bgr
+        image_det = frame.scaled(scale).bgr
+    factor = np.array([image_full.shape[1] / image_det.shape[1], image_full.shape[0] / image_det.shape[0]], dtype=np.float32)
+    det_result = ocr_detection(image_det)
     det_result = det_result['polygons'] 
-    for i in range(det_result.shape[0]):
-        pts = order_point(det_result[i])
-        image_crop = crop_image(image_full, pts)
-        
-        try:
-            result = ocr_recognition(image_crop)['text'][0]
-        except:
+    points_det = [order_point(det_result[i]) for i in range(det_result.shape[0])]
+    points = [pts * factor for pts in points_det]
+    if image_det is image_full or full_res_recognition:
+        # 映射后的坐标不再是整数，与坐标轴对齐的判断容差按缩放倍数放宽
+        crop_source, crop_points, tolerance = image_full, points, AXIS_ALIGNED_TOLERANCE * float(factor.max())
+    else:
+        crop_source, crop_points, tolerance = image_det, points_det, AXIS_ALIGNED_TOLERANCE
+    crop = (lambda image, pts: rectify_crop(image, pts, tolerance)) if fast_crop else crop_image
+    image_crops = [crop(crop_source, pts) for pts in crop_points]
+    results = recognize_batch(ocr_recognition, image_crops, batch_size=batch_size)
+
+    for pts, result in zip(points, results):
+        if result is None:
             continue
 
         box = [int(e) for e in list(pts.reshape(-1))]
@@ -53,5 +143,84 @@ def ocr(image_path, ocr_detection, ocr_recognition):
         text_data.append(result)
         coordinate.append(box)
         
-    else:
-        return text_data, coordinate
\ No newline at end of file
+    return text_data, coordinate
+
+
+def merge_text_blocks(
+    text_list,
+    coordinates_list,
+    x_distance_threshold=45,
+    y_distance_min=-20,
+    y_distance_max=30,
+    height_difference_threshold=20,
+):
+    """
+    把纵向相邻、左右边缘对齐且高度相近的文本行合并为一个文本块。
+
+    按 (y1, x1) 排序后，从每个尚未合并的块出发向下串联：下一个块是排序中位于当前锚点之后、
+    第一个满足阈值条件的未合并块。满足条件的块的 y1 一定落在 [锚点 y2 + y_distance_min,
+    锚点 y2 + y_distance_max) 内，因此用二分查找只扫描这个窗口，而不是其后的所有块。
+    """
+    merged_text_blocks = []
+    merged_coordinates = []
+
+    # Sort the text blocks based on y and x coordinates
+    sorted_indices = sorted(
+        range(len(coordinates_list)),
+        key=lambda k: (coordinates_list[k][1], coordinates_list[k][0]),
+    )
+    sorted_text_list = [text_list[i] for i in sorted_indices]
+    sorted_coordinates_list = [coordinates_list[i] for i in sorted_indices]
+    sorted_y1 = [coordinates[1] for coordinates in sorted_coordinates_list]
+
+    num_blocks = len(sorted_text_list)
+    merge = [False] * num_blocks
+
+    def matches(anchor, j):
+        x_diff_left = abs(sorted_coordinates_list[anchor][0] - sorted_coordinates_list[j][0])
+        x_diff_right = abs(sorted_coordinates_list[anchor][2] - sorted_coordinates_list[j][2])
+
+        y_diff = sorted_coordinates_list[j][1] - sorted_coordinates_list[anchor][3]
+        height_anchor = sorted_coordinates_list[anchor][3] - sorted_coordinates_list[anchor][1]
+        height_j = sorted_coordinates_list[j][3] - sorted_coordinates_list[j][1]
+        height_diff = abs(height_anchor - height_j)
+
+        return (
+            (x_diff_left + x_diff_right) / 2 < x_distance_threshold
+            and y_distance_min <= y_diff < y_distance_max
+            and height_diff < height_difference_threshold
+        )
+
+    for i in range(num_blocks):
+        if merge[i]:
+            continue
+
+        anchor = i
+        group_text = [sorted_text_list[anchor]]
+        group_coordinates = [sorted_coordinates_list[anchor]]
+
+        while True:
+            # 窗口两端各放宽 1，避免浮点坐标的舍入误差漏掉边界上的块；窗口内仍按原条件精确判断
+            anchor_y2 = sorted_coordinates_list[anchor][3]
+            start = max(anchor + 1, bisect.bisect_left(sorted_y1, anchor_y2 + y_distance_min - 1))
+            end = bisect.bisect_left(sorted_y1, anchor_y2 + y_distance_max + 1)
+            for j in range(start, end):
+                if not merge[j] and matches(anchor, j):
+                    break
+            else:
+                break
+            group_text.append(sorted_text_list[j])
+            group_coordinates.append(sorted_coordinates_list[j])
+            merge[anchor] = True
+            anchor = j
+            merge[anchor] = True
+
+        merged_text = "\n".join(group_text)
+        min_x1 = min(group_coordinates, key=lambda x: x[0])[0]
+        min_y1 = min(group_coordinates, key=lambda x: x[1])[1]
+        max_x2 = max(group_coordinates, key=lambda x: x[2])[2]
+        max_y2 = max(group_coordinates, key=lambda x: x[3])[3]
+
+        merged_text_blocks.append(merged_text)
+        merged_coordinates.append([min_x1, min_y1, max_x2, max_y2])
+    return merged_text_blocks, merged_coordinates
@@ -0,0 +1,65 @@
+"""
+对比逐次启动 adb 进程与常驻 adb shell 会话池的动作吞吐量（actions/second）。
+
+使用 benchmarks/fake_adb.py 作为 adb 替身，不需要连接真实设备：
+    python benchmarks/bench_adb_session.py --actions 50 --latency_ms 30
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.adb_session import AdbSessionPool
+from MobileAgentE.controller import tap, swipe, back, home, enter
+
+FAKE_ADB = f"\"{sys.executable}\" \"{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_adb.py')}\""
+
+ACTIONS = [
+    lambda adb: tap(adb, 540, 1200),
+    lambda adb: swipe(adb, 540, 1600, 540, 600),
+    lambda adb: back(adb),
+    lambda adb: home(adb),
+    lambda adb: enter(adb),
+]
+
+
+def run_actions(adb, num_actions):
+    start = time.perf_counter()
+    for i in range(num_actions):
+        ACTIONS[i % len(ACTIONS)](adb)
+    return num_actions / (time.perf_counter() - start)
+
+
+def count_logged(state):
+    with open(os.path.join(state, "commands.log")) as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actions", type=int, default=50)
+    parser.add_argument("--latency_ms", type=float, default=30)
+    parser.add_argument("--sessions", type=int, default=1)
+    args = parser.parse_args()
+
+    state = tempfile.mkdtemp(prefix="fake_adb_")
+    os.environ["FAKE_ADB_STATE"] = state
+    os.environ["FAKE_ADB_LATENCY_MS"] = str(args.latency_ms)
+
+    subprocess_rate = run_actions(FAKE_ADB, args.actions)
+    with AdbSessionPool(FAKE_ADB, size=args.sessions) as pool:
+        pool.run("true")  # 建立会话，不计入吞吐量
+        session_rate = run_actions(pool, args.actions)
+
+    assert count_logged(state) == 2 * args.actions, "fake adb 记录的命令数与执行的动作数不一致"
+    print(f"simulated adb handshake latency: {args.latency_ms:.0f} ms")
+    print(f"subprocess per call : {subprocess_rate:8.1f} actions/s")
+    print(f"session pool ({args.sessions})   : {session_rate:8.1f} actions/s")
+    print(f"speedup             : {session_rate / subprocess_rate:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+通过 benchmarks/fake_adb.py 检查应用索引（MobileAgentE/app_index.py）：
+
+1. 冷启动时构建索引并写入按设备序列号命名的缓存文件，之后从缓存加载；
+2. 修改替身设备的包列表（安装新应用）后缓存失效并重新构建；
+3. 包管理器中的显示名称和别名解析到正确的包名（只接受完全相同的名称），直接启动只需一次 adb 调用。
+    python benchmarks/bench_app_launcher.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.app_index import AppIndex
+
+FAKE_ADB = f"\"{sys.executable}\" \"{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_adb.py')}\""
+
+EXPECTED = {
+    "微信": "com.tencent.mm",
+    "WeChat": "com.tencent.mm",
+    "Notes": "com.samsung.android.app.notes",
+    "Chrome": "com.android.chrome",
+    "Google Maps": "com.google.android.apps.maps",
+    "Maps": "com.google.android.apps.maps",
+    "Youtube": "com.google.android.youtube",
+    "settings": "com.android.settings",
+    "Walmart": None,
+    # 只接受完全相同的名称：相近的名称和包名片段不会启动应用，由 Open_App 改用屏幕上的文字标签
+    "Chrom": None,
+    "mm": None,
+    "youtube2": None,
+}
+
+
+def read_log(state):
+    path = os.path.join(state, "commands.log")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = [" ".join(line.rstrip("\n").split("\x1f")[:-1]) for line in f if line.strip()]
+    os.remove(path)
+    return entries
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    state = tempfile.mkdtemp(prefix="fake_adb_")
+    cache_dir = tempfile.mkdtemp(prefix="app_index_")
+    os.environ["FAKE_ADB_STATE"] = state
+    os.environ.setdefault("FAKE_ADB_LATENCY_MS", "30")
+    ok = True
+
+    cold, index = timed(lambda: AppIndex.load_or_build(FAKE_ADB, cache_dir))
+    warm, cached = timed(lambda: AppIndex.load_or_build(FAKE_ADB, cache_dir))
+    print(f"index: {len(index.packages)} packages, {len(index.labels)} labels | cold build {cold * 1000:.0f} ms | "
+          f"warm load {warm * 1000:.0f} ms | cache files {os.listdir(cache_dir)}")
+    ok &= cached.labels == index.labels
+
+    for name, package in EXPECTED.items():
+        resolved = index.resolve(name)
+        ok &= resolved == package
+        print(f"    {name!r:15} -> {resolved} {'' if resolved == package else '(expected ' + str(package) + ')'}")
+
+    read_log(state)
+    launch, package = timed(lambda: index.launch(FAKE_ADB, "微信"))
+    commands = read_log(state)
+    print(f"launch 微信: {package} in {launch * 1000:.0f} ms via {commands}")
+    ok &= package == "com.tencent.mm" and len(commands) == 1
+
+    with open(os.path.join(state, "packages.txt"), "a") as f:
+        f.write("com.walmart.android/.MainActivity\n")
+    _, updated = timed(lambda: AppIndex.load_or_build(FAKE_ADB, cache_dir))
+    print(f"after installing Walmart: fingerprint changed {updated.fingerprint != index.fingerprint}, Walmart -> {updated.resolve('Walmart')}")
+    ok &= updated.resolve("Walmart") == "com.walmart.android"
+
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+构造管理者和操作者对话的耗时与内存：分别用此前的 add_response / add_response_two_image（每次追加都
+copy.deepcopy 整个对话历史）和现在的不可变元组（已有消息直接共用）构造带 1 张和 2 张截图的对话，
+历史中已有 --turns 轮带截图的消息时再追加一条。报告每次追加的耗时、tracemalloc 统计的峰值内存和
+新分配的字节数（CPython 的 deepcopy 不复制字符串本身，因此 data URL 在两种方式下都是共用的，
+差别在于深拷贝对话结构中的列表和字典），并校验两种方式发给 OpenAI 兼容接口和 Claude 接口的请求体完全一致：
+    python benchmarks/bench_chat_history.py
+    python benchmarks/bench_chat_history.py --turns 0 5 20 --rounds 200
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.agents import Manager, Operator, add_response, add_response_two_image
+from MobileAgentE.api import build_request, image_data_url
+from MobileAgentE.frame import Frame
+from bench_frame import synthetic_png
+
+
+def legacy_add_response(role, prompt, chat_history, image=None):
+    """此前的 add_response：深拷贝整个历史后追加。"""
+    new_chat_history = copy.deepcopy(chat_history)
+    content = [{"type": "text", "text": prompt}]
+    if image:
+        content.append({"type": "image_url", "image_url": {"url": image_data_url(image)}})
+    new_chat_history.append([role, content])
+    return new_chat_history
+
+
+def legacy_add_response_two_image(role, prompt, chat_history, image):
+    new_chat_history = copy.deepcopy(chat_history)
+    content = [{"type": "text", "text": prompt}]
+    for item in image:
+        content.append({"type": "image_url", "image_url": {"url": image_data_url(item)}})
+    new_chat_history.append([role, content])
+    return new_chat_history
+
+
+def build(agent, single, pair, frames, num_images, turns):
+    """与 inference_agent_E.py 相同：init_chat 之后追加带截图的用户消息；先追加 turns 轮历史消息。"""
+    chat = agent.init_chat()
+    for i in range(turns + 1):
+        if num_images == 1:
+            chat = single("user", f"prompt {i}", chat, image=frames[-1])
+        else:
+            chat = pair("user", f"prompt {i}", chat, frames)
+    return chat
+
+
+def measure(agent, single, pair, frames, num_images, turns, rounds):
+    history = build(agent, single, pair, frames, num_images, turns - 1) if turns else agent.init_chat()
+    append = (lambda: single("user", "prompt", history, image=frames[-1])) if num_images == 1 else \
+             (lambda: pair("user", "prompt", history, frames))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        append()
+    per_call = (time.perf_counter() - start) / rounds
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    chat = append()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak - before, current - before, chat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[0, 5])
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    frames = [Frame.from_png(synthetic_png(seed=i)) for i in range(2)]
+    for frame in frames:
+        frame.data_url  # 编码不计入对话构造的耗时
+    agents = {"Manager": Manager.__new__(Manager), "Operator": Operator.__new__(Operator)}  # init_chat 不需要连接设备
+    ok = True
+    for (name, agent) in agents.items():
+        for num_images in (1, 2):
+            for turns in args.turns:
+                results = {}
+                for mode, single, pair in (("deepcopy", legacy_add_response, legacy_add_response_two_image),
+                                           ("tuple", add_response, add_response_two_image)):
+                    results[mode] = measure(agent, single, pair, frames, num_images, turns, args.rounds)
+                (old_t, old_peak, old_kept, old_chat), (new_t, new_peak, new_kept, new_chat) = results["deepcopy"], results["tuple"]
+                same = all(json.dumps(build_request(old_chat, model, "https://example.com", "x")) ==
+                           json.dumps(build_request(new_chat, model, "https://example.com", "x")) for model in ("fake", "claude-fake"))
+                ok &= same
+                print(f"{name:8} | {num_images} image(s) | {turns:2d} prior turns | deepcopy {old_t * 1e6:8.1f} us, "
+                      f"peak {old_peak / 1024:6.1f} KiB, kept {old_kept / 1024:6.1f} KiB | tuple {new_t * 1e6:6.1f} us, "
+                      f"peak {new_peak / 1024:5.1f} KiB, kept {new_kept / 1024:5.1f} KiB | {old_t / new_t:5.1f}x | "
+                      f"requests {'identical' if same else 'DIFFER'}")
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+CPU 感知后端的吞吐量：在 CPU 上分别加载 fp32 和动态 int8 量化（cpu_backend.quantize_pipeline）的
+OCR 检测/识别模型和 GroundingDINO，在不同线程数下测量每张截图的 OCR、图标检测耗时，
+并比较 int8 与 fp32 的输出（识别文本一致的比例、图标框数量）。需要安装 modelscope 并能下载模型：
+    python benchmarks/bench_cpu_perception.py
+    python benchmarks/bench_cpu_perception.py --image screenshot/screenshot.jpg --threads 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from modelscope import snapshot_download
+from modelscope.pipelines import pipeline
+from modelscope.utils.constant import Tasks
+
+from MobileAgentE.cpu_backend import available_cores, set_threads, thread_candidates, quantize_pipeline
+from MobileAgentE.frame import Frame, as_frame
+from MobileAgentE.icon_localization import det
+from MobileAgentE.text_localization import ocr
+from bench_ocr import synthetic_screen
+
+
+def load(quantize):
+    groundingdino = pipeline('grounding-dino-task', model=snapshot_download("AI-ModelScope/GroundingDINO", revision="v1.0.0"), device="cpu")
+    detection = pipeline(Tasks.ocr_detection, model="iic/cv_resnet18_ocr-detection-db-line-level_damo", device="cpu")
+    recognition = pipeline(Tasks.ocr_recognition, model="iic/cv_convnextTiny_ocr-recognition-document_damo", device="cpu")
+    quantized = quantize_pipeline(recognition) + quantize_pipeline(groundingdino) if quantize else 0
+    return detection, recognition, groundingdino, quantized
+
+
+def timed(fn, rounds):
+    fn()  # 预热
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", type=str, default=None, help="截图路径；默认使用合成的文本密集截图")
+    parser.add_argument("--threads", type=int, nargs="+", default=None)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    frame = as_frame(args.image) if args.image else Frame(array=synthetic_screen(60)[0][..., ::-1].copy())
+    threads = args.threads or thread_candidates(available_cores())
+    print(f"screen {frame.size[0]}x{frame.size[1]}, {available_cores()} cores available")
+
+    outputs = {}
+    with torch.inference_mode():
+        for quantize in (False, True):
+            detection, recognition, groundingdino, quantized = load(quantize)
+            name = f"int8 ({quantized} Linear layers)" if quantize else "fp32"
+            for num_threads in threads:
+                set_threads(num_threads)
+                ocr_time, texts = timed(lambda: ocr(frame, detection, recognition), args.rounds)
+                det_time, boxes = timed(lambda: det(frame, "icon", groundingdino), args.rounds)
+                total = ocr_time + det_time
+                print(f"{name:28} | {num_threads:3d} threads | OCR {ocr_time:6.2f} s | icon det {det_time:6.2f} s | "
+                      f"{1 / total:5.2f} screens/s")
+            outputs[quantize] = (texts, boxes)
+
+    (fp32_text, _), fp32_boxes = outputs[False]
+    (int8_text, _), int8_boxes = outputs[True]
+    same = sum(a == b for a, b in zip(fp32_text, int8_text))
+    print(f"int8 vs fp32: {same}/{len(fp32_text)} text lines identical ({len(int8_text)} lines with int8), "
+          f"icon boxes {len(fp32_boxes)} -> {len(int8_boxes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+对比一步感知中截图的处理方式：按文件路径反复读取/解码（此前的做法）与只解码一次的 Frame。
+
+两种方式都模拟一步中用到截图的全部环节：保存截图、读取尺寸、OCR 输入（BGR 数组）、图标检测输入、
+裁剪图标、绘制 OCR 中心点、保存日志截图，以及给各个 agent 的 base64 编码（管理者、操作者、
+动作反思和笔记各一次）。报告每步的墙钟时间、图像解码次数及解码分配的像素缓冲总量，
+以及 tracemalloc 统计的峰值内存（只包含 NumPy 和 Python 对象，不含 PIL 内部的图像缓冲；
+Frame 会同时缓存 RGB 和 BGR 两个数组，因此这一项略高），并校验两种方式发给模型的 base64 内容完全一致：
+    python benchmarks/bench_frame.py
+    python benchmarks/bench_frame.py --icons 60 --rounds 10
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.api import encode_image
+from MobileAgentE.frame import Frame
+
+ENCODES_PER_STEP = 4  # 管理者、操作者、动作反思、笔记
+
+
+class DecodeCounter:
+    """统计 PIL 的延迟解码（ImageFile.load）和 cv2.imread 的调用次数。"""
+
+    def __init__(self):
+        self.count = 0
+        self._load = ImageFile.ImageFile.load
+        self._imread = cv2.imread
+
+    def __enter__(self):
+        counter = self
+        original_load, original_imread = self._load, self._imread
+
+        def load(image):
+            if image.tile:  # 解码完成后 tile 会被清空
+                counter.count += 1
+            return original_load(image)
+
+        def imread(*args, **kwargs):
+            counter.count += 1
+            return original_imread(*args, **kwargs)
+
+        ImageFile.ImageFile.load = load
+        cv2.imread = imread
+        return self
+
+    def __exit__(self, *exc):
+        ImageFile.ImageFile.load = self._load
+        cv2.imread = self._imread
+
+
+def synthetic_png(width=1080, height=2340, seed=0):
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    for i in range(40):
+        y = 60 + i * 56
+        cv2.putText(image, f"Item {i} " + "x" * int(rng.integers(3, 20)), (40, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+        cv2.rectangle(image, (900, y - 40), (1000, y + 5), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def icon_boxes(n, width=1080, height=2340, seed=1):
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(0, [width - 120, height - 120], size=(n, 2))
+    return [[int(x), int(y), int(x) + 100, int(y) + 100] for x, y in xy]
+
+
+def step_by_path(png, boxes, work):
+    """此前的流程：截图写成文件后，每个环节各自从文件读取并解码。"""
+    screenshot = os.path.join(work, "screenshot.jpg")
+    Image.open(io.BytesIO(png)).convert("RGB").save(screenshot)
+    width, height = Image.open(screenshot).size
+    bgr = cv2.imread(screenshot)  # OCR
+    det_image = Image.open(screenshot).convert("RGB")  # 图标检测
+    det_image.load()
+    icons = []
+    for i, box in enumerate(boxes):  # 每个图标重新打开截图再裁剪，写入临时目录
+        icon = Image.open(screenshot).crop(box)
+        icon.save(os.path.join(work, f"icon_{i}.jpg"))
+        icons.append(icon)
+    image = Image.open(screenshot)  # 绘制 OCR 中心点
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        draw.ellipse((box[0], box[1], box[0] + 20, box[1] + 20), fill="red")
+    image.save(os.path.join(work, "output_image.png"))
+    Image.open(screenshot).save(os.path.join(work, "log.jpg"))  # 日志截图
+    encoded = [encode_image(screenshot) for _ in range(ENCODES_PER_STEP)]
+    return (width, height), bgr.shape, encoded
+
+
+def step_by_frame(png, boxes, work):
+    """Frame 流程：解码一次，各环节共用 PIL / BGR / JPEG 视图。"""
+    frame = Frame.from_png(png)
+    frame.save(os.path.join(work, "screenshot.jpg"))
+    width, height = frame.size
+    bgr = frame.bgr  # OCR
+    det_input = frame.as_file()  # 图标检测（PNG 字节直接交给模型）
+    icons = [frame.image.crop(box) for box in boxes]  # 内存中裁剪
+    image = frame.image.copy()
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        draw.ellipse((box[0], box[1], box[0] + 20, box[1] + 20), fill="red")
+    image.save(os.path.join(work, "output_image.png"))
+    frame.save(os.path.join(work, "log.jpg"))
+    encoded = [encode_image(frame) for _ in range(ENCODES_PER_STEP)]
+    return (width, height), bgr.shape, encoded
+
+
+def measure(step, png, boxes, rounds):
+    work = tempfile.mkdtemp(prefix="bench_frame_")
+    try:
+        times, peaks, decodes = [], [], []
+        for _ in range(rounds):
+            with DecodeCounter() as counter:
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = step(png, boxes, work)
+                times.append(time.perf_counter() - start)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            decodes.append(counter.count)
+        return np.median(times), max(peaks), decodes[-1], result
+    finally:
+        shutil.rmtree(work)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--icons", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    png = synthetic_png()
+    boxes = icon_boxes(args.icons)
+    path_time, path_peak, path_decodes, path_result = measure(step_by_path, png, boxes, args.rounds)
+    frame_time, frame_peak, frame_decodes, frame_result = measure(step_by_frame, png, boxes, args.rounds)
+
+    width, height = Frame.from_png(png).size
+    for name, t, peak, decodes in (("by path", path_time, path_peak, path_decodes), ("Frame", frame_time, frame_peak, frame_decodes)):
+        print(f"{name:8} | {t * 1000:7.1f} ms/step | {decodes:3d} image decodes ({decodes * width * height * 3 / 2**20:6.1f} MiB of pixel buffers) "
+              f"| traced peak {peak / 2**20:6.1f} MiB")
+    print(f"speedup {path_time / frame_time:.1f}x, decodes {path_decodes} -> {frame_decodes}")
+
+    # 发给模型的图像：两种方式都是同一份 JPEG 编码（PIL 默认质量），base64 内容必须一致
+    ok = path_result == frame_result
+    print("encoded screenshots identical" if ok else "encoded screenshots DIFFER")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
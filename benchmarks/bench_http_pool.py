@@ -0,0 +1,77 @@
+"""
+模型调用的连接复用：对本地的 OpenAI 兼容替身服务器（benchmarks/fake_llm_server.py，每个新连接额外等待
+--handshake_delay 秒以模拟远端的 TCP+TLS 握手）模拟若干步任务、每步 --calls_per_step 次 inference_chat 调用
+（管理者、操作者、动作反思、笔记），比较此前每次调用 requests.post（每次新建连接）与 http_client 的
+按端点连接池（keep-alive，任务开始时预连接）的新建连接数和每次调用的平均耗时：
+    python benchmarks/bench_http_pool.py
+    python benchmarks/bench_http_pool.py --steps 10 --handshake_delay 0.15
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE import http_client
+from MobileAgentE.api import inference_chat
+from fake_llm_server import FakeLLMServer
+
+CHAT = [["system", [{"type": "text", "text": "You are a helpful AI mobile phone operating assistant."}]],
+        ["user", [{"type": "text", "text": "### 操作 ###"}]]]
+
+
+def unpooled_chat(url):
+    """此前的调用方式：模块级 requests.post，每次调用都新建连接。"""
+    data = {"model": "fake", "messages": [{"role": role, "content": content} for role, content in CHAT], "max_tokens": 2048, "temperature": 0.0}
+    return requests.post(url, headers={"Content-Type": "application/json", "Authorization": "Bearer x"}, json=data).json()['choices'][0]['message']['content']
+
+
+def pooled_chat(url):
+    return inference_chat(CHAT, "fake", url, "x")
+
+
+def run(server, chat, calls, prewarm):
+    http_client.close_all()
+    server.reset()
+    if prewarm:
+        warm = http_client.prewarm([server.url])
+        time.sleep(server.handshake_delay * 2)  # 预连接与任务开始时的截图、感知并行进行；这段时间不计入调用耗时
+        warm.join()
+    start = time.perf_counter()
+    replies = [chat(server.url) for _ in range(calls)]
+    elapsed = time.perf_counter() - start
+    return server.connections, server.requests, elapsed / calls, replies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--calls_per_step", type=int, default=4)
+    parser.add_argument("--handshake_delay", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(reply=json.dumps({"name": "Tap"}), handshake_delay=args.handshake_delay).start()
+    calls = args.steps * args.calls_per_step
+    results = {}
+    for name, chat, prewarm in (("requests.post", unpooled_chat, False),
+                                ("pooled", pooled_chat, False),
+                                ("pooled+prewarm", pooled_chat, True)):
+        connections, handled, per_call, replies = run(server, chat, calls, prewarm)
+        results[name] = (connections, replies)
+        print(f"{name:15} | {calls} calls | {connections:3d} new connections | {handled:3d} POSTs | {per_call * 1000:7.1f} ms/call")
+    server.shutdown()
+    http_client.close_all()
+
+    ok = (results["requests.post"][0] == calls and results["pooled"][0] == 1 and results["pooled+prewarm"][0] == 1
+          and results["requests.post"][1] == results["pooled"][1] == results["pooled+prewarm"][1])
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+给各个 agent 的截图 data URL：模拟若干步，每步管理者、操作者、笔记各用 add_response 附上当前截图，
+动作反思用 add_response_two_image 附上上一张和当前截图，截图在步骤之间由 screenshot.jpg 改名为
+last_screenshot.jpg（与此前的 inference_agent_E.py 相同）。比较此前每次调用都重新编码（按文件路径，或按 Frame）
+与 image_data_url 缓存（按 Frame，或按文件的 st_dev/st_ino/mtime/size）的 base64 编码次数、每步耗时和
+tracemalloc 峰值内存，并校验四种方式得到的 data URL 完全一致：
+    python benchmarks/bench_image_payload.py
+    python benchmarks/bench_image_payload.py --steps 20
+"""
+import argparse
+import base64
+import copy
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.agents import add_response, add_response_two_image
+from MobileAgentE.api import encode_image
+from MobileAgentE.frame import Frame
+from bench_frame import synthetic_png
+
+
+def legacy_add_response(role, prompt, chat_history, image=None):
+    """此前的 add_response：每次调用都读取并编码图像。"""
+    new_chat_history = copy.deepcopy(chat_history)
+    content = [{"type": "text", "text": prompt}]
+    if image:
+        content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encode_image(image)}"}})
+    new_chat_history.append([role, content])
+    return new_chat_history
+
+
+def legacy_add_response_two_image(role, prompt, chat_history, image):
+    new_chat_history = copy.deepcopy(chat_history)
+    content = [{"type": "text", "text": prompt}]
+    for item in image:
+        content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encode_image(item)}"}})
+    new_chat_history.append([role, content])
+    return new_chat_history
+
+
+class EncodeCounter:
+    """统计 base64.b64encode 的调用次数和编码的字节数。"""
+
+    def __enter__(self):
+        self.count, self.bytes = 0, 0
+        self._b64encode = base64.b64encode
+        original = self._b64encode
+
+        def b64encode(data, *args, **kwargs):
+            self.count += 1
+            self.bytes += len(data)
+            return original(data, *args, **kwargs)
+
+        base64.b64encode = b64encode
+        return self
+
+    def __exit__(self, *exc):
+        base64.b64encode = self._b64encode
+
+
+def run(pngs, work, use_frames, single, pair):
+    """返回 (每步耗时, 编码次数, 编码字节数, 峰值内存, 每步的 data URL)。"""
+    screenshot, last_screenshot = os.path.join(work, "screenshot.jpg"), os.path.join(work, "last_screenshot.jpg")
+    last = None
+    urls, times = [], []
+    with EncodeCounter() as counter:
+        tracemalloc.start()
+        for png in pngs:
+            frame = Frame.from_png(png)
+            frame.save(screenshot)
+            current = frame if use_frames else screenshot
+            start = time.perf_counter()
+            chats = [single("user", "manager", [], image=current), single("user", "operator", [], image=current)]
+            if last is not None:
+                chats.append(pair("user", "reflector", [], [last, current]))
+            chats.append(single("user", "notetaker", [], image=current))
+            times.append(time.perf_counter() - start)
+            urls.append([item["image_url"]["url"] for chat in chats for item in chat[-1][1] if item["type"] == "image_url"])
+            if os.path.exists(last_screenshot):
+                os.remove(last_screenshot)
+            os.rename(screenshot, last_screenshot)
+            last = frame if use_frames else last_screenshot
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return sum(times) / len(times), counter.count, counter.bytes, peak, urls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=10)
+    args = parser.parse_args()
+
+    pngs = [synthetic_png(seed=i) for i in range(args.steps)]
+    results = {}
+    for name, use_frames, single, pair in (("path, per call", False, legacy_add_response, legacy_add_response_two_image),
+                                           ("Frame, per call", True, legacy_add_response, legacy_add_response_two_image),
+                                           ("path, cached", False, add_response, add_response_two_image),
+                                           ("Frame, cached", True, add_response, add_response_two_image)):
+        work = tempfile.mkdtemp(prefix="bench_payload_")
+        try:
+            per_step, encodes, encoded, peak, urls = run(pngs, work, use_frames, single, pair)
+        finally:
+            shutil.rmtree(work)
+        results[name] = urls
+        print(f"{name:16} | {per_step * 1000:6.1f} ms/step | {encodes:3d} base64 encodes ({encoded / 2**20:6.1f} MiB) "
+              f"over {args.steps} steps | traced peak {peak / 2**20:5.1f} MiB")
+
+    reference = results["path, per call"]
+    ok = all(urls == reference for urls in results.values())
+    shared = all(len({id(url) for url in step[:2] + step[-1:]}) == 1 for step in results["Frame, cached"])
+    print(f"data URLs {'identical' if ok else 'DIFFER'} across modes; cached URLs {'shared' if shared else 'NOT shared'} between agents")
+    ok &= shared
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+在合成的设置页截图上检查增量感知（MobileAgentE/incremental.py）：
+
+对几种常见的界面变化（切换开关、输入框文字变化、弹出对话框），计算两帧之间的脏区域，
+校验新截图中的每个元素要么原样沿用自上一帧，要么完整落在某个脏区域内（会被重新感知），
+并报告脏区域面积占比、沿用/重新感知的元素数和比较两帧的耗时：
+    python benchmarks/bench_incremental.py
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.frame import Frame
+from MobileAgentE.incremental import dirty_regions, expand_regions, region_fraction, carry_over, intersects
+
+WIDTH, HEIGHT = 1080, 2340
+MAX_DIRTY = 0.3
+
+
+def settings_screen(switches, field_text, dialog=False):
+    """返回 (Frame, 元素列表)；元素与感知信息格式相同（text、coordinates、box）。"""
+    image = np.full((HEIGHT, WIDTH, 3), 250, dtype=np.uint8)
+    elements = []
+
+    def add(kind, text, box):
+        x1, y1, x2, y2 = box
+        elements.append({"text": f"{kind}: {text}", "coordinates": [(x1 + x2) // 2, (y1 + y2) // 2], "box": list(box)})
+
+    cv2.putText(image, "Settings", (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 2, (20, 20, 20), 3)
+    add("text", "Settings", (40, 70, 330, 130))
+    cv2.rectangle(image, (40, 180), (1040, 280), (220, 220, 220), -1)
+    cv2.putText(image, field_text, (60, 245), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (40, 40, 40), 2)
+    add("text", field_text, (60, 200, 60 + 28 * len(field_text), 260))
+    for i, on in enumerate(switches):
+        y = 360 + i * 150
+        label = f"Option {i + 1}"
+        cv2.putText(image, label, (60, y + 60), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (40, 40, 40), 2)
+        add("text", label, (60, y + 20, 300, y + 75))
+        color = (60, 160, 60) if on else (180, 180, 180)
+        cv2.rectangle(image, (900, y + 20), (1020, y + 80), color, -1)
+        knob = 990 if on else 930
+        cv2.circle(image, (knob, y + 50), 26, (255, 255, 255), -1)
+        add("icon", "switch on" if on else "switch off", (900, y + 20, 1020, y + 80))
+    if dialog:
+        image[:] = (image * 0.4).astype(np.uint8)
+        cv2.rectangle(image, (100, 700), (980, 1500), (255, 255, 255), -1)
+        cv2.putText(image, "Discard changes?", (160, 900), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (20, 20, 20), 3)
+        elements = [{"text": "text: Discard changes?", "coordinates": [480, 880], "box": [160, 850, 800, 910]}]
+    return Frame(array=image), elements
+
+
+def check(name, before, after):
+    prev_frame, prev_elements = before
+    frame, elements = after
+    start = time.perf_counter()
+    regions = expand_regions(dirty_regions(prev_frame, frame), [e["box"] for e in prev_elements])
+    fraction = region_fraction(regions, frame.size)
+    elapsed = time.perf_counter() - start
+
+    if fraction > MAX_DIRTY:
+        print(f"{name:16} | {len(regions)} regions, {fraction:5.1%} of screen -> full perception | diff {elapsed * 1000:5.1f} ms")
+        return True
+    carried = carry_over(prev_elements, regions)
+    reperceived = [e for e in elements if any(intersects(e["box"], r) for r in regions)]
+    covered = all(any(r[0] <= e["box"][0] and r[1] <= e["box"][1] and e["box"][2] <= r[2] and e["box"][3] <= r[3] for r in regions)
+                  for e in reperceived)
+    unchanged = all(e in elements for e in carried)
+    complete = sorted(map(str, carried + reperceived)) == sorted(map(str, elements))
+    ok = covered and unchanged and complete
+    print(f"{name:16} | {len(regions)} regions, {fraction:5.1%} of screen | carried {len(carried):2d}, re-perceived "
+          f"{len(reperceived):2d} of {len(elements):2d} elements | diff {elapsed * 1000:5.1f} ms | {'consistent' if ok else 'INCONSISTENT'}")
+    return ok
+
+
+def main():
+    base = settings_screen([True, False, True, False, True, False, True, False], "Search settings")
+    cases = {
+        "no change": settings_screen([True, False, True, False, True, False, True, False], "Search settings"),
+        "toggle switch": settings_screen([True, False, False, False, True, False, True, False], "Search settings"),
+        "two switches": settings_screen([False, False, True, False, True, False, True, True], "Search settings"),
+        "type in field": settings_screen([True, False, True, False, True, False, True, False], "Search wifi"),
+        "dialog": settings_screen([True, False, True, False, True, False, True, False], "Search settings", dialog=True),
+    }
+    ok = all([check(name, base, after) for name, after in cases.items()])
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
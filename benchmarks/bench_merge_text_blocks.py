@@ -0,0 +1,181 @@
+"""
+对比 O(n^2) 的文本块合并与基于二分查找窗口的 text_localization.merge_text_blocks：
+
+1. 随机等价性检查：生成大量随机的文本行（整数和浮点坐标、紧密排列的段落、重复坐标、
+   随机阈值），校验两种实现的合并结果完全相同；
+2. 规模测试：在 50 到 5000 行的长列表/聊天界面上比较耗时。
+    python benchmarks/bench_merge_text_blocks.py
+    python benchmarks/bench_merge_text_blocks.py --cases 5000 --sizes 100 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.text_localization import merge_text_blocks
+
+
+def merge_text_blocks_legacy(
+    text_list,
+    coordinates_list,
+    x_distance_threshold=45,
+    y_distance_min=-20,
+    y_distance_max=30,
+    height_difference_threshold=20,
+):
+    """合并之前 inference_agent_E.merge_text_blocks 的 O(n^2) 实现。"""
+    merged_text_blocks = []
+    merged_coordinates = []
+
+    # Sort the text blocks based on y and x coordinates
+    sorted_indices = sorted(
+        range(len(coordinates_list)),
+        key=lambda k: (coordinates_list[k][1], coordinates_list[k][0]),
+    )
+    sorted_text_list = [text_list[i] for i in sorted_indices]
+    sorted_coordinates_list = [coordinates_list[i] for i in sorted_indices]
+
+    num_blocks = len(sorted_text_list)
+    merge = [False] * num_blocks
+
+    for i in range(num_blocks):
+        if merge[i]:
+            continue
+
+        anchor = i
+        group_text = [sorted_text_list[anchor]]
+        group_coordinates = [sorted_coordinates_list[anchor]]
+
+        for j in range(i + 1, num_blocks):
+            if merge[j]:
+                continue
+
+            # Calculate differences and thresholds
+            x_diff_left = abs(sorted_coordinates_list[anchor][0] - sorted_coordinates_list[j][0])
+            x_diff_right = abs(sorted_coordinates_list[anchor][2] - sorted_coordinates_list[j][2])
+
+            y_diff = sorted_coordinates_list[j][1] - sorted_coordinates_list[anchor][3]
+            height_anchor = sorted_coordinates_list[anchor][3] - sorted_coordinates_list[anchor][1]
+            height_j = sorted_coordinates_list[j][3] - sorted_coordinates_list[j][1]
+            height_diff = abs(height_anchor - height_j)
+
+            if (
+                (x_diff_left + x_diff_right) / 2 < x_distance_threshold
+                and y_distance_min <= y_diff < y_distance_max
+                and height_diff < height_difference_threshold
+            ):
+                group_text.append(sorted_text_list[j])
+                group_coordinates.append(sorted_coordinates_list[j])
+                merge[anchor] = True
+                anchor = j
+                merge[anchor] = True
+
+        merged_text = "\n".join(group_text)
+        min_x1 = min(group_coordinates, key=lambda x: x[0])[0]
+        min_y1 = min(group_coordinates, key=lambda x: x[1])[1]
+        max_x2 = max(group_coordinates, key=lambda x: x[2])[2]
+        max_y2 = max(group_coordinates, key=lambda x: x[3])[3]
+
+        merged_text_blocks.append(merged_text)
+        merged_coordinates.append([min_x1, min_y1, max_x2, max_y2])
+    return merged_text_blocks, merged_coordinates
+
+
+def random_blocks(rng, n, float_coords=False):
+    """随机文本行：一部分组成左对齐、行距紧密的段落，其余随机散布；偶尔出现完全重复的框。"""
+    coordinates = []
+    while len(coordinates) < n:
+        kind = rng.random()
+        if kind < 0.5:
+            # 段落：多行左右边缘相近、纵向相邻
+            x1 = rng.uniform(0, 800)
+            y = rng.uniform(0, 2200)
+            width = rng.uniform(50, 400)
+            for _ in range(rng.randint(2, 8)):
+                height = rng.uniform(15, 60)
+                box = [x1 + rng.uniform(-30, 30), y, x1 + width + rng.uniform(-60, 60), y + height]
+                coordinates.append(box)
+                y += height + rng.uniform(-25, 35)
+        elif kind < 0.55 and coordinates:
+            coordinates.append(list(rng.choice(coordinates)))
+        else:
+            x1, y1 = rng.uniform(0, 1000), rng.uniform(0, 2300)
+            coordinates.append([x1, y1, x1 + rng.uniform(5, 500), y1 + rng.uniform(5, 80)])
+    coordinates = coordinates[:n]
+    if not float_coords:
+        coordinates = [[int(v) for v in box] for box in coordinates]
+    else:
+        coordinates = [[round(v, rng.choice([0, 1, 3])) for v in box] for box in coordinates]
+    return [f"t{i}" for i in range(n)], coordinates
+
+
+def chat_screen(n):
+    """长聊天记录/文档：左右交替的消息气泡，每条消息多行。"""
+    coordinates = []
+    y = 0
+    i = 0
+    while len(coordinates) < n:
+        x1 = 40 if i % 2 == 0 else 500
+        for _ in range(1 + i % 4):
+            coordinates.append([x1, y, x1 + 480 + (i * 37) % 60, y + 36])
+            y += 44
+        y += 60
+        i += 1
+    coordinates = coordinates[:n]
+    return [f"t{i}" for i in range(n)], coordinates
+
+
+def timed(fn, min_time=0.2):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for case in range(args.cases):
+        text, coordinates = random_blocks(rng, rng.randint(0, 80), float_coords=case % 3 == 0)
+        thresholds = {}
+        if case % 4 == 0:
+            thresholds = {
+                "x_distance_threshold": rng.uniform(5, 100),
+                "y_distance_min": rng.uniform(-60, 10),
+                "y_distance_max": rng.uniform(10, 80),
+                "height_difference_threshold": rng.uniform(1, 40),
+            }
+        expected = merge_text_blocks_legacy(text, coordinates, **thresholds)
+        actual = merge_text_blocks(text, coordinates, **thresholds)
+        if expected != actual:
+            failures += 1
+            if failures <= 3:
+                print(f"MISMATCH (case {case}): thresholds={thresholds} coordinates={coordinates}")
+    print(f"equivalence: {args.cases - failures}/{args.cases} random cases identical")
+
+    for n in args.sizes:
+        for name, (text, coordinates) in (("random", random_blocks(rng, n)), ("chat", chat_screen(n))):
+            legacy_time, expected = timed(lambda: merge_text_blocks_legacy(text, coordinates), min_time=0)
+            new_time, actual = timed(lambda: merge_text_blocks(text, coordinates))
+            failures += expected != actual
+            print(f"{n:5d} blocks ({name:6s}) | quadratic {legacy_time * 1000:9.2f} ms | windowed {new_time * 1000:7.2f} ms "
+                  f"({legacy_time / new_time:6.1f}x) | {len(actual[0])} merged blocks")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
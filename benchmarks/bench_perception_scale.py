@@ -0,0 +1,165 @@
+"""
+缩放感知（PERCEPTION_SCALE）的精度与耗时：在 logs/ 下保存的步骤截图上，分别以不同的缩放倍数运行
+文本检测 + 识别和图标检测，以原始分辨率的结果为参照，报告每张截图的耗时、文本行召回率
+（文字相同且中心点距离不超过 --tolerance 像素）、图标召回率（IoU >= 0.5）和中心点的平均偏差。
+需要安装 modelscope 并能下载模型：
+    python benchmarks/bench_perception_scale.py --log_root logs --scales 1.0 0.75 0.5
+    python benchmarks/bench_perception_scale.py --scales 0.5 --no_full_res_recognition
+
+--check_mapping 不加载模型，用合成截图和按输入尺寸缩放的模拟检测器检查检测框映射回设备像素的结果：
+    python benchmarks/bench_perception_scale.py --check_mapping
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.frame import Frame
+from MobileAgentE.text_localization import ocr
+from bench_ocr import synthetic_screen, SimulatedRecognition
+
+
+def find_screenshots(log_root, limit):
+    paths = sorted(glob.glob(os.path.join(log_root, "**", "screenshots", "*.jpg"), recursive=True))
+    return paths[:limit] if limit else paths
+
+
+def load_models():
+    from modelscope import snapshot_download
+    from modelscope.pipelines import pipeline
+    from modelscope.utils.constant import Tasks
+    groundingdino = pipeline('grounding-dino-task', model=snapshot_download("AI-ModelScope/GroundingDINO", revision="v1.0.0"))
+    detection = pipeline(Tasks.ocr_detection, model="iic/cv_resnet18_ocr-detection-db-line-level_damo")
+    recognition = pipeline(Tasks.ocr_recognition, model="iic/cv_convnextTiny_ocr-recognition-document_damo")
+    return detection, recognition, groundingdino
+
+
+def center(box):
+    return np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+
+
+def iou(a, b):
+    inter = max(0, min(a[2], b[2]) - max(a[0], b[0])) * max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+
+def compare_text(reference, result, tolerance):
+    """返回 (召回的行数, 中心点偏差列表)。"""
+    matched, errors = 0, []
+    remaining = list(zip(*result))
+    for text, box in zip(*reference):
+        for k, (other_text, other_box) in enumerate(remaining):
+            error = np.linalg.norm(center(box) - center(other_box))
+            if other_text == text and error <= tolerance:
+                matched += 1
+                errors.append(error)
+                remaining.pop(k)
+                break
+    return matched, errors
+
+
+def compare_icons(reference, result):
+    matched, errors = 0, []
+    remaining = list(result)
+    for box in reference:
+        scores = [iou(box, other) for other in remaining]
+        if scores and max(scores) >= 0.5:
+            k = int(np.argmax(scores))
+            errors.append(np.linalg.norm(center(box) - center(remaining.pop(k))))
+            matched += 1
+    return matched, errors
+
+
+class ScaledDetection:
+    """模拟文本检测模型：返回按输入图像尺寸缩放后的已知四边形，模拟检测模型在缩小的图像上的输出。"""
+
+    def __init__(self, polygons, full_size):
+        self.polygons = polygons
+        self.full_size = full_size
+
+    def __call__(self, image):
+        factor = np.array([image.shape[1] / self.full_size[0], image.shape[0] / self.full_size[1]] * 4, dtype=np.float32)
+        return {"polygons": self.polygons * factor}
+
+
+def check_mapping(scales):
+    image, polygons = synthetic_screen(60, rotated_ratio=0)
+    frame = Frame(array=image[..., ::-1].copy())
+    detection = ScaledDetection(polygons, frame.size)
+    recognition = SimulatedRecognition(0, 0)
+    _, reference = ocr(frame, detection, recognition)
+    ok = True
+    for scale in scales:
+        for full_res in (True, False):
+            texts, boxes = ocr(frame, detection, recognition, scale=scale, full_res_recognition=full_res)
+            error = np.abs(np.array(boxes) - np.array(reference)).max()
+            # 模拟识别的输出是裁剪尺寸：原始分辨率识别时应与不缩放时一致（映射的取整误差可能带来 1 像素的差别）
+            same_crops = texts == ocr(frame, detection, recognition)[0]
+            ok &= error <= 1 / scale + 1
+            print(f"scale {scale:4.2f} | full-res recognition {str(full_res):5} | max box error {error:5.1f} px | "
+                  f"crops {'identical' if same_crops else 'scaled'}")
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log_root", type=str, default="logs")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=10)
+    parser.add_argument("--no_full_res_recognition", action="store_true", default=False)
+    parser.add_argument("--check_mapping", action="store_true", default=False)
+    args = parser.parse_args()
+
+    if args.check_mapping:
+        check_mapping([s for s in args.scales if s != 1.0] or [0.5])
+        return
+
+    from MobileAgentE.icon_localization import det
+
+    paths = find_screenshots(args.log_root, args.limit)
+    if not paths:
+        print(f"no step screenshots found under {args.log_root}/**/screenshots/")
+        sys.exit(1)
+    detection, recognition, groundingdino = load_models()
+    frames = [Frame.open(path) for path in paths]
+    print(f"{len(frames)} screenshots from {args.log_root}")
+
+    references = None
+    for scale in sorted(set(args.scales) | {1.0}, reverse=True):
+        results, ocr_time, det_time = [], 0, 0
+        for frame in frames:
+            start = time.perf_counter()
+            text = ocr(frame, detection, recognition, scale=scale, full_res_recognition=not args.no_full_res_recognition)
+            ocr_time += time.perf_counter() - start
+            start = time.perf_counter()
+            icons = det(frame, "icon", groundingdino, scale=scale)
+            det_time += time.perf_counter() - start
+            results.append((text, icons))
+        line = f"scale {scale:4.2f} | OCR {ocr_time / len(frames) * 1000:7.1f} ms | icon det {det_time / len(frames) * 1000:7.1f} ms per screenshot"
+        if references is None:
+            references = results
+        else:
+            text_total = sum(len(ref[0][0]) for ref in references)
+            icon_total = sum(len(ref[1]) for ref in references)
+            text_matched, icon_matched, errors = 0, 0, []
+            for (ref_text, ref_icons), (text, icons) in zip(references, results):
+                m, e = compare_text(ref_text, text, args.tolerance)
+                text_matched, errors = text_matched + m, errors + e
+                m, e = compare_icons(ref_icons, icons)
+                icon_matched, errors = icon_matched + m, errors + e
+            line += (f" | text recall {text_matched / max(text_total, 1):6.1%} | icon recall {icon_matched / max(icon_total, 1):6.1%}"
+                     f" | mean center error {np.mean(errors) if errors else 0:4.1f} px")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+对比逐对比较的 remove_boxes 与向量化的 crop.suppress_boxes：在 10 到 5000 个合成框上校验保留的框
+（及其顺序）完全一致，并比较耗时：
+    python benchmarks/bench_remove_boxes.py
+    python benchmarks/bench_remove_boxes.py --sizes 100 1000 --legacy_max 5000
+
+逐对比较的实现是 O(n^2) 的 Python 循环，默认只在不超过 --legacy_max 个框时运行。
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.crop import calculate_size, calculate_iou, suppress_boxes
+
+SCREEN = (1080, 2340)
+
+
+def remove_boxes_legacy(boxes_filt, size, iou_threshold=0.5):
+    """向量化之前 icon_localization.remove_boxes 的实现。"""
+    boxes_to_remove = set()
+
+    for i in range(len(boxes_filt)):
+        if calculate_size(boxes_filt[i]) > 0.05*size[0]*size[1]:
+            boxes_to_remove.add(i)
+        for j in range(len(boxes_filt)):
+            if calculate_size(boxes_filt[j]) > 0.05*size[0]*size[1]:
+                boxes_to_remove.add(j)
+            if i == j:
+                continue
+            if i in boxes_to_remove or j in boxes_to_remove:
+                continue
+            iou = calculate_iou(boxes_filt[i], boxes_filt[j])
+            if iou >= iou_threshold:
+                boxes_to_remove.add(j)
+
+    boxes_filt = [box for idx, box in enumerate(boxes_filt) if idx not in boxes_to_remove]
+
+    return boxes_filt
+
+
+def synthetic_boxes(n, seed=0, big_ratio=0.03):
+    """模拟 GroundingDINO 的输出：围绕若干图标位置抖动的重叠框，外加少量覆盖大片区域的框。"""
+    rng = np.random.default_rng(seed)
+    num_icons = max(1, n // 4)
+    centers = rng.uniform([40, 40], [SCREEN[0] - 40, SCREEN[1] - 40], size=(num_icons, 2))
+    sizes = rng.uniform(30, 140, size=(num_icons, 2))
+    picks = rng.integers(0, num_icons, size=n)
+    c = centers[picks] + rng.normal(0, 8, size=(n, 2))
+    wh = sizes[picks] * rng.uniform(0.8, 1.2, size=(n, 2))
+    big = rng.random(n) < big_ratio
+    wh[big] = rng.uniform(400, 1000, size=(big.sum(), 2))
+    boxes = np.concatenate([c - wh / 2, c + wh / 2], axis=1)
+    boxes = np.clip(boxes, 0, [SCREEN[0], SCREEN[1], SCREEN[0], SCREEN[1]]).astype(int)
+    return boxes.tolist()
+
+
+def timed(fn, min_time=0.2):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 500, 1000, 2000, 5000])
+    parser.add_argument("--legacy_max", type=int, default=1000)
+    args = parser.parse_args()
+
+    all_ok = True
+    for n in args.sizes:
+        boxes = synthetic_boxes(n)
+        new_time, keep = timed(lambda: suppress_boxes(boxes, SCREEN))
+        kept = [boxes[i] for i in keep]
+        line = f"{n:5d} boxes | vectorized {new_time * 1000:9.3f} ms | kept {len(kept):4d}"
+        if n <= args.legacy_max:
+            legacy_time, legacy = timed(lambda: remove_boxes_legacy(boxes, SCREEN), min_time=0)
+            ok = legacy == kept
+            all_ok &= ok
+            line += f" | pairwise {legacy_time * 1000:10.1f} ms ({legacy_time / new_time:7.1f}x) | {'identical' if ok else 'DIFFERS'}"
+        print(line)
+    if not all_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
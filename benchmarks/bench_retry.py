@@ -0,0 +1,115 @@
+"""
+模型调用的重试策略（MobileAgentE/retry.py）：让本地替身服务器（benchmarks/fake_llm_server.py）依次返回
+限流（429 + Retry-After）、服务端错误、格式错误的响应体和参数错误，测量 inference_chat 每种情况下的
+POST 次数和等待时间，并与此前的固定策略（任何失败后等待 20 秒，最多重试 5 次）的等待时间对比；
+再模拟持续故障，检查熔断后的调用立即失败、半开后恢复，以及重试预算限制了重试总数：
+    python benchmarks/bench_retry.py
+"""
+import json
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE import http_client, retry
+from MobileAgentE.api import inference_chat
+from fake_llm_server import FakeLLMServer
+
+CHAT = [["user", [{"type": "text", "text": "### 操作 ###"}]]]
+LEGACY_SLEEP, LEGACY_RETRIES = 20, 5
+UNAVAILABLE = (503, {}, '{"error": {"message": "overloaded"}}')
+
+# (名称, 服务器依次返回的失败响应, 是否应成功, 此前的策略会重试的次数)
+SCENARIOS = [
+    ("429 Retry-After: 1", [(429, {"Retry-After": "1"}, '{"error": {"message": "rate limited"}}')], True, 1),
+    ("503 twice", [UNAVAILABLE] * 2, True, 2),
+    ("malformed body", [(200, {"Content-Type": "application/json"}, '{"error": "content filter"}')], True, 1),
+    ("truncated json", [(200, {"Content-Type": "application/json"}, '{"choices": [')], True, 1),
+    ("400 bad request", [(400, {}, '{"error": {"message": "invalid image"}}')], False, LEGACY_RETRIES),
+]
+
+
+def run_scenario(server, script):
+    retry.reset()
+    server.reset(script)
+    start = time.perf_counter()
+    reply = inference_chat(CHAT, "fake", server.url, "x")
+    return reply, server.requests, time.perf_counter() - start
+
+
+def outage(server):
+    """
+    持续 503：前 breaker_threshold 次调用各自重试到放弃（调用自身的重试不会触发熔断），之后熔断，
+    熔断期间的调用不再发出请求；半开后的试探成功则恢复。短暂的故障（连续 max_attempts - 1 次 503）不影响调用成功。
+    """
+    policy = replace(retry.CHAT_POLICY, base_delay=0.02, max_delay=0.1, breaker_threshold=5, breaker_reset=0.5)
+    endpoint = http_client.endpoint(server.url)
+    send = lambda: http_client.post(server.url, json={"model": "fake", "messages": []})
+    parse = lambda res: res.json()['choices'][0]['message']['content']
+
+    def call():
+        try:
+            return retry.call_with_retry(endpoint, send, parse, policy=policy), None
+        except retry.RetryError as e:
+            return None, e.category
+
+    retry.reset()
+    server.reset([UNAVAILABLE] * (policy.max_attempts - 1))
+    brief = call()
+    print(f"brief outage: {policy.max_attempts - 1} x 503 then success -> {'ok' if brief[0] else brief[1]} "
+          f"after {server.requests} POSTs, breaker {retry.stats()[endpoint]['breaker']}")
+    ok = brief[0] is not None and retry.stats()[endpoint]["breaker"] == "closed"
+
+    retry.reset()
+    server.reset([UNAVAILABLE] * 1000)
+    first = call()
+    posts_first = server.requests
+    failed = [first] + [call() for _ in range(policy.breaker_threshold - 1)]
+    posts_failed = server.requests
+    start = time.perf_counter()
+    rejected = [call() for _ in range(20)]
+    fast = (time.perf_counter() - start) / 20
+    print(f"outage: first call gave up after {posts_first} POSTs ({first[1]}); {len(failed)} failed calls "
+          f"({', '.join(c for _, c in failed)}) opened the breaker; next 20 calls "
+          f"{sum(c == 'circuit_open' for _, c in rejected)} rejected by the breaker, {server.requests - posts_failed} POSTs, "
+          f"{fast * 1000:.2f} ms/call (fixed policy: {LEGACY_SLEEP * LEGACY_RETRIES} s/call)")
+    server.reset()
+    time.sleep(policy.breaker_reset)
+    recovered = call()
+    print(f"outage: after {policy.breaker_reset} s the half-open probe {'succeeded' if recovered[0] else 'failed'}, "
+          f"breaker {retry.stats()[endpoint]['breaker']}")
+    ok &= first == (None, retry.SERVER) and posts_first == policy.max_attempts
+    ok &= all(c != "circuit_open" for _, c in failed) and all(c == "circuit_open" for _, c in rejected)
+    ok &= server.requests == 1 and recovered[0] is not None
+
+    # 熔断关闭时，重试预算限制了故障期间的重试总数（最少 budget_min_retries 次）
+    policy = replace(policy, breaker_threshold=10 ** 6)
+    retry.reset()
+    server.reset([UNAVAILABLE] * 1000)
+    results = [call() for _ in range(30)]
+    retries = server.requests - len(results)
+    print(f"retry budget: 30 calls during an outage made {retries} retries "
+          f"(budget {policy.budget_min_retries}; without a budget {30 * (policy.max_attempts - 1)})")
+    return ok and retries <= policy.budget_min_retries
+
+
+def main():
+    server = FakeLLMServer(reply=json.dumps({"name": "Tap"})).start()
+    ok = True
+    for name, script, should_succeed, legacy_retries in SCENARIOS:
+        reply, posts, elapsed = run_scenario(server, script)
+        succeeded = reply is not None
+        ok &= succeeded == should_succeed
+        print(f"{name:20} | {'ok' if succeeded else 'gave up':7} | {posts} POSTs | {elapsed:5.2f} s "
+              f"(fixed policy: {legacy_retries * LEGACY_SLEEP} s of sleep, {legacy_retries + 1} POSTs)")
+    ok &= outage(server)
+    server.shutdown()
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
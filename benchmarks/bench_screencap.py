@@ -0,0 +1,59 @@
+"""
+对比 PNG（screencap -p）与原始帧缓冲（screencap）两种截图模式的采集延迟和宿主机 CPU 开销。
+每次采集都包含解码为感知所需的 BGR 像素数组。
+
+默认使用 benchmarks/fake_adb.py 作为 adb 替身；连接真实设备时可以测量设备端 PNG 压缩的开销：
+    python benchmarks/bench_screencap.py --rounds 10
+    python benchmarks/bench_screencap.py --adb "adb -s <serial>"
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.controller import capture_screenshot
+
+FAKE_ADB = f"\"{sys.executable}\" \"{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_adb.py')}\""
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def bench(adb, raw, rounds):
+    latencies = []
+    cpu_start = cpu_seconds()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        frame = capture_screenshot(adb, raw=raw)
+        frame.bgr
+        latencies.append(time.perf_counter() - start)
+    cpu = (cpu_seconds() - cpu_start) / rounds
+    latencies.sort()
+    return latencies[len(latencies) // 2], cpu, frame.size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adb", type=str, default=None)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    adb = args.adb
+    if adb is None:
+        adb = FAKE_ADB
+        os.environ["FAKE_ADB_STATE"] = tempfile.mkdtemp(prefix="fake_adb_")
+        os.environ.setdefault("FAKE_ADB_LATENCY_MS", "0")
+        capture_screenshot(adb)  # 生成模拟帧，不计入结果
+
+    for name, raw in (("png", False), ("raw", True)):
+        latency, cpu, size = bench(adb, raw, args.rounds)
+        print(f"{name}: {size[0]}x{size[1]} | median latency {latency * 1000:7.1f} ms | host cpu {cpu * 1000:7.1f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
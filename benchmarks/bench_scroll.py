@@ -0,0 +1,109 @@
+"""
+在合成的列表页（固定标题栏 + 可滚动的餐厅列表 + 底部导航栏）上检查滑动后的感知复用
+（MobileAgentE/incremental.py 中的 estimate_scroll 和 scroll_regions）：
+
+1. 对不同的滚动距离（含反向滚动），估计的偏移必须与真实偏移一致；
+2. 平移/沿用的元素必须与新截图中的元素完全一致，其余元素必须完整落在需要重新感知的区域内；
+3. 滚动距离超过大半屏（与上一帧重叠的内容太少）时不复用，回退到完整感知；
+4. 报告需要重新感知的屏幕面积比例和估计偏移的耗时：
+    python benchmarks/bench_scroll.py
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.frame import Frame
+from MobileAgentE.incremental import estimate_scroll, scroll_regions, region_fraction, intersects
+
+WIDTH, HEIGHT = 1080, 2340
+HEADER, FOOTER = 220, 180
+ITEM_HEIGHT = 260
+NAMES = ["Seoul Garden", "Kimchi House", "BBQ Corner", "Bibimbap Bar", "Tofu Village", "Noodle Story", "Hot Pot King", "Mandu Place"]
+
+
+def list_page(scroll, items=40, seed=0):
+    """渲染滚动位置为 scroll 的列表页，返回 (Frame, 元素列表)。"""
+    rng = np.random.default_rng(seed)
+    content_height = items * ITEM_HEIGHT
+    content = np.full((content_height, WIDTH, 3), 255, dtype=np.uint8)
+    content_elements = []
+    for i in range(items):
+        y = i * ITEM_HEIGHT
+        color = tuple(int(c) for c in rng.integers(40, 220, size=3))
+        cv2.rectangle(content, (40, y + 30), (240, y + 230), color, -1)
+        content_elements.append(("icon: photo", [40, y + 30, 240, y + 230]))
+        name = f"{NAMES[i % len(NAMES)]} #{i + 1}"
+        cv2.putText(content, name, (280, y + 90), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (30, 30, 30), 2)
+        content_elements.append(("text: " + name, [280, y + 55, 280 + 24 * len(name), y + 100]))
+        rating = f"{3 + (i * 7 % 20) / 10:.1f} stars  {i % 5 + 1}.{i % 9} mi"
+        cv2.putText(content, rating, (280, y + 160), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (90, 90, 90), 2)
+        content_elements.append(("text: " + rating, [280, y + 130, 280 + 19 * len(rating), y + 170]))
+        cv2.line(content, (40, y + ITEM_HEIGHT - 2), (WIDTH - 40, y + ITEM_HEIGHT - 2), (225, 225, 225), 2)
+
+    image = np.full((HEIGHT, WIDTH, 3), 255, dtype=np.uint8)
+    view = HEIGHT - HEADER - FOOTER
+    image[HEADER:HEIGHT - FOOTER] = content[scroll:scroll + view]
+    elements = []
+
+    def add(text, box):
+        x1, y1, x2, y2 = box
+        elements.append({"text": text, "coordinates": [int((x1 + x2) / 2), int((y1 + y2) / 2)], "box": list(box)})
+
+    cv2.rectangle(image, (0, 0), (WIDTH, HEADER), (245, 245, 245), -1)
+    cv2.putText(image, "korean restaurants", (120, 140), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (20, 20, 20), 3)
+    add("text: korean restaurants", (120, 100, 560, 150))
+    cv2.rectangle(image, (30, 95), (90, 155), (60, 60, 60), -1)
+    add("icon: back arrow", (30, 95, 90, 155))
+    for text, (x1, y1, x2, y2) in content_elements:
+        y1, y2 = y1 - scroll + HEADER, y2 - scroll + HEADER
+        if y1 >= HEADER and y2 <= HEIGHT - FOOTER:
+            add(text, (x1, y1, x2, y2))
+    cv2.rectangle(image, (0, HEIGHT - FOOTER), (WIDTH, HEIGHT), (240, 240, 240), -1)
+    for i, label in enumerate(["Explore", "Saved", "Updates"]):
+        x = 80 + i * 360
+        cv2.putText(image, label, (x, HEIGHT - 70), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (50, 50, 50), 2)
+        add("text: " + label, (x, HEIGHT - 105, x + 22 * len(label), HEIGHT - 60))
+    return Frame(array=image), elements
+
+
+def check(start, end, fallback=False):
+    prev_frame, prev_elements = list_page(start)
+    frame, elements = list_page(end)
+    t0 = time.perf_counter()
+    offset = estimate_scroll(prev_frame, frame)
+    t1 = time.perf_counter()
+    result = scroll_regions(prev_frame, frame, prev_elements, offset=offset)
+    t2 = time.perf_counter()
+    if result is None:
+        print(f"scroll {start:5d} -> {end:5d} | estimated {offset} | too little overlap, full perception")
+        return fallback
+    _, regions, reused = result
+    fraction = region_fraction(regions, frame.size)
+    inside = lambda box: any(r[0] <= box[0] and r[1] <= box[1] and box[2] <= r[2] and box[3] <= r[3] for r in regions)
+    reused_ok = all(info in elements for info in reused)
+    missing = [e for e in elements if e not in reused]
+    covered = all(inside(e["box"]) for e in missing)
+    no_overlap = not any(intersects(info["box"], r) for info in reused for r in regions)
+    ok = not fallback and offset == end - start and reused_ok and covered and no_overlap
+    print(f"scroll {start:5d} -> {end:5d} | estimated {offset:5d} (true {end - start:5d}) in {(t1 - t0) * 1000:5.1f} ms, "
+          f"layout {(t2 - t1) * 1000:5.1f} ms | reused {len(reused):2d}/{len(elements):2d} elements, "
+          f"re-perceive {fraction:5.1%} of screen | {'consistent' if ok else 'INCONSISTENT'}")
+    return ok
+
+
+def main():
+    cases = [(0, 300), (0, 900), (900, 1800), (1800, 1250), (2000, 2037)]
+    ok = all([check(start, end) for start, end in cases])
+    ok &= check(500, 1900, fallback=True)
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+操作者的流式调用：本地替身服务器（benchmarks/fake_llm_server.py）按 --token_delay 逐段生成一个操作者回复
+（思考、操作 JSON、较长的描述），分别对 OpenAI 兼容接口和 Claude 接口比较：
+  - 非流式 inference_chat：拿到操作需要等待整个回复生成完毕；
+  - 流式 + drain：### 操作 ### 部分完整即可执行，剩余部分在后台接收，完整文本与非流式一致；
+  - 流式 + cancel：拿到操作后关闭连接，服务端停止生成。
+并逐字符地检查增量分段解析器在操作 JSON 配平（或 ### 描述 ### 出现）时才判定操作完整：
+    python benchmarks/bench_streaming.py
+    python benchmarks/bench_streaming.py --token_delay 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE import http_client
+from MobileAgentE.agents import Operator, OPERATOR_SECTIONS
+from MobileAgentE.api import inference_chat, inference_chat_stream
+from MobileAgentE.streaming import SectionParser
+from fake_llm_server import FakeLLMServer
+
+CHAT = [["system", [{"type": "text", "text": "You are a helpful AI mobile phone operating assistant."}]],
+        ["user", [{"type": "text", "text": "### 操作 ###"}]]]
+
+THOUGHT = "当前屏幕显示的是小红书的首页，搜索框位于屏幕顶部。为了完成当前子目标“搜索咖啡店”，需要先点击搜索框使其获得焦点，之后才能输入关键词。"
+ACTION = '{"name": "Tap", "arguments": {"x": 540, "y": 156}}'
+DESCRIPTION = ("点击屏幕顶部的搜索框。预期结果：搜索框获得焦点并弹出键盘，页面切换到搜索页，显示历史搜索记录和热门搜索推荐。"
+               "如果点击后没有弹出键盘，下一步可以再次点击搜索框或者检查是否有弹窗遮挡。") * 3
+REPLY = f"### 思考 ###\n{THOUGHT}\n\n### 操作 ###\n{ACTION}\n\n### 描述 ###\n{DESCRIPTION}"
+
+
+def operator():
+    # parse_response / parse_partial_response 不需要连接设备
+    return Operator.__new__(Operator)
+
+
+def check_parser():
+    """逐字符输入，操作应在 JSON 的右括号（或下一个标题）到达时才被判定为完整。"""
+    op = operator()
+    cases = [
+        (REPLY, REPLY.index(ACTION) + len(ACTION)),
+        # 字符串中的括号和转义的引号不影响配平
+        (REPLY.replace(ACTION, '{"name": "Type", "arguments": {"text": "a}\\"{b"}}'), None),
+        # 没有 JSON 的操作部分：在 ### 描述 ### 出现时完整
+        (REPLY.replace(ACTION, "Home"), REPLY.replace(ACTION, "Home").index("### 描述 ###") + len("### 描述 ###")),
+    ]
+    cases[1] = (cases[1][0], cases[1][0].index("}}") + 2)
+    ok = True
+    for text, expected in cases:
+        parser = SectionParser(OPERATOR_SECTIONS)
+        ready_at = next((n for n in range(len(text) + 1) if op.parse_partial_response(parser.update(text[:n])) is not None), None)
+        partial = op.parse_partial_response(parser.update(text[:ready_at]))
+        full = op.parse_response(text)
+        same = partial["thought"] == full["thought"] and partial["action"] == full["action"]
+        ok &= ready_at == expected and same
+        print(f"parser: action complete at char {ready_at} (expected {expected}), thought/action {'match' if same else 'DIFFER from'} parse_response")
+    return ok
+
+
+def timed_stream(server, model, path, cancel):
+    op = operator()
+    url = server.url.replace("/v1/chat/completions", path)
+    start = time.perf_counter()
+    stream = inference_chat_stream(CHAT, model, url, "x")
+    parser = SectionParser(OPERATOR_SECTIONS)
+    stream.wait_until(lambda text: op.parse_partial_response(parser.update(text)) is not None)
+    to_action = time.perf_counter() - start
+    partial = op.parse_partial_response(parser)
+    if cancel:
+        stream.cancel()
+    text = stream.result() or stream.text
+    return to_action, time.perf_counter() - start, partial, text
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token_delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    ok = check_parser()
+    server = FakeLLMServer(reply=REPLY, token_delay=args.token_delay).start()
+    op = operator()
+    expected = op.parse_response(REPLY)
+    for name, model, path in (("OpenAI", "fake", "/v1/chat/completions"), ("Claude", "claude-fake", "/v1/messages")):
+        url = server.url.replace("/v1/chat/completions", path)
+        start = time.perf_counter()
+        full = inference_chat(CHAT, model, url, "x")
+        blocking = time.perf_counter() - start
+        print(f"{name:6} non-streaming | action after {blocking:5.2f} s")
+        ok &= full == REPLY
+
+        to_action, total, partial, text = timed_stream(server, model, path, cancel=False)
+        same = text == REPLY and op.parse_response(text) == expected and partial["action"] == expected["action"]
+        print(f"{name:6} stream+drain  | action after {to_action:5.2f} s ({blocking / to_action:.1f}x sooner), "
+              f"full reply after {total:5.2f} s, {'identical to' if same else 'DIFFERS from'} non-streaming")
+        ok &= same and to_action < blocking
+
+        server.reset()
+        to_action, total, partial, text = timed_stream(server, model, path, cancel=True)
+        time.sleep(args.token_delay * 5)
+        print(f"{name:6} stream+cancel | action after {to_action:5.2f} s, {len(text)}/{len(REPLY)} chars received, "
+              f"{server.streams_cancelled} stream(s) stopped by the server")
+        ok &= partial["action"] == expected["action"] and server.streams_cancelled == 1
+    server.shutdown()
+    http_client.close_all()
+    print("OK" if ok else "FAILED")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+对比逐字符输入（controller.type）与批量输入（controller.type_text）。
+
+两种方式都通过 benchmarks/fake_adb.py 执行，替身会记录设备端收到的每条 input/am 命令；
+脚本根据记录回放出设备上最终输入的内容，校验两者一致，并统计 adb 调用次数和耗时：
+    python benchmarks/bench_type.py
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MobileAgentE.adb_session import AdbSessionPool
+from MobileAgentE.controller import type, type_text
+
+FAKE_ADB = f"\"{sys.executable}\" \"{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_adb.py')}\""
+
+# 逐字符输入会把字面的 "_" 当作回车，这里的样例不包含 "_"
+SAMPLES = [
+    "best sushi restaurants near me",
+    "北京 明天 天气",
+    "Mobile-Agent-E: self-evolving agent, v2.0!",
+    "email me @ 9:30 / 10:00?",
+    "第一行\n第二行 line 3",
+    "Café crème 25°C 中文 mixed 123",
+]
+
+
+def read_log(state):
+    path = os.path.join(state, "commands.log")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = [line.rstrip("\n").split("\x1f")[:-1] for line in f if line.strip()]
+    os.remove(path)
+    return entries
+
+
+def replay(entries):
+    """根据记录的设备端命令回放出输入框中的内容。"""
+    typed = ""
+    for args in entries:
+        if args[:2] == ["input", "text"]:
+            typed += args[2].replace("%s", " ")
+        elif args[:2] == ["input", "keyevent"]:
+            typed += "".join("\n" for key in args[2:] if key in ("66", "KEYCODE_ENTER"))
+        elif args[:1] == ["am"] and "--es" in args:
+            msg = args[args.index("--es") + 2]
+            typed += base64.b64decode(msg).decode("utf-8") if "ADB_INPUT_B64" in args else msg
+    return typed
+
+
+def run(fn, adb, text, state):
+    start = time.perf_counter()
+    fn(adb, text)
+    elapsed = time.perf_counter() - start
+    entries = read_log(state)
+    return replay(entries), len(entries), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency_ms", type=float, default=30)
+    args = parser.parse_args()
+
+    state = tempfile.mkdtemp(prefix="fake_adb_")
+    os.environ["FAKE_ADB_STATE"] = state
+    os.environ["FAKE_ADB_LATENCY_MS"] = str(args.latency_ms)
+
+    all_ok = True
+    with AdbSessionPool(FAKE_ADB) as pool:
+        for text in SAMPLES:
+            legacy, legacy_cmds, legacy_time = run(type, FAKE_ADB, text, state)
+            batched, batched_cmds, batched_time = run(type_text, FAKE_ADB, text, state)
+            pooled, _, pooled_time = run(type_text, pool, text, state)
+            ok = batched == text and pooled == text
+            all_ok &= ok
+            print(f"{text!r}")
+            print(f"    per-char : {legacy_cmds:3d} adb calls {legacy_time * 1000:8.1f} ms | typed {legacy!r}")
+            print(f"    batched  :   1 adb call  {batched_time * 1000:8.1f} ms ({batched_cmds} device commands) | session pool {pooled_time * 1000:6.1f} ms")
+            print(f"    batched output {'matches' if ok else 'DIFFERS from'} the requested text; "
+                  f"per-char output {'matches' if legacy == batched else 'differs'}")
+    if not all_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
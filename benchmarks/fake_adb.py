@@ -0,0 +1,186 @@
+"""
+用于基准测试的 adb 替身脚本。
+
+用法与 adb 相同，例如：
+    python benchmarks/fake_adb.py [-s SERIAL] shell input tap 10 20
+    python benchmarks/fake_adb.py shell            # 交互式会话，从 stdin 读取命令
+    python benchmarks/fake_adb.py exec-out screencap -p > frame.png
+    python benchmarks/fake_adb.py pull /sdcard/screenshot.png ./screenshot
+
+设备端命令由宿主机上的 /bin/sh 执行，`input`、`am`、`screencap` 等设备命令被替换为 shell 函数：
+它们不会操作真实设备，只把调用记录到状态目录下的 commands.log。`pm list packages` 和
+`cmd package query-activities` 读取状态目录下的 packages.txt（每行一个 "包名/启动 Activity"，
+没有启动 Activity 的包只写包名；其后可以用制表符隔开写清单中的显示名称 nonLocalizedLabel）。
+不带 --brief 时按 ResolveInfo 的格式输出，没有显示名称的应用输出 nonLocalizedLabel=null。
+
+环境变量:
+    FAKE_ADB_STATE       状态目录（默认为系统临时目录下的 fake_adb_<serial>）
+    FAKE_ADB_LATENCY_MS  每次启动 adb 进程时模拟的握手延迟（默认 30 毫秒）
+    FAKE_ADB_SIZE        模拟屏幕的分辨率（默认 1080x2340）
+"""
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+DEVICE_FUNCTIONS = r'''
+_log() { printf '%s\037' "$@" >> "$FAKE_ADB_STATE/commands.log"; printf '\n' >> "$FAKE_ADB_STATE/commands.log"; }
+input() { _log input "$@"; }
+am() { _log am "$@"; }
+monkey() { _log monkey "$@"; }
+pm() {
+    if [ "$1 $2" = "list packages" ]; then sed -e 's#/.*##' -e 's#^#package:#' "$FAKE_ADB_STATE/packages.txt"; else _log pm "$@"; fi
+}
+cmd() {
+    if [ "$1 $2" != "package query-activities" ]; then _log cmd "$@"; return; fi
+    case " $* " in
+        *" --brief "*) grep / "$FAKE_ADB_STATE/packages.txt" | cut -f1 ;;
+        *) grep / "$FAKE_ADB_STATE/packages.txt" | awk -F '\t' '{
+               split($1, c, "/"); label = ($2 == "") ? "null" : $2
+               printf "Activity #%d:\n  ActivityInfo:\n    name=%s\n    packageName=%s\n", NR - 1, c[2], c[1]
+               printf "    labelRes=0x0 nonLocalizedLabel=%s icon=0x0\n", label
+           }' ;;
+    esac
+}
+screencap() {
+    if [ "$1" = "-p" ]; then shift; src="$FAKE_ADB_STATE/frame.png"; else src="$FAKE_ADB_STATE/frame.raw"; fi
+    if [ -n "$1" ]; then cat "$src" > "$1"; else cat "$src"; fi
+}
+'''
+
+
+def state_dir(serial):
+    path = os.environ.get("FAKE_ADB_STATE") or os.path.join(tempfile.gettempdir(), f"fake_adb_{serial}")
+    os.makedirs(os.path.join(path, "sdcard"), exist_ok=True)
+    return path
+
+
+def screen_size():
+    w, h = os.environ.get("FAKE_ADB_SIZE", "1080x2340").split("x")
+    return int(w), int(h)
+
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+
+def render_frame(width, height, seed=0):
+    """生成一帧带横向条纹的 RGBA 像素数据（模拟列表界面），seed 改变条纹位置。"""
+    rows = []
+    for y in range(height):
+        band = ((y + seed) // 60) % 4
+        shade = (235, 200, 150, 90)[band]
+        rows.append(bytes((shade, shade, 255 - shade, 255)) * width)
+    return b"".join(rows)
+
+
+def write_frame(state, width, height, seed=0):
+    """把同一帧同时写成 PNG（screencap -p）和原始帧缓冲（screencap）两种格式。"""
+    rgba = render_frame(width, height, seed)
+    stride = width * 4
+    scanlines = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    png = b"\x89PNG\r\n\x1a\n"
+    png += _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+    png += _png_chunk(b"IDAT", zlib.compress(scanlines, 1))
+    png += _png_chunk(b"IEND", b"")
+    with open(os.path.join(state, "frame.png"), "wb") as f:
+        f.write(png)
+    # Android 9+ 的 screencap 头部：width, height, format(1=RGBA_8888), colorspace
+    with open(os.path.join(state, "frame.raw"), "wb") as f:
+        f.write(struct.pack("<IIII", width, height, 1, 0) + rgba)
+
+
+def ensure_frame(state):
+    if not os.path.exists(os.path.join(state, "frame.raw")):
+        write_frame(state, *screen_size())
+
+
+DEFAULT_PACKAGES = [
+    "com.android.settings/.Settings\tSettings",
+    "com.android.chrome/com.google.android.apps.chrome.Main\tChrome",
+    "com.google.android.apps.maps/com.google.android.maps.MapsActivity",
+    "com.google.android.youtube/.HomeActivity\tYouTube",
+    "com.samsung.android.app.notes/.memolist.MemoListActivity",
+    "com.tencent.mm/.ui.LauncherUI",
+    "com.android.systemui",
+]
+
+
+def ensure_packages(state):
+    path = os.path.join(state, "packages.txt")
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write("\n".join(DEFAULT_PACKAGES) + "\n")
+
+
+def device_path(state, path):
+    return path.replace("/sdcard/", os.path.join(state, "sdcard") + "/")
+
+
+def spawn_shell(state, command=None, stdin=None, stdout=None):
+    env = dict(os.environ, FAKE_ADB_STATE=state)
+    script = DEVICE_FUNCTIONS + (device_path(state, command) if command is not None else "")
+    if command is None:
+        # 交互模式：先定义设备命令函数，再继续从 stdin 读取命令
+        proc = subprocess.Popen(["/bin/sh"], stdin=subprocess.PIPE, stdout=stdout, env=env, cwd=state)
+        proc.stdin.write(DEVICE_FUNCTIONS.encode())
+        proc.stdin.flush()
+        return proc
+    return subprocess.Popen(["/bin/sh", "-c", script], stdin=stdin, stdout=stdout, env=env, cwd=state)
+
+
+def interactive_shell(state):
+    proc = spawn_shell(state)
+
+    def pump():
+        for line in iter(sys.stdin.buffer.readline, b""):
+            proc.stdin.write(device_path(state, line.decode("utf-8")).encode("utf-8"))
+            proc.stdin.flush()
+        proc.stdin.close()
+
+    threading.Thread(target=pump, daemon=True).start()
+    return proc.wait()
+
+
+def main(argv):
+    serial = "emulator-5554"
+    if len(argv) >= 2 and argv[0] == "-s":
+        serial, argv = argv[1], argv[2:]
+    time.sleep(float(os.environ.get("FAKE_ADB_LATENCY_MS", "30")) / 1000)
+    state = state_dir(serial)
+    if not argv:
+        return 1
+    cmd, args = argv[0], argv[1:]
+    if cmd == "get-serialno":
+        print(serial)
+        return 0
+    if cmd == "devices":
+        print("List of devices attached")
+        print(f"{serial}\tdevice")
+        return 0
+    if cmd in ("shell", "exec-out"):
+        ensure_frame(state)
+        ensure_packages(state)
+        if not args:
+            return interactive_shell(state)
+        return spawn_shell(state, " ".join(args), stdin=subprocess.DEVNULL).wait()
+    if cmd == "pull":
+        src, dst = device_path(state, args[0]), args[1]
+        if not os.path.exists(src):
+            print(f"adb: error: remote object '{args[0]}' does not exist", file=sys.stderr)
+            return 1
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        shutil.copyfile(src, dst)
+        return 0
+    print(f"fake adb: unsupported command {cmd}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,167 @@
+"""
+本地的 OpenAI 兼容 /chat/completions 替身服务器（HTTP/1.1，支持 keep-alive），统计新建的 TCP 连接数和请求数，
+用于在没有真实模型端点时测量客户端的连接复用；script 中的响应（状态码、响应头、原始响应体）会依次代替
+正常的回复返回，用于模拟限流、服务端错误和格式错误的响应体。请求中 "stream": true 时以 SSE 逐段返回回复
+（路径以 /messages 结尾时使用 Claude 的事件格式，否则为 OpenAI 兼容格式），每段之间等待 token_delay 秒。可以单独运行：
+    python benchmarks/fake_llm_server.py --port 8765 --reply "### 操作 ###\\n..."
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, reply="OK", handshake_delay=0.0, latency=0.0, token_delay=0.0, chunk_chars=4):
+        """
+        参数:
+            handshake_delay (float): 每个新连接额外等待的秒数，模拟到远端的 TCP+TLS 握手往返。
+            latency (float): 每个请求的处理时间（秒），模拟模型推理。
+            token_delay (float): 生成每 chunk_chars 个字符所需的时间（秒）；非流式请求等待全部生成完毕后才返回。
+        """
+        super().__init__(("127.0.0.1", port), FakeLLMHandler)
+        self.reply = reply
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chunk_chars = chunk_chars
+        self.connections = 0
+        self.requests = 0
+        self.streams_cancelled = 0  # 客户端在回复结束前关闭连接的流式请求数
+        self.script = []  # [(status, headers, body)]
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/chat/completions"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def reset(self, script=()):
+        with self.lock:
+            self.connections = self.requests = self.streams_cancelled = 0
+            self.script = list(script)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 默认的 HTTP/1.0 每个请求后都会关闭连接
+    disable_nagle_algorithm = True  # 否则响应头和响应体分两次发送时，保持连接上的每个请求都要多等一次延迟确认（约 40 ms）
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+            scripted = self.server.script.pop(0) if self.server.script else None
+        time.sleep(self.server.latency)
+        if scripted is not None:
+            status, headers, body = scripted
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        chunks = [self.server.reply[i:i + self.server.chunk_chars] for i in range(0, len(self.server.reply), self.server.chunk_chars)]
+        if request.get("stream"):
+            self.stream(chunks, request.get("model", "fake"), claude=self.path.endswith("/messages"))
+            return
+        time.sleep(self.server.token_delay * len(chunks))
+        if self.path.endswith("/messages"):
+            self.send_json(200, {
+                "id": f"msg-fake-{self.server.requests}",
+                "type": "message",
+                "model": request.get("model", "fake"),
+                "content": [{"type": "text", "text": self.server.reply}],
+                "usage": {"input_tokens": 0, "output_tokens": 0},
+            })
+            return
+        self.send_json(200, {
+            "id": f"chatcmpl-fake-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.server.reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+    def write_chunk(self, data):
+        # HTTP/1.1 分块传输：保持连接时流式响应没有 Content-Length
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def stream(self, chunks, model, claude=False):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if claude:
+            events = [{"type": "message_start", "message": {"id": "msg-fake", "model": model, "usage": {"input_tokens": 0}}}]
+            events += [{"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": c}} for c in chunks]
+            events += [{"type": "message_delta", "usage": {"output_tokens": len(chunks)}}, {"type": "message_stop"}]
+        else:
+            events = [{"id": "chatcmpl-fake", "model": model, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}}]}]
+            events += [{"id": "chatcmpl-fake", "model": model, "choices": [{"index": 0, "delta": {"content": c}}]} for c in chunks]
+            events += [{"id": "chatcmpl-fake", "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}]
+        try:
+            for event in events:
+                if event.get("type") == "content_block_delta" or event.get("choices", [{}])[0].get("delta", {}).get("content"):
+                    time.sleep(self.server.token_delay)
+                self.write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            if not claude:
+                self.write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.streams_cancelled += 1
+            self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", type=str, default="OK")
+    parser.add_argument("--handshake_delay", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token_delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeLLMServer(args.port, args.reply.encode().decode("unicode_escape"), args.handshake_delay, args.latency, args.token_delay)
+    print(f"serving {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"{server.connections} connections, {server.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
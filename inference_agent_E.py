@@ -3,19 +3,33 @@ import time
 import copy
 import torch
 import shutil
+import base64
+import threading
+import contextlib
+from io import BytesIO
 from PIL import Image, ImageDraw
 from time import sleep
 
-from MobileAgentE.api import inference_chat
-from MobileAgentE.text_localization import ocr
+from MobileAgentE.api import inference_chat, inference_chat_stream
+from MobileAgentE.http_client import prewarm
+from MobileAgentE.retry import call_with_retry, RetryError, CAPTION_POLICY
+from MobileAgentE.streaming import SectionParser
+from MobileAgentE.text_localization import ocr, merge_text_blocks
 from MobileAgentE.icon_localization import det
 from MobileAgentE.controller import get_screenshot, start_recording, end_recording
+from MobileAgentE.frame import Frame
+from MobileAgentE.cpu_backend import available_cores, set_threads, autotune_threads, tuning_key, quantize_pipeline, synthetic_screen
+from MobileAgentE.adb_session import connect
+from MobileAgentE.perception_cache import PerceptionCache
+from MobileAgentE.scheduler import merge_tips
+from MobileAgentE.caption_cache import CaptionCache, caption_key
+from MobileAgentE.incremental import dirty_regions, expand_regions, region_fraction, region_frames, carry_over, merge_perception, scroll_regions
 from MobileAgentE.agents import (
     InfoPool, Manager, Operator, Notetaker, ActionReflector, ExperienceRetrieverShortCut, ExperienceRetrieverTips,
     INIT_SHORTCUTS, ExperienceReflectorShortCut, ExperienceReflectorTips
 )
 from MobileAgentE.agents import add_response, add_response_two_image
-from MobileAgentE.agents import ATOMIC_ACTION_SIGNITURES
+from MobileAgentE.agents import ATOMIC_ACTION_SIGNITURES, OPERATOR_SECTIONS
 
 from modelscope.pipelines import pipeline
 from modelscope.utils.constant import Tasks
@@ -33,6 +47,11 @@ os.environ["TOKENIZERS_PARALLELISM"] = "false"
 ####################################### Edit your Setting #########################################
 # Your ADB path
 ADB_PATH = os.environ.get("ADB_PATH", default="adb")
+# ADB 控制后端："subprocess" 每个操作启动一个新的 adb 进程；"session" 复用常驻的 adb shell 会话
+ADB_BACKEND = os.environ.get("ADB_BACKEND", default="subprocess")
+ADB_NUM_SESSIONS = 2
+# 为 True 时读取未压缩的原始帧缓冲（screencap 不带 -p），省去设备端的 PNG 压缩
+SCREENCAP_RAW = os.environ.get("SCREENCAP_RAW", default="0") == "1"
 
 ## Reasoning model configs
 BACKBONE_TYPE = os.environ.get("BACKBONE_TYPE", default="Doubao") # "OpenAI" or "Gemini" or "Claude" or "Qwen" or "GLM" or "Doubao" 
@@ -76,6 +95,24 @@ elif BACKBONE_TYPE == "Doubao":
     REASONING_MODEL = "doubao-1-5-thinking-vision-pro-250428"
     KNOWLEDGE_REFLECTION_MODEL = "doubao-1-5-thinking-vision-pro-250428"
 
+REASONING_API_ENDPOINTS = {
+    "OpenAI": (OPENAI_API_URL, OPENAI_API_KEY),
+    "Gemini": (GEMINI_API_URL, GEMINI_API_KEY),
+    "Claude": (CLAUDE_API_URL, CLAUDE_API_KEY),
+    "Qwen": (QWEN_REASONING_API_URL, QWEN_REASONING_API_KEY),
+    "GLM": (GLM_API_URL, GLM_API_KEY),
+    "Doubao": (Doubao_API_URL, Doubao_API_KEY),
+}
+
+## 任务开始时在后台预先建立到推理模型端点的连接（连接池见 MobileAgentE/http_client.py，
+## 超时通过 HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT 设置，HTTP2=1 时使用 httpx 的 HTTP/2 客户端）
+HTTP_PREWARM = os.environ.get("HTTP_PREWARM", default="1") == "1"
+
+## 操作者以流式输出调用推理模型，### 操作 ### 部分完整后立即执行操作；
+## 剩余的 ### 描述 ### 部分在执行期间继续接收（"drain"），或关闭连接不再生成（"cancel"，描述只保留已收到的部分）
+STREAM_OPERATOR = os.environ.get("STREAM_OPERATOR", default="1") == "1"
+STREAM_REMAINDER = os.environ.get("STREAM_REMAINDER", default="drain") # "drain" 或 "cancel"
+
 ## 您可以指定一个 jsonl 文件路径来跟踪 API 使用情况
 USAGE_TRACKING_JSONL = None # 例如：usage_tracking.jsonl
 
@@ -98,38 +135,80 @@ INIT_TIPS = """0. 不要添加任何付款信息。如果要求您登录，请
 
 ## 其他配置
 TEMP_DIR = "temp"
+# 为 True 时把裁剪出的图标另存到 TEMP_DIR 以便调试；图标描述本身不依赖这些文件
+SAVE_ICON_CROPS = os.environ.get("SAVE_ICON_CROPS", default="0") == "1"
 SCREENSHOT_DIR = "screenshot"
+# 为 True 时把每步的截图（screenshot.jpg）和标注了文本位置的 output_image.png 写入 SCREENSHOT_DIR 以便调试；
+# 各个智能体只使用内存中的截图，不读取这些文件
+SAVE_SCREENSHOTS = os.environ.get("SAVE_SCREENSHOTS", default="0") == "1"
 SLEEP_BETWEEN_STEPS = 5
+# 为 True 时，操作后轮询截图直到界面稳定（参数见 MobileAgentE/settle.py 中的 SETTLE_CONFIGS），
+# 代替固定的等待时间，并跳过 SLEEP_BETWEEN_STEPS
+ADAPTIVE_SETTLE = os.environ.get("ADAPTIVE_SETTLE", default="1") == "1"
+# 感知结果缓存：截图的感知哈希与缓存中的某张截图距离不超过 PERCEPTION_CACHE_TOLERANCE、且缩略图逐像素确认内容相同时，
+# 直接复用其感知结果；设置 PERCEPTION_CACHE_PATH 可在多次运行之间持久化缓存
+PERCEPTION_CACHE = os.environ.get("PERCEPTION_CACHE", default="1") == "1"
+PERCEPTION_CACHE_SIZE = 64
+PERCEPTION_CACHE_TOLERANCE = int(os.environ.get("PERCEPTION_CACHE_TOLERANCE", default="0"))
+PERCEPTION_CACHE_PATH = os.environ.get("PERCEPTION_CACHE_PATH", default=None)
+# 图标描述缓存：按 (图标像素, CAPTION_MODEL, 提示词) 缓存描述，保存在 SQLite 中，跨运行复用
+CAPTION_CACHE = os.environ.get("CAPTION_CACHE", default="1") == "1"
+CAPTION_CACHE_PATH = os.environ.get("CAPTION_CACHE_PATH", default="cache/icon_captions.sqlite")
+CAPTION_CACHE_SIZE = 100000
+
+## 增量感知：只在与上一步截图相比发生变化的区域内重新运行 OCR、图标检测和图标描述，其余元素沿用上一步的结果
+INCREMENTAL_PERCEPTION = os.environ.get("INCREMENTAL_PERCEPTION", default="0") == "1"
+INCREMENTAL_MAX_DIRTY = float(os.environ.get("INCREMENTAL_MAX_DIRTY", default="0.3")) # 变化区域超过屏幕面积的该比例时做完整感知
+## 滑动后估计内容的滚动偏移，平移上一步的元素，只感知新露出的条带
+SCROLL_PERCEPTION = os.environ.get("SCROLL_PERCEPTION", default="0") == "1"
+SCROLL_MAX_DIRTY = float(os.environ.get("SCROLL_MAX_DIRTY", default="0.6"))
+# 应用索引：按设备缓存已安装应用的包名和启动 Activity，Open_App 直接通过 am start 启动应用；
+# 找不到时退回到在屏幕上查找应用名称
+APP_INDEX = os.environ.get("APP_INDEX", default="1") == "1"
+APP_INDEX_DIR = os.environ.get("APP_INDEX_DIR", default="cache/app_index")
+# 额外的应用别名 {"显示名称": ["包名", ...]}
+APP_ALIASES = {}
+
+## 感知模型运行的设备；没有 GPU 时使用 CPU 后端（线程数调优，可选动态 int8 量化）
+PERCEPTION_DEVICE = os.environ.get("PERCEPTION_DEVICE", default="cuda" if torch.cuda.is_available() else "cpu")
+# 动态 int8 量化默认关闭：量化后的 OCR 识别和图标检测结果没有与 fp32 对比验证过，开启前需自行确认精度
+CPU_INT8 = os.environ.get("CPU_INT8", default="0") == "1"
+PERCEPTION_NUM_THREADS = os.environ.get("PERCEPTION_NUM_THREADS", default="auto") # "auto" 或线程数
+PERCEPTION_NUM_THREADS = PERCEPTION_NUM_THREADS if PERCEPTION_NUM_THREADS == "auto" else int(PERCEPTION_NUM_THREADS)
+# 线程数测速结果按主机（和模型、量化配置）缓存在该文件中，之后加载模型时不再测速；设为空字符串则每次加载都测速
+CPU_THREADS_CACHE_PATH = os.environ.get("CPU_THREADS_CACHE_PATH", default="cache/cpu_threads.json") or None
+
+## 在缩小的截图上运行文本检测和图标检测（例如 0.5）；坐标会映射回设备像素。1 表示使用原始分辨率
+PERCEPTION_SCALE = float(os.environ.get("PERCEPTION_SCALE", default="1.0"))
+FULL_RES_RECOGNITION = os.environ.get("FULL_RES_RECOGNITION", default="1") == "1" # 文本识别仍在原始分辨率的裁剪上进行
 
 ###################################################################################################
 ### 感知相关函数 ###
 
-def get_all_files_in_folder(folder_path):
-    file_list = []
-    for file_name in os.listdir(folder_path):
-        file_list.append(file_name)
-    return file_list
-
-
-def draw_coordinates_on_image(image_path, coordinates):
-    image = Image.open(image_path)
+def draw_coordinates_on_image(image_path, coordinates, output_image_path='./screenshot/output_image.png'):
+    # image_path 也可以是 Frame：在已解码图像的副本上绘制，不重新读取截图
+    image = image_path.image.copy() if isinstance(image_path, Frame) else Image.open(image_path)
     draw = ImageDraw.Draw(image)
     point_size = 10
     for coord in coordinates:
         draw.ellipse((coord[0] - point_size, coord[1] - point_size, coord[0] + point_size, coord[1] + point_size), fill='red')
-    output_image_path = './screenshot/output_image.png'
     image.save(output_image_path)
     return output_image_path
 
 
-def crop(image, box, i, temp_file=TEMP_DIR):
-    image = Image.open(image)
+def crop(image, box):
+    """从已解码的截图中裁剪出 box 区域；区域过小时返回 None。"""
     x1, y1, x2, y2 = int(box[0]), int(box[1]), int(box[2]), int(box[3])
     if x1 >= x2-10 or y1 >= y2-10:
-        return
-    cropped_image = image.crop((x1, y1, x2, y2))
-    save_path = os.path.join(temp_file, f"{i}.jpg")
-    cropped_image.save(save_path)
+        return None
+    return image.crop((x1, y1, x2, y2))
+
+
+def encode_icon(image):
+    """把内存中的图标编码为 JPEG base64 data URI，供描述接口直接使用。"""
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG")
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("utf-8")
 
 
 def generate_local(tokenizer, model, image_file, query):
@@ -141,9 +220,15 @@ def generate_local(tokenizer, model, image_file, query):
     return response
 
 
+ICON_CAPTION_FALLBACK = "这是一个图标。"  # 描述接口调用失败时使用，不写入缓存
+
+
 def process_image(image, query, caption_model=CAPTION_MODEL):
     dashscope.api_key = QWEN_API_KEY
-    image = "file://" + image
+    if isinstance(image, str):
+        image = "file://" + image
+    else:
+        image = encode_icon(image)
     messages = [{
         'role': 'user',
         'content': [
@@ -155,12 +240,16 @@ def process_image(image, query, caption_model=CAPTION_MODEL):
             },
         ]
     }]
-    response = MultiModalConversation.call(model=caption_model, messages=messages)
-    
     try:
-        response = response['output']['choices'][0]['message']['content'][0]["text"]
-    except:
-        response = "这是一个图标。"
+        response = call_with_retry(
+            f"dashscope/{caption_model}",
+            lambda: MultiModalConversation.call(model=caption_model, messages=messages),
+            lambda response: response['output']['choices'][0]['message']['content'][0]["text"],
+            policy=CAPTION_POLICY,
+        )
+    except RetryError as e:
+        print(f"WARNING: 图标描述失败，使用占位描述: {e}")
+        response = ICON_CAPTION_FALLBACK
     
     return response
 
@@ -178,70 +267,6 @@ def generate_api(images, query, caption_model=CAPTION_MODEL):
     return icon_map
 
 
-def merge_text_blocks(
-    text_list,
-    coordinates_list,
-    x_distance_threshold=45,
-    y_distance_min=-20,
-    y_distance_max=30,
-    height_difference_threshold=20,
-):
-    merged_text_blocks = []
-    merged_coordinates = []
-
-    # Sort the text blocks based on y and x coordinates
-    sorted_indices = sorted(
-        range(len(coordinates_list)),
-        key=lambda k: (coordinates_list[k][1], coordinates_list[k][0]),
-    )
-    sorted_text_list = [text_list[i] for i in sorted_indices]
-    sorted_coordinates_list = [coordinates_list[i] for i in sorted_indices]
-
-    num_blocks = len(sorted_text_list)
-    merge = [False] * num_blocks
-
-    for i in range(num_blocks):
-        if merge[i]:
-            continue
-
-        anchor = i
-        group_text = [sorted_text_list[anchor]]
-        group_coordinates = [sorted_coordinates_list[anchor]]
-
-        for j in range(i + 1, num_blocks):
-            if merge[j]:
-                continue
-
-            # Calculate differences and thresholds
-            x_diff_left = abs(sorted_coordinates_list[anchor][0] - sorted_coordinates_list[j][0])
-            x_diff_right = abs(sorted_coordinates_list[anchor][2] - sorted_coordinates_list[j][2])
-
-            y_diff = sorted_coordinates_list[j][1] - sorted_coordinates_list[anchor][3]
-            height_anchor = sorted_coordinates_list[anchor][3] - sorted_coordinates_list[anchor][1]
-            height_j = sorted_coordinates_list[j][3] - sorted_coordinates_list[j][1]
-            height_diff = abs(height_anchor - height_j)
-
-            if (
-                (x_diff_left + x_diff_right) / 2 < x_distance_threshold
-                and y_distance_min <= y_diff < y_distance_max
-                and height_diff < height_difference_threshold
-            ):
-                group_text.append(sorted_text_list[j])
-                group_coordinates.append(sorted_coordinates_list[j])
-                merge[anchor] = True
-                anchor = j
-                merge[anchor] = True
-
-        merged_text = "\n".join(group_text)
-        min_x1 = min(group_coordinates, key=lambda x: x[0])[0]
-        min_y1 = min(group_coordinates, key=lambda x: x[1])[1]
-        max_x2 = max(group_coordinates, key=lambda x: x[2])[2]
-        max_y2 = max(group_coordinates, key=lambda x: x[3])[3]
-
-        merged_text_blocks.append(merged_text)
-        merged_coordinates.append([min_x1, min_y1, max_x2, max_y2])
-    return merged_text_blocks, merged_coordinates
-
 ###################################################################################################
 
 def load_perception_models(
@@ -252,6 +277,10 @@ def load_perception_models(
     groundingdino_revision="v1.0.0",
     ocr_detection_model="iic/cv_resnet18_ocr-detection-db-line-level_damo",
     ocr_recognition_model="iic/cv_convnextTiny_ocr-recognition-document_damo",
+    cpu_int8=False, # device 为 cpu 时，对 OCR 识别模型和 GroundingDINO 的 Linear 层做动态 int8 量化
+    num_threads="auto", # device 为 cpu 时的推理线程数："auto" 在样例截图上测速选择，None 使用全部可用核
+    threads_cache_path=CPU_THREADS_CACHE_PATH, # "auto" 时测速结果的缓存文件
+    tuning_screenshot=None, # "auto" 测速用的截图：Frame，或返回 Frame 的函数（只在没有缓存结果时调用）；None 时使用合成的界面
     ):
 
     ### Load caption model ###
@@ -279,91 +308,277 @@ def load_perception_models(
 
     ### Load ocr and icon detection model ###
     groundingdino_dir = snapshot_download(groundingdino_model, revision=groundingdino_revision)
-    groundingdino_model = pipeline('grounding-dino-task', model=groundingdino_dir)
-    ocr_detection = pipeline(Tasks.ocr_detection, model=ocr_detection_model) # dbnet (no tensorflow)
-    ocr_recognition = pipeline(Tasks.ocr_recognition, model=ocr_recognition_model)
+    groundingdino_model = pipeline('grounding-dino-task', model=groundingdino_dir, device=device)
+    ocr_detection = pipeline(Tasks.ocr_detection, model=ocr_detection_model, device=device) # dbnet (no tensorflow)
+    ocr_recognition = pipeline(Tasks.ocr_recognition, model=ocr_recognition_model, device=device)
+
+    if device == "cpu":
+        if cpu_int8:
+            num_quantized = quantize_pipeline(ocr_recognition) + quantize_pipeline(groundingdino_model)
+            print(f"INFO: 动态 int8 量化了 {num_quantized} 个 Linear 层")
+        if num_threads == "auto":
+            # 在真实截图上测速，选择完整 OCR（检测 + 识别）和图标检测最快的线程数；空白画面上检测不到文字，
+            # 识别模型根本不会运行，测出的线程数没有代表性。同一主机上的结果会被缓存
+            samples = []
+
+            def run():
+                if not samples:
+                    samples.append(tuning_sample(tuning_screenshot))
+                ocr(samples[0], ocr_detection, ocr_recognition)
+                det(samples[0], "icon", groundingdino_model)
+
+            key = tuning_key(groundingdino_dir, ocr_detection_model, ocr_recognition_model, cpu_int8, "screenshot")
+            num_threads, timings = autotune_threads(run, cache_path=threads_cache_path, cache_key=key)
+            print("INFO: CPU 线程数测速:", {n: f"{t:.2f}s" for n, t in timings.items()}, f"(缓存: {threads_cache_path})" if threads_cache_path else "")
+        else:
+            num_threads = num_threads or available_cores()
+            set_threads(num_threads)
+        print("INFO: CPU 推理线程数:", num_threads)
 
     print("INFO: Loaded perception models:")
     print("\t- Caption model method:", caption_call_method, "| caption vlm model:", caption_model)
     print("\t- Grounding DINO model:", groundingdino_model)
     print("\t- OCR detection model:", ocr_detection_model)
     print("\t- OCR recognition model:", ocr_recognition_model)
+    print("\t- Device:", device)
     return ocr_detection, ocr_recognition, groundingdino_model, vlm_model, vlm_tokenizer
 
 
+def tuning_sample(screenshot):
+    """线程数测速用的截图：优先使用设备截图，截图失败或没有提供时使用合成的带文字和图标的界面。"""
+    if callable(screenshot):
+        try:
+            screenshot = screenshot()
+        except RuntimeError as e:
+            print(f"WARNING: 测速截图失败，改用合成的界面: {e}")
+            screenshot = None
+    if screenshot is None:
+        screenshot = Frame(array=synthetic_screen())
+    return screenshot
+
+
 DEFAULT_PERCEPTION_ARGS = {
-    "device": "cuda",
+    "device": PERCEPTION_DEVICE,
     "caption_call_method": CAPTION_CALL_METHOD,
     "caption_model": CAPTION_MODEL,
     "groundingdino_model": "AI-ModelScope/GroundingDINO",
     "groundingdino_revision": "v1.0.0",
     "ocr_detection_model": "iic/cv_resnet18_ocr-detection-db-line-level_damo",
     "ocr_recognition_model": "iic/cv_convnextTiny_ocr-recognition-document_damo",
+    "cpu_int8": CPU_INT8,
+    "num_threads": PERCEPTION_NUM_THREADS,
 }
 
 class Perceptor:
-    def __init__(self, adb_path, perception_args = DEFAULT_PERCEPTION_ARGS):
+    def __init__(self, adb_path, perception_args = DEFAULT_PERCEPTION_ARGS, adb_backend=ADB_BACKEND, raw_capture=SCREENCAP_RAW):
+        self.adb_path = connect(adb_path, backend=adb_backend, num_sessions=ADB_NUM_SESSIONS)
+        self.raw_capture = raw_capture
+        perception_args = {"tuning_screenshot": lambda: get_screenshot(self.adb_path, raw=raw_capture), **perception_args}
         self.ocr_detection, self.ocr_recognition, self.groundingdino_model, \
             self.vlm_model, self.vlm_tokenizer = load_perception_models(**perception_args)
-        self.adb_path = adb_path
-
-    def get_perception_infos(self, screenshot_file, temp_file=TEMP_DIR):
-        get_screenshot(self.adb_path)
-        
-        width, height = Image.open(screenshot_file).size
-        
-        text, coordinates = ocr(screenshot_file, self.ocr_detection, self.ocr_recognition)
-        text, coordinates = merge_text_blocks(text, coordinates)
+        self.last_frame = None
+        # 多台设备共用同一份模型时，串行化各模型的推理；不同模型之间可以并发
+        self.ocr_lock = threading.Lock()
+        self.det_lock = threading.Lock()
+        self.caption_lock = threading.Lock()
+        self.perception_cache = PerceptionCache(PERCEPTION_CACHE_SIZE, PERCEPTION_CACHE_TOLERANCE, PERCEPTION_CACHE_PATH) if PERCEPTION_CACHE else None
+        self.caption_cache = CaptionCache(CAPTION_CACHE_PATH, CAPTION_CACHE_SIZE) if CAPTION_CACHE else None
+        self.last_perception_stats = {}
+
+    def for_device(self, adb_path, adb_backend=ADB_BACKEND):
+        """返回一个绑定到另一台设备的感知器，与当前感知器共用已加载的模型。"""
+        perceptor = copy.copy(self)
+        perceptor.adb_path = connect(adb_path, backend=adb_backend, num_sessions=ADB_NUM_SESSIONS)
+        perceptor.last_frame = None
+        perceptor.last_perception_stats = {}
+        return perceptor
+
+    def caption_icons(self, icons, prompt, width, height, temp_file=TEMP_DIR):
+        """
+        为裁剪出的图标（内存中的 PIL 图像）生成描述，返回 {序号(从 1 开始): 描述}。
+        同一屏幕中相同的图标只描述一次，命中描述缓存的图标不再调用描述模型。
+        """
+        icon_map = {}
+        keys = []
+        for i, icon in enumerate(icons):
+            icon_width, icon_height = icon.size
+            if CAPTION_CALL_METHOD == "local" and (icon_height > 0.8 * height or icon_width * icon_height > 0.2 * width * height):
+                icon_map[i+1] = "None"
+                keys.append(None)
+            else:
+                keys.append(caption_key(icon, CAPTION_MODEL, prompt))
+
+        unique_images = {}
+        for key, icon in zip(keys, icons):
+            if key is not None and key not in unique_images:
+                unique_images[key] = icon
+        captions = self.caption_cache.get_many(unique_images) if self.caption_cache is not None else {}
+        misses = [key for key in unique_images if key not in captions]
+
+        new_captions = {}
+        if CAPTION_CALL_METHOD == "local":
+            # 本地 Qwen-VL 的 tokenizer 只接受图片路径，这里仍需把待描述的图标写入临时目录
+            os.makedirs(temp_file, exist_ok=True)
+            for j, key in enumerate(misses):
+                image_path = os.path.join(temp_file, f"caption_{j}.jpg")
+                unique_images[key].save(image_path)
+                with self.caption_lock:
+                    new_captions[key] = generate_local(self.vlm_tokenizer, self.vlm_model, image_path, prompt)
+        elif misses:
+            responses = generate_api([unique_images[key] for key in misses], prompt, caption_model=CAPTION_MODEL)
+            new_captions = {key: responses[j+1] for j, key in enumerate(misses)}
+        if self.caption_cache is not None:
+            self.caption_cache.put_many({key: des for key, des in new_captions.items() if des != ICON_CAPTION_FALLBACK})
+        captions.update(new_captions)
+
+        for i, key in enumerate(keys):
+            if key is not None:
+                icon_map[i+1] = captions[key]
+
+        num_captioned = len(keys) - keys.count(None)
+        self.last_perception_stats["icons"] = len(icons)
+        self.last_perception_stats["caption_calls"] = len(misses)
+        self.last_perception_stats["caption_calls_saved"] = num_captioned - len(misses)
+        print(f"\t 图标描述: {len(icons)} 个图标, 调用描述模型 {len(misses)} 次, 节省 {num_captioned - len(misses)} 次")
+        return icon_map
+
+    def text_stage(self, frame, screenshot_file, stage_durations, regions=None):
+        """OCR + 文本块合并，返回文本的感知信息（坐标为边框）。regions 不为 None 时只识别这些区域。"""
+        start_time = time.time()
+        text, coordinates = [], []
+        for sub_frame, (dx, dy) in region_frames(frame, regions):
+            with self.ocr_lock:
+                sub_text, sub_coordinates = ocr(sub_frame, self.ocr_detection, self.ocr_recognition,
+                                                scale=PERCEPTION_SCALE, full_res_recognition=FULL_RES_RECOGNITION)
+            sub_text, sub_coordinates = merge_text_blocks(sub_text, sub_coordinates)
+            text += sub_text
+            coordinates += [[c[0]+dx, c[1]+dy, c[2]+dx, c[3]+dy] for c in sub_coordinates]
+        stage_durations["ocr"] = time.time() - start_time
         
-        center_list = [[(coordinate[0]+coordinate[2])/2, (coordinate[1]+coordinate[3])/2] for coordinate in coordinates]
-        draw_coordinates_on_image(screenshot_file, center_list)
+        if regions is None and screenshot_file is not None:
+            center_list = [[(coordinate[0]+coordinate[2])/2, (coordinate[1]+coordinate[3])/2] for coordinate in coordinates]
+            draw_coordinates_on_image(frame, center_list, output_image_path=os.path.join(os.path.dirname(screenshot_file), "output_image.png"))
         
-        perception_infos = []
-        for i in range(len(coordinates)):
-            perception_info = {"text": "text: " + text[i], "coordinates": coordinates[i]}
-            perception_infos.append(perception_info)
-            
-        coordinates = det(screenshot_file, "icon", self.groundingdino_model)
+        return [{"text": "text: " + text[i], "coordinates": coordinates[i]} for i in range(len(coordinates))]
+
+    def icon_stage(self, frame, width, height, temp_file, stage_durations, regions=None):
+        """图标检测 + 裁剪 + 图标描述，返回图标的感知信息（坐标为边框）。regions 不为 None 时只检测这些区域。"""
+        start_time = time.time()
+        coordinates = []
+        for sub_frame, (dx, dy) in region_frames(frame, regions):
+            with self.det_lock:
+                sub_coordinates = det(sub_frame, "icon", self.groundingdino_model, screen_size=(width, height), scale=PERCEPTION_SCALE)
+            coordinates += [[c[0]+dx, c[1]+dy, c[2]+dx, c[3]+dy] for c in sub_coordinates]
+        stage_durations["det"] = time.time() - start_time
         
-        for i in range(len(coordinates)):
-            perception_info = {"text": "icon", "coordinates": coordinates[i]}
-            perception_infos.append(perception_info)
-            
-        image_box = []
-        image_id = []
-        for i in range(len(perception_infos)):
-            if perception_infos[i]['text'] == 'icon':
-                image_box.append(perception_infos[i]['coordinates'])
-                image_id.append(i)
-
-        for i in range(len(image_box)):
-            crop(screenshot_file, image_box[i], image_id[i], temp_file=temp_file)
-
-        images = get_all_files_in_folder(temp_file)
-        if len(images) > 0:
-            images = sorted(images, key=lambda x: int(x.split('/')[-1].split('.')[0]))
-            image_id = [int(image.split('/')[-1].split('.')[0]) for image in images]
-            icon_map = {}
+        perception_infos = [{"text": "icon", "coordinates": coordinates[i]} for i in range(len(coordinates))]
+
+        # 所有图标都从同一张已解码的截图中裁剪，保存在内存中
+        start_time = time.time()
+        icons = []
+        for i, perception_info in enumerate(perception_infos):
+            icon = crop(frame.image, perception_info['coordinates'])
+            if icon is not None:
+                icons.append((i, icon))
+                if SAVE_ICON_CROPS:
+                    os.makedirs(temp_file, exist_ok=True)
+                    icon.save(os.path.join(temp_file, f"icon_{i}.jpg"))
+
+        if len(icons) > 0:
+            image_id = [i for i, _ in icons]
             prompt = '这张图片是手机屏幕上的一个图标。请用一句话简要描述这个图标的形状和颜色。'
-            if CAPTION_CALL_METHOD == "local":
-                for i in range(len(images)):
-                    image_path = os.path.join(temp_file, images[i])
-                    icon_width, icon_height = Image.open(image_path).size
-                    if icon_height > 0.8 * height or icon_width * icon_height > 0.2 * width * height:
-                        des = "None"
-                    else:
-                        des = generate_local(self.vlm_tokenizer, self.vlm_model, image_path, prompt)
-                    icon_map[i+1] = des
-            else:
-                for i in range(len(images)):
-                    images[i] = os.path.join(temp_file, images[i])
-                icon_map = generate_api(images, prompt, caption_model=CAPTION_MODEL)
+            icon_map = self.caption_icons([icon for _, icon in icons], prompt, width, height, temp_file=temp_file)
             for i, j in zip(image_id, range(1, len(image_id)+1)):
                 if icon_map.get(j):
                     perception_infos[i]['text'] = "icon: " + icon_map[j]
+        stage_durations["caption"] = time.time() - start_time
+        return perception_infos
+
+    def incremental_regions(self, prev_frame, frame, previous_infos, scrolled=False):
+        """
+        返回 (需要重新感知的区域, 可沿用的感知信息)；没有上一帧、上一步的感知信息缺少边框或变化区域过大时
+        返回 (None, None)，即做完整感知。scrolled 为 True（上一个操作是 Swipe）时先尝试按滚动偏移平移上一步的元素。
+        """
+        if not (INCREMENTAL_PERCEPTION or SCROLL_PERCEPTION) or prev_frame is None or previous_infos is None or prev_frame.size != frame.size:
+            return None, None
+        if any("box" not in info for info in previous_infos):
+            return None, None
+        start_time = time.time()
+        regions, max_dirty = None, INCREMENTAL_MAX_DIRTY
+        if scrolled and SCROLL_PERCEPTION:
+            scroll = scroll_regions(prev_frame, frame, previous_infos)
+            if scroll is not None:
+                offset, regions, previous_infos = scroll
+                max_dirty = SCROLL_MAX_DIRTY
+                self.last_perception_stats["scroll_offset"] = offset
+        if regions is None:
+            if not INCREMENTAL_PERCEPTION:
+                return None, None
+            regions = expand_regions(dirty_regions(prev_frame, frame), [info["box"] for info in previous_infos])
+        fraction = region_fraction(regions, frame.size)
+        self.last_perception_stats["stage_durations"]["diff"] = time.time() - start_time
+        self.last_perception_stats["dirty_regions"] = regions
+        self.last_perception_stats["dirty_fraction"] = fraction
+        if fraction > max_dirty:
+            print(f"\t 变化区域占屏幕 {fraction:.0%}，做完整感知")
+            return None, None
+        if "scroll_offset" in self.last_perception_stats:
+            print(f"\t 滚动 {self.last_perception_stats['scroll_offset']} 像素，重新感知 {len(regions)} 个区域，占屏幕 {fraction:.0%}")
+        else:
+            print(f"\t 增量感知: {len(regions)} 个变化区域，占屏幕 {fraction:.0%}")
+        return regions, previous_infos
+
+    def get_perception_infos(self, screenshot_file=None, temp_file=TEMP_DIR, previous_infos=None, scrolled=False):
+        """
+        截图并返回 (perception_infos, width, height)。只有提供 screenshot_file 时才把截图和
+        标注了文本位置的 output_image.png（同一目录）写入文件。
+
+        previous_infos 为上一次调用（即 self.last_frame 那一帧）返回的感知信息；开启增量感知时，
+        只重新感知发生变化的区域，其余元素从 previous_infos 中沿用。scrolled 表示上一个操作是 Swipe。
+        """
+        start_time = time.time()
+        frame = get_screenshot(self.adb_path, save_path=screenshot_file, raw=self.raw_capture)
+        prev_frame = self.last_frame
+        self.last_frame = frame
+        
+        width, height = frame.size
+        
+        self.last_perception_stats = {}
+        stage_durations = {"screenshot": time.time() - start_time}
+        self.last_perception_stats["stage_durations"] = stage_durations
+        if self.perception_cache is not None:
+            cache_key, perception_infos = self.perception_cache.get(frame)
+            self.last_perception_stats["perception_cache_hit"] = perception_infos is not None
+            self.last_perception_stats["perception_cache"] = self.perception_cache.stats()
+            if perception_infos is not None:
+                print("\t 感知缓存命中，跳过 OCR、图标检测和图标描述")
+                return perception_infos, width, height
+        
+        regions, previous_infos = self.incremental_regions(prev_frame, frame, previous_infos, scrolled=scrolled)
+        self.last_perception_stats["incremental"] = regions is not None
+
+        # OCR 与图标检测互不依赖，在同一帧上并发执行；图标检测完成后立即开始图标描述，不等待 OCR
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            text_future = executor.submit(self.text_stage, frame, screenshot_file, stage_durations, regions)
+            icon_future = executor.submit(self.icon_stage, frame, width, height, temp_file, stage_durations, regions)
+            # 顺序与之前一致：先是合并后的文本块，然后按检测顺序排列图标
+            perception_infos = text_future.result() + icon_future.result()
 
         for i in range(len(perception_infos)):
+            perception_infos[i]['box'] = [int(v) for v in perception_infos[i]['coordinates']]
             perception_infos[i]['coordinates'] = [int((perception_infos[i]['coordinates'][0]+perception_infos[i]['coordinates'][2])/2), int((perception_infos[i]['coordinates'][1]+perception_infos[i]['coordinates'][3])/2)]
+        
+        if regions is not None:
+            carried = carry_over(previous_infos, regions)
+            self.last_perception_stats["elements_carried"] = len(carried)
+            self.last_perception_stats["elements_perceived"] = len(perception_infos)
+            perception_infos = merge_perception(carried, perception_infos)
+            if screenshot_file is not None:
+                center_list = [info['coordinates'] for info in perception_infos if info['text'].startswith("text: ")]
+                draw_coordinates_on_image(frame, center_list, output_image_path=os.path.join(os.path.dirname(screenshot_file), "output_image.png"))
+        
+        if self.perception_cache is not None:
+            self.perception_cache.put(cache_key, perception_infos)
             
         return perception_infos, width, height
 
@@ -372,7 +587,8 @@ class Perceptor:
 def finish(
         info_pool: InfoPool,
         persistent_tips_path=None,
-        persistent_shortcuts_path=None
+        persistent_shortcuts_path=None,
+        experience_lock=None
     ):
     
     print("计划:", info_pool.plan)
@@ -381,14 +597,23 @@ def finish(
         print(f"步骤 {i}:", p, "\n")
     print("重要笔记:", info_pool.important_notes)
     print("完成思考:", info_pool.finish_thought)
-    if persistent_tips_path:
-        print("更新持久化提示:", persistent_tips_path)
-        with open(persistent_tips_path, "w") as f:
-            f.write(info_pool.tips)
-    if persistent_shortcuts_path:
-        print("更新持久化快捷方式:", persistent_shortcuts_path)
-        with open(persistent_shortcuts_path, "w") as f:
-            json.dump(info_pool.shortcuts, f, indent=4)
+    with (experience_lock or contextlib.nullcontext()):
+        if persistent_tips_path:
+            print("更新持久化提示:", persistent_tips_path)
+            tips = info_pool.tips
+            if experience_lock is not None and os.path.exists(persistent_tips_path):
+                # 多台设备共享持久化经验时，在当前文件的基础上只追加本任务新增的提示，不覆盖其他设备写入的内容
+                tips = merge_tips(open(persistent_tips_path, "r").read(), info_pool.tips)
+            with open(persistent_tips_path, "w") as f:
+                f.write(tips)
+        if persistent_shortcuts_path:
+            print("更新持久化快捷方式:", persistent_shortcuts_path)
+            shortcuts = info_pool.shortcuts
+            if experience_lock is not None and os.path.exists(persistent_shortcuts_path):
+                # 多台设备共享持久化经验时，保留其他设备在本任务执行期间新增的快捷方式
+                shortcuts = {**json.load(open(persistent_shortcuts_path, "r")), **info_pool.shortcuts}
+            with open(persistent_shortcuts_path, "w") as f:
+                json.dump(shortcuts, f, indent=4)
     # exit(0)
 
 import copy
@@ -397,23 +622,22 @@ def get_reasoning_model_api_response(chat, model_type=BACKBONE_TYPE, model=None,
 
     # chat messages in openai format
     model = REASONING_MODEL if model is None else model
-    if model_type == "OpenAI":
-        return inference_chat(chat, model, OPENAI_API_URL, OPENAI_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    elif model_type == "Gemini":
-        return inference_chat(chat, model, GEMINI_API_URL, GEMINI_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    elif model_type == "Claude":
-        return inference_chat(chat, model, CLAUDE_API_URL, CLAUDE_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    elif model_type == "Qwen":
-        return inference_chat(chat, model, QWEN_REASONING_API_URL, QWEN_REASONING_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    elif model_type == "GLM":
-        return inference_chat(chat, model, GLM_API_URL, GLM_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    elif model_type == "Doubao":
-        return inference_chat(chat, model, Doubao_API_URL, Doubao_API_KEY, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
-    else:
+    if model_type not in REASONING_API_ENDPOINTS:
         raise ValueError(f"Unknown model type: {model_type}")
+    api_url, api_key = REASONING_API_ENDPOINTS[model_type]
+    return inference_chat(chat, model, api_url, api_key, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
     
 
 
+def get_reasoning_model_api_stream(chat, model_type=BACKBONE_TYPE, model=None, temperature=0.0):
+    # 流式调用；返回 ChatStream，失败时返回 None
+    model = REASONING_MODEL if model is None else model
+    if model_type not in REASONING_API_ENDPOINTS:
+        raise ValueError(f"Unknown model type: {model_type}")
+    api_url, api_key = REASONING_API_ENDPOINTS[model_type]
+    return inference_chat_stream(chat, model, api_url, api_key, usage_tracking_jsonl=USAGE_TRACKING_JSONL, temperature=temperature)
+
+
 def run_single_task(
     instruction,
     future_tasks=[],
@@ -434,6 +658,9 @@ def run_single_task(
     enable_experience_retriever = False,
     temperature=0.0,
     screenrecord=False,
+    adb_path=ADB_PATH,
+    work_dir=None, # 截图和临时文件目录；多台设备并发运行时每台设备使用各自的目录
+    experience_lock=None, # 多台设备共享持久化提示和快捷方式时使用的锁
 ):
 
     ### set up log dir ###
@@ -461,23 +688,28 @@ def run_single_task(
     if tips_path is not None and persistent_tips_path is not None and tips_path != persistent_tips_path:
         raise ValueError("You cannot specify different tips_path and persistent_tips_path.")
     
-    if shortcuts_path:
-        initial_shortcuts = json.load(open(shortcuts_path, "r")) # load agent collected shortcuts
-    elif persistent_shortcuts_path:
-        initial_shortcuts = json.load(open(persistent_shortcuts_path, "r"))
-    else:
-        initial_shortcuts = copy.deepcopy(INIT_SHORTCUTS)
-    print("信息: 初始快捷方式:", initial_shortcuts)
+    with (experience_lock or contextlib.nullcontext()):
+        if shortcuts_path:
+            initial_shortcuts = json.load(open(shortcuts_path, "r")) # load agent collected shortcuts
+        elif persistent_shortcuts_path:
+            initial_shortcuts = json.load(open(persistent_shortcuts_path, "r"))
+        else:
+            initial_shortcuts = copy.deepcopy(INIT_SHORTCUTS)
+        print("信息: 初始快捷方式:", initial_shortcuts)
 
 
-    if tips_path:
-        tips = open(tips_path, "r").read() # 加载 agent 更新的提示
-    elif persistent_tips_path:
-        tips = open(persistent_tips_path, "r").read()
-    else:
-        tips = copy.deepcopy(INIT_TIPS) # 用户提供的初始提示
+        if tips_path:
+            tips = open(tips_path, "r").read() # 加载 agent 更新的提示
+        elif persistent_tips_path:
+            tips = open(persistent_tips_path, "r").read()
+        else:
+            tips = copy.deepcopy(INIT_TIPS) # 用户提供的初始提示
     print("信息: 初始提示:", tips)
 
+    if HTTP_PREWARM:
+        # 与截图、感知并行完成 TCP/TLS 握手，第一次调用管理者时连接已就绪
+        prewarm([REASONING_API_ENDPOINTS[BACKBONE_TYPE][0]])
+
     steps = []
     task_start_time = time.time()
 
@@ -552,20 +784,21 @@ def run_single_task(
     )
 
     ### 临时目录 ###
-    if not os.path.exists(TEMP_DIR):
-        os.mkdir(TEMP_DIR)
-    else:
-        shutil.rmtree(TEMP_DIR)
-        os.mkdir(TEMP_DIR)
-    if not os.path.exists(SCREENSHOT_DIR):
-        os.mkdir(SCREENSHOT_DIR)
+    temp_dir = TEMP_DIR if work_dir is None else os.path.join(work_dir, TEMP_DIR)
+    screenshot_dir = SCREENSHOT_DIR if work_dir is None else os.path.join(work_dir, SCREENSHOT_DIR)
+    # 图标裁剪在内存中完成，临时目录只在调试（SAVE_ICON_CROPS）或本地描述模型时按需创建
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    if not os.path.exists(screenshot_dir):
+        os.makedirs(screenshot_dir)
 
     ### 初始化 Agents ###
     if perceptor is None:
         # 如果感知器未初始化，创建感知器
-        perceptor = Perceptor(ADB_PATH, perception_args=perception_args)
+        perceptor = Perceptor(adb_path, perception_args=perception_args)
     manager = Manager()
-    operator = Operator(adb_path=ADB_PATH)
+    operator = Operator(adb_path=perceptor.adb_path, adaptive_settle=ADAPTIVE_SETTLE, # 与感知器共用同一个 adb 后端
+                        app_index_dir=APP_INDEX_DIR if APP_INDEX else None, app_aliases=APP_ALIASES)
     notetaker = Notetaker()
     action_reflector = ActionReflector()
     exp_reflector_shortcuts = ExperienceReflectorShortCut()
@@ -680,15 +913,14 @@ def run_single_task(
         # start recording for step iter #
         if screenrecord:
             cur_output_recording_path = f"{screenrecord_dir}/step_{iter}.mp4"
-            recording_process = start_recording(ADB_PATH)
+            recording_process = start_recording(adb_path)
 
         if iter == 1: # first perception
-            screenshot_file = "./screenshot/screenshot.jpg"
+            screenshot_file = os.path.join(screenshot_dir, "screenshot.jpg") if SAVE_SCREENSHOTS else None
             print("\n### Perceptor ... ###\n")
             perception_start_time = time.time()
-            perception_infos, width, height = perceptor.get_perception_infos(screenshot_file, temp_file=TEMP_DIR)
-            shutil.rmtree(TEMP_DIR)
-            os.mkdir(TEMP_DIR)
+            perception_infos, width, height = perceptor.get_perception_infos(screenshot_file, temp_file=temp_dir)
+            screenshot_frame = perceptor.last_frame # 已解码的截图，之后的编码和日志都复用它
             
             keyboard = False
             keyboard_height_limit = 0.9 * height
@@ -704,7 +936,7 @@ def run_single_task(
 
             ## log ##
             save_screen_shot_path = f"{log_dir}/screenshots/{iter}.jpg"
-            Image.open(screenshot_file).save(save_screen_shot_path)
+            perceptor.last_frame.save(save_screen_shot_path)
 
             perception_end_time = time.time()
             steps.append({
@@ -712,7 +944,9 @@ def run_single_task(
                 "operation": "perception",
                 "screenshot": save_screen_shot_path,
                 "perception_infos": perception_infos,
+                "perception_stats": perceptor.last_perception_stats,
                 "duration": perception_end_time - perception_start_time,
+                "stage_durations": perceptor.last_perception_stats.get("stage_durations", {}),
             })
             print("Perception Infos:", perception_infos)
             with open(log_json_path, "w") as f:
@@ -742,7 +976,7 @@ def run_single_task(
         planning_start_time = time.time()
         prompt_planning = manager.get_prompt(info_pool)
         chat_planning = manager.init_chat()
-        chat_planning = add_response("user", prompt_planning, chat_planning, image=screenshot_file)
+        chat_planning = add_response("user", prompt_planning, chat_planning, image=screenshot_frame)
         output_planning = get_reasoning_model_api_response(chat_planning, temperature=temperature)
         parsed_result_planning = manager.parse_response(output_planning)
         
@@ -835,10 +1069,11 @@ def run_single_task(
             finish(
                 info_pool,
                 persistent_tips_path = persistent_tips_path,
-                persistent_shortcuts_path = persistent_shortcuts_path
+                persistent_shortcuts_path = persistent_shortcuts_path,
+                experience_lock = experience_lock
             )
             if screenrecord:
-                end_recording(ADB_PATH, output_recording_path=cur_output_recording_path)
+                end_recording(adb_path, output_recording_path=cur_output_recording_path)
             return
 
         ### Executor: Action Decision ###
@@ -846,24 +1081,45 @@ def run_single_task(
         action_decision_start_time = time.time()
         prompt_action = operator.get_prompt(info_pool)
         chat_action = operator.init_chat()
-        chat_action = add_response("user", prompt_action, chat_action, image=screenshot_file)
-        output_action = get_reasoning_model_api_response(chat_action, temperature=temperature)
-        parsed_result_action = operator.parse_response(output_action)
-        action_thought, action_object_str, action_description = parsed_result_action['thought'], parsed_result_action['action'], parsed_result_action['description']
+        chat_action = add_response("user", prompt_action, chat_action, image=screenshot_frame)
+        action_stream = get_reasoning_model_api_stream(chat_action, temperature=temperature) if STREAM_OPERATOR else None
+        parsed_result_action = None
+        if action_stream is not None:
+            # ### 操作 ### 部分完整后立即执行，### 描述 ### 部分在执行期间继续接收
+            parser = SectionParser(OPERATOR_SECTIONS)
+            if action_stream.wait_until(lambda text: operator.parse_partial_response(parser.update(text)) is not None):
+                parsed_result_action = operator.parse_partial_response(parser)
+                if STREAM_REMAINDER == "cancel":
+                    action_stream.cancel()
+            elif action_stream.error is None and action_stream.text.strip():
+                output_action = action_stream.text
+                parsed_result_action = operator.parse_response(output_action)
+                action_stream = None
+            else:
+                # 流式调用出错，或正常结束但没有返回任何文本：改用非流式调用
+                print("WARNING: 流式调用中断，改用非流式调用:", action_stream.error or "回复为空")
+                action_stream = None
+        if parsed_result_action is None:
+            output_action = get_reasoning_model_api_response(chat_action, temperature=temperature)
+            parsed_result_action = operator.parse_response(output_action)
+        action_thought, action_object_str = parsed_result_action['thought'], parsed_result_action['action']
+        action_description = parsed_result_action.get('description', "")
+        action_streamed = action_stream is not None
         action_decision_end_time = time.time()
 
         info_pool.last_action_thought = action_thought
         ## execute the action ##
         action_execution_start_time = time.time()
         action_object, num_atomic_actions_executed, shortcut_error_message = operator.execute(action_object_str, info_pool, 
-                        screenshot_file=screenshot_file, 
-                        ocr_detection=perceptor.ocr_detection,
-                        ocr_recognition=perceptor.ocr_recognition,
                         thought = action_thought,
                         screenshot_log_dir = os.path.join(log_dir, "screenshots"),
                         iter = str(iter)
                         )
         action_execution_end_time = time.time()
+        if action_stream is not None:
+            output_action = action_stream.result() or action_stream.text
+            if "### 描述 ###" in output_action:
+                action_description = operator.parse_response(output_action)['description']
         if action_object is None:
             task_end_time = time.time()
             steps.append({
@@ -878,11 +1134,12 @@ def run_single_task(
             finish(
                 info_pool, 
                 persistent_tips_path = persistent_tips_path,
-                persistent_shortcuts_path = persistent_shortcuts_path
+                persistent_shortcuts_path = persistent_shortcuts_path,
+                experience_lock = experience_lock
             ) # 
             print("WARNING!!: Abnormal finishing:", action_object_str)
             if screenrecord:
-                end_recording(ADB_PATH, output_recording_path=cur_output_recording_path)
+                end_recording(adb_path, output_recording_path=cur_output_recording_path)
             return
 
         info_pool.last_action = action_object
@@ -900,7 +1157,10 @@ def run_single_task(
             "action_thought": action_thought,
             "action_description": action_description,
             "duration": action_decision_end_time - action_decision_start_time,
+            "action_streamed": action_streamed,
             "execution_duration": action_execution_end_time - action_execution_start_time,
+            "execution_error": shortcut_error_message,
+            "settle_waits": operator.settle_log,
         })
         print("Action Thought:", action_thought)
         print("Action Description:", action_description)
@@ -914,15 +1174,12 @@ def run_single_task(
         ## perception on the next step ##
         perception_start_time = time.time()
         # last_perception_infos = copy.deepcopy(perception_infos)
-        last_screenshot_file = "./screenshot/last_screenshot.jpg"
         # last_keyboard = keyboard
-        if os.path.exists(last_screenshot_file):
-            os.remove(last_screenshot_file)
-        os.rename(screenshot_file, last_screenshot_file)
+        last_screenshot_frame = screenshot_frame # 动作反思比较操作前后的两帧内存中的截图
         
-        perception_infos, width, height = perceptor.get_perception_infos(screenshot_file, temp_file=TEMP_DIR)
-        shutil.rmtree(TEMP_DIR)
-        os.mkdir(TEMP_DIR)
+        perception_infos, width, height = perceptor.get_perception_infos(screenshot_file, temp_file=temp_dir, previous_infos=info_pool.perception_infos_pre,
+                                                                      scrolled=action_object['name'] == "Swipe")
+        screenshot_frame = perceptor.last_frame
         
         keyboard = False
         for perception_info in perception_infos:
@@ -937,14 +1194,16 @@ def run_single_task(
         assert width == info_pool.width and height == info_pool.height # assert the screen size not changed
 
         ## log ##
-        Image.open(screenshot_file).save(f"{log_dir}/screenshots/{iter+1}.jpg")
+        perceptor.last_frame.save(f"{log_dir}/screenshots/{iter+1}.jpg")
         perception_end_time = time.time()
         steps.append({
             "step": iter+1,
             "operation": "perception",
             "screenshot": f"{log_dir}/screenshots/{iter+1}.jpg",
             "perception_infos": perception_infos,
-            "duration": perception_end_time - perception_start_time
+            "perception_stats": perceptor.last_perception_stats,
+            "duration": perception_end_time - perception_start_time,
+            "stage_durations": perceptor.last_perception_stats.get("stage_durations", {})
         })
         print("Perception Infos:", perception_infos)
         with open(log_json_path, "w") as f:
@@ -957,7 +1216,7 @@ def run_single_task(
         action_reflection_start_time = time.time()
         prompt_action_reflect = action_reflector.get_prompt(info_pool)
         chat_action_reflect = action_reflector.init_chat()
-        chat_action_reflect = add_response_two_image("user", prompt_action_reflect, chat_action_reflect, [last_screenshot_file, screenshot_file])
+        chat_action_reflect = add_response_two_image("user", prompt_action_reflect, chat_action_reflect, [last_screenshot_frame, screenshot_frame])
         output_action_reflect = get_reasoning_model_api_response(chat_action_reflect, temperature=temperature)
         parsed_result_action_reflect = action_reflector.parse_response(output_action_reflect)
         outcome, error_description, progress_status = (
@@ -994,6 +1253,10 @@ def run_single_task(
             action_outcome = "C"
         else:
             raise ValueError("Invalid outcome:", outcome)
+
+        if action_outcome != "A" and shortcut_error_message is not None and action_object['name'] in ATOMIC_ACTION_SIGNITURES:
+            # e.g. Open_App could not find the app label on the screen and did nothing
+            error_description += f"; Error occured while executing the action: {shortcut_error_message}"
         
         # update action history
         info_pool.action_history.append(action_object)
@@ -1029,12 +1292,11 @@ def run_single_task(
             notetaking_start_time = time.time()
             prompt_note = notetaker.get_prompt(info_pool)
             chat_note = notetaker.init_chat()
-            chat_note = add_response("user", prompt_note, chat_note, image=screenshot_file) # new screenshot
+            chat_note = add_response("user", prompt_note, chat_note, image=screenshot_frame) # new screenshot
             output_note = get_reasoning_model_api_response(chat_note, temperature=temperature)
             parsed_result_note = notetaker.parse_response(output_note)
             important_notes = parsed_result_note['important_notes']
             info_pool.important_notes = important_notes
-            os.remove(last_screenshot_file)
             
             notetaking_end_time = time.time()
             steps.append({
@@ -1049,11 +1311,9 @@ def run_single_task(
             with open(log_json_path, "w") as f:
                 json.dump(steps, f, indent=4)
 
-        elif action_outcome in ["B", "C"]:
-            os.remove(last_screenshot_file)
-
         if screenrecord:
-            end_recording(ADB_PATH, output_recording_path=cur_output_recording_path)
+            end_recording(adb_path, output_recording_path=cur_output_recording_path)
         print("\n=========================================================")
-        print(f"sleeping for {SLEEP_BETWEEN_STEPS} before next iteration ...\n\n")
-        sleep(SLEEP_BETWEEN_STEPS)
\ No newline at end of file
+        if not ADAPTIVE_SETTLE:
+            print(f"sleeping for {SLEEP_BETWEEN_STEPS} before next iteration ...\n\n")
+            sleep(SLEEP_BETWEEN_STEPS)
\ No newline at end of file
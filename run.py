@@ -5,7 +5,33 @@ import torch
 import os
 import json
 import shutil
-import time
+import threading
+from MobileAgentE.scheduler import DeviceScheduler, RESET_HOOKS, device_adb_path, make_command_reset
+
+
+def init_persistent_experience(log_dir, args):
+    """初始化（或复用）log_dir 下的持久化提示和快捷方式文件。"""
+    os.makedirs(log_dir, exist_ok=True)
+    persistent_tips_path = os.path.join(log_dir, "persistent_tips.txt")
+    persistent_shortcuts_path = os.path.join(log_dir, "persistent_shortcuts.json")
+
+    if args.specified_tips_path is not None:
+        shutil.copy(args.specified_tips_path, persistent_tips_path)
+    elif os.path.exists(persistent_tips_path):
+        pass
+    else:
+        with open(persistent_tips_path, "w") as f:
+            init_knowledge = INIT_TIPS
+            f.write(init_knowledge)
+    
+    if args.specified_shortcuts_path is not None:
+        shutil.copy(args.specified_shortcuts_path, persistent_shortcuts_path)
+    elif os.path.exists(persistent_shortcuts_path):
+        pass
+    else:
+        with open(persistent_shortcuts_path, "w") as f:
+            json.dump(INIT_SHORTCUTS, f, indent=4)
+    return persistent_tips_path, persistent_shortcuts_path
 
 def main():
     import argparse
@@ -25,6 +51,11 @@ def main():
     parser.add_argument("--enable_experience_retriever", action="store_true", default=False)
     parser.add_argument("--temperature", type=float, default=0.0)
     parser.add_argument("--screenrecord", action="store_true", default=False)
+    parser.add_argument("--devices", type=str, default=None, help="comma separated device serials; tasks from --tasks_json are distributed across them")
+    parser.add_argument("--reset", type=str, default=None, choices=["interactive", "none", "home", "command"], help="how to reset a device between tasks; defaults to 'interactive' for a single device and 'home' otherwise")
+    parser.add_argument("--reset_command", type=str, default=None, help="shell command used by --reset command, e.g. '{adb} shell am force-stop com.android.chrome'")
+    parser.add_argument("--evolution_sharing", type=str, default="shared", choices=["shared", "partitioned"], help="whether devices share one persistent tips/shortcuts memory in the evolution setting")
+    parser.add_argument("--perceptor_per_device", action="store_true", default=False)
 
     args = parser.parse_args()
     torch.manual_seed(args.seed)
@@ -71,81 +102,89 @@ def main():
         else:
             tasks = task_json
 
-        perceptor = Perceptor(ADB_PATH, perception_args=default_perceptor_args)
+        serials = args.devices.split(",") if args.devices else [None]
+        if args.reset is None:
+            args.reset = "interactive" if len(serials) == 1 else "home"
+        if args.reset == "command":
+            if args.reset_command is None:
+                raise ValueError("--reset_command is required when --reset is 'command'.")
+            reset = make_command_reset(args.reset_command)
+        else:
+            reset = RESET_HOOKS[args.reset]
+
+        # 所有设备共用一份感知模型；--perceptor_per_device 时每台设备单独加载（适用于多 GPU）
+        perceptors = {}
+        for serial in serials:
+            device_adb = device_adb_path(ADB_PATH, serial)
+            if args.perceptor_per_device or not perceptors:
+                perceptors[serial] = Perceptor(device_adb, perception_args=default_perceptor_args)
+            else:
+                perceptors[serial] = next(iter(perceptors.values())).for_device(device_adb)
         
         run_log_dir = f"{args.log_root}/{args.run_name}"
         os.makedirs(run_log_dir, exist_ok=True)
         
+        experience_lock = None
         if args.setting == "individual":
             ## invidual setting ##
-            persistent_tips_path = None
-            persistent_shortcuts_path = None
+            persistent_paths = {serial: (None, None) for serial in serials}
 
         elif args.setting == "evolution":
             ## evolution setting: tasks share a persistent long-term memory with continue updating tips and shortcuts ##
-            persistent_tips_path = os.path.join(run_log_dir, "persistent_tips.txt")
-            persistent_shortcuts_path = os.path.join(run_log_dir, "persistent_shortcuts.json")
-
-            if args.specified_tips_path is not None:
-                shutil.copy(args.specified_tips_path, persistent_tips_path)
-            elif os.path.exists(persistent_tips_path):
-                pass
-            else:
-                with open(persistent_tips_path, "w") as f:
-                    init_knowledge = INIT_TIPS
-                    f.write(init_knowledge)
-            
-            if args.specified_shortcuts_path is not None:
-                shutil.copy(args.specified_shortcuts_path, persistent_shortcuts_path)
-            elif os.path.exists(persistent_shortcuts_path):
-                pass
+            if args.evolution_sharing == "shared" or len(serials) == 1:
+                # 所有设备共享同一份长期记忆，读写时加锁
+                shared_paths = init_persistent_experience(run_log_dir, args)
+                persistent_paths = {serial: shared_paths for serial in serials}
+                if len(serials) > 1:
+                    experience_lock = threading.Lock()
             else:
-                with open(persistent_shortcuts_path, "w") as f:
-                    json.dump(INIT_SHORTCUTS, f, indent=4)
+                # 每台设备各自维护一份长期记忆
+                persistent_paths = {serial: init_persistent_experience(os.path.join(run_log_dir, serial), args) for serial in serials}
         else:
             raise ValueError("Invalid setting:", args.setting)
-        
-        error_tasks = []
-        print(f"INFO: Running tasks from {args.tasks_json} using {args.setting} setting ...")
-        for i, task in enumerate(tasks):
+
+        def run_task(serial, i, task):
             ## if future tasks are visible, specify them in the args ##
             future_tasks = [t['instruction'] for t in tasks[i+1:]]
 
-            print("\n\n### Running on task:", task["instruction"])
+            prefix = f"[{serial}] " if serial is not None else ""
+            print(f"\n\n### {prefix}Running on task:", task["instruction"])
             print("\n\n")
             instruction = task["instruction"]
+            persistent_tips_path, persistent_shortcuts_path = persistent_paths[serial]
+            run_single_task(
+                instruction,
+                future_tasks=future_tasks,
+                log_root=args.log_root,
+                run_name=args.run_name if serial is None else f"{args.run_name}/{serial}",
+                task_id=get_task_id(i, task),
+                tips_path=args.specified_tips_path,
+                shortcuts_path=args.specified_shortcuts_path,
+                persistent_tips_path=persistent_tips_path,
+                persistent_shortcuts_path=persistent_shortcuts_path,
+                perceptor=perceptors[serial],
+                perception_args=default_perceptor_args,
+                max_itr=args.max_itr,
+                max_consecutive_failures=args.max_consecutive_failures,
+                max_repetitive_actions=args.max_repetitive_actions,
+                overwrite_log_dir=args.overwrite_task_log_dir,
+                enable_experience_retriever=args.enable_experience_retriever,
+                temperature=args.temperature,
+                screenrecord=args.screenrecord,
+                adb_path=device_adb_path(ADB_PATH, serial),
+                work_dir=None if serial is None else os.path.join(run_log_dir, serial, "work"),
+                experience_lock=experience_lock
+            )
+            print(f"\n\n{prefix}DONE:", task["instruction"])
+
+        def get_task_id(i, task):
             if "task_id" in task:
-                task_id = task["task_id"]
-            else:
-                task_id = args.tasks_json.split("/")[-1].split(".")[0] + f"_{args.setting}" + f"_{i}"
-            try:
-                run_single_task(
-                    instruction,
-                    future_tasks=future_tasks,
-                    log_root=args.log_root,
-                    run_name=args.run_name,
-                    task_id=task_id,
-                    tips_path=args.specified_tips_path,
-                    shortcuts_path=args.specified_shortcuts_path,
-                    persistent_tips_path=persistent_tips_path,
-                    persistent_shortcuts_path=persistent_shortcuts_path,
-                    perceptor=perceptor,
-                    perception_args=default_perceptor_args,
-                    max_itr=args.max_itr,
-                    max_consecutive_failures=args.max_consecutive_failures,
-                    max_repetitive_actions=args.max_repetitive_actions,
-                    overwrite_log_dir=args.overwrite_task_log_dir,
-                    enable_experience_retriever=args.enable_experience_retriever,
-                    temperature=args.temperature,
-                    screenrecord=args.screenrecord
-                )
-                print("\n\nDONE:", task["instruction"])
-                print("IMPORTANT: Please reset the device as needed before running the next task!")
-                input("Press Enter to continue to next task ...")
-            except Exception as e:
-                print(f"Failed when doing task: {instruction}")
-                print("ERROR:", e)
-                error_tasks.append(task_id)
+                return task["task_id"]
+            return args.tasks_json.split("/")[-1].split(".")[0] + f"_{args.setting}" + f"_{i}"
+
+        print(f"INFO: Running tasks from {args.tasks_json} using {args.setting} setting on {len(serials)} device(s) ...")
+        scheduler = DeviceScheduler(serials, run_task, reset=reset, adb_path=ADB_PATH)
+        error_tasks = [get_task_id(i, task) for i, task in scheduler.run(tasks)]
         
         error_task_output_path = f"{run_log_dir}/error_tasks.json"
         with open(error_task_output_path, "w") as f:
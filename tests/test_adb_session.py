@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+from MobileAgentE.adb_session import AdbSessionError, AdbSessionPool
+
+FAKE_ADB = f"\"{sys.executable}\" \"{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fake_adb.py')}\""
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_ADB_STATE", str(tmp_path))
+    monkeypatch.setenv("FAKE_ADB_LATENCY_MS", "0")
+    return tmp_path
+
+
+def logged(state):
+    path = state / "commands.log"
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def test_timeout_after_write_is_not_resent(state):
+    with AdbSessionPool(FAKE_ADB) as pool:
+        with pytest.raises(AdbSessionError) as e:
+            pool.run("input tap 1 2; sleep 5", timeout=0.5)
+        assert e.value.sent
+        # 只点击了一次；会话已关闭，下一条命令重新连接
+        assert len(logged(state)) == 1
+        assert pool.run("echo ok").stdout.strip() == "ok"
+
+
+def test_dead_session_reconnects_before_write(state):
+    with AdbSessionPool(FAKE_ADB) as pool:
+        pool.run("true")
+        session = pool._idle.get()
+        session.process.kill()
+        session.process.wait()
+        pool._idle.put(session)
+        assert pool.run("input tap 3 4").returncode == 0
+        assert len(logged(state)) == 1
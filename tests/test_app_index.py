@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from bench_app_launcher import EXPECTED, FAKE_ADB, read_log
+from MobileAgentE.app_index import AppIndex
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    state = tmp_path / "device"
+    state.mkdir()
+    monkeypatch.setenv("FAKE_ADB_STATE", str(state))
+    monkeypatch.setenv("FAKE_ADB_LATENCY_MS", "0")
+    return str(state)
+
+
+@pytest.fixture
+def index(state, tmp_path):
+    return AppIndex.load_or_build(FAKE_ADB, str(tmp_path / "cache"))
+
+
+def test_resolves_names_and_aliases(index):
+    for name, package in EXPECTED.items():
+        assert index.resolve(name) == package, name
+
+
+def test_cached_index_is_reused(index, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    assert os.listdir(cache_dir)
+    assert AppIndex.load_or_build(FAKE_ADB, cache_dir).labels == index.labels
+
+
+def test_launch_is_a_single_adb_command(index, state):
+    read_log(state)
+    assert index.launch(FAKE_ADB, "微信") == "com.tencent.mm"
+    assert len(read_log(state)) == 1
+
+
+def test_rebuilds_after_package_list_changes(index, state, tmp_path):
+    with open(os.path.join(state, "packages.txt"), "a") as f:
+        f.write("com.walmart.android/.MainActivity\n")
+    updated = AppIndex.load_or_build(FAKE_ADB, str(tmp_path / "cache"))
+    assert updated.fingerprint != index.fingerprint
+    assert updated.resolve("Walmart") == "com.walmart.android"
+
+
+def test_uses_display_labels_from_package_manager(index):
+    assert index.resolve("YouTube") == "com.google.android.youtube"
+    assert index.resolve("systemui") is None
+
+
+def test_near_misses_fall_back_to_screen(index, state):
+    read_log(state)
+    for name in ("Chrom", "mm", "Settngs", "youtube2"):
+        assert index.resolve(name) is None, name
+        assert index.launch(FAKE_ADB, name) is None, name
+    assert read_log(state) == []
@@ -0,0 +1,58 @@
+from MobileAgentE.label_index import LabelIndex, normalize_label
+
+
+def text_info(text, box):
+    x1, y1, x2, y2 = box
+    return {"text": "text: " + text, "coordinates": [(x1 + x2) // 2, (y1 + y2) // 2], "box": list(box)}
+
+
+INFOS = [
+    text_info("12:30", (20, 10, 120, 50)),
+    text_info("Google Maps", (40, 400, 240, 440)),
+    text_info("微信 (2)", (300, 400, 420, 440)),
+    text_info("Samsung\nNotes", (500, 400, 680, 480)),
+    {"text": "icon: a green icon", "coordinates": [360, 330], "box": [320, 290, 400, 370]},
+]
+
+
+def test_normalize_label():
+    assert normalize_label("Google  Maps") == normalize_label("google maps") == "googlemaps"
+    assert normalize_label("Ｃｈｒｏｍｅ") == "chrome"
+
+
+def test_exact_match_returns_the_label_box():
+    info, label, score, box = LabelIndex(INFOS).find("google maps")
+    assert (label, score, box) == ("Google Maps", 1.0, [40, 400, 240, 440])
+    assert info is INFOS[1]
+
+
+def test_exact_match_on_one_line_of_a_block_returns_that_line():
+    info, label, score, box = LabelIndex(INFOS).find("Notes")
+    assert (label, score) == ("Notes", 1.0)
+    assert info is INFOS[3]
+    assert box == [500, 440, 680, 480]
+
+
+def test_whole_block_match_returns_the_first_line():
+    _, label, score, box = LabelIndex(INFOS).find("Samsung Notes")
+    assert (label, score, box) == ("Samsung\nNotes", 1.0, [500, 400, 680, 440])
+
+
+def test_fuzzy_matches():
+    # 未读角标：名称后多了数字
+    _, label, score, _ = LabelIndex(INFOS).find("微信")
+    assert label == "微信 (2)" and score == 0.9
+    _, label, score, _ = LabelIndex(INFOS).find("Gogle Maps")
+    assert label == "Google Maps" and 0.8 <= score < 1
+
+
+def test_no_match():
+    index = LabelIndex(INFOS)
+    assert index.find("YouTube") is None
+    assert index.find("a green icon") is None  # 图标描述不参与匹配
+    assert index.find("  ") is None
+
+
+def test_infos_without_box():
+    info = {"text": "text: Chrome", "coordinates": [100, 200]}
+    assert LabelIndex([info]).find("Chrome") == (info, "Chrome", 1.0, None)
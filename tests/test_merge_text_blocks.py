@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from bench_merge_text_blocks import chat_screen, merge_text_blocks_legacy, random_blocks
+from MobileAgentE.text_localization import merge_text_blocks
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_quadratic_implementation_on_random_blocks(seed):
+    rng = random.Random(seed)
+    for case in range(300):
+        text, coordinates = random_blocks(rng, rng.randint(0, 80), float_coords=case % 3 == 0)
+        thresholds = {}
+        if case % 4 == 0:
+            thresholds = {
+                "x_distance_threshold": rng.uniform(5, 100),
+                "y_distance_min": rng.uniform(-60, 10),
+                "y_distance_max": rng.uniform(10, 80),
+                "height_difference_threshold": rng.uniform(1, 40),
+            }
+        assert merge_text_blocks(text, coordinates, **thresholds) == merge_text_blocks_legacy(text, coordinates, **thresholds), \
+            f"case {case}: thresholds={thresholds} coordinates={coordinates}"
+
+
+@pytest.mark.parametrize("n", [1, 50, 500])
+def test_matches_quadratic_implementation_on_chat_screens(n):
+    text, coordinates = chat_screen(n)
+    assert merge_text_blocks(text, coordinates) == merge_text_blocks_legacy(text, coordinates)
+
+
+def test_empty_input():
+    assert merge_text_blocks([], []) == ([], [])
@@ -0,0 +1,18 @@
+from bench_ocr import FakeDetection, SimulatedRecognition, ocr_per_line, synthetic_screen
+from MobileAgentE.text_localization import ocr
+
+
+def test_batched_ocr_sends_the_same_pixels_as_per_line_warp():
+    image, polygons = synthetic_screen(40)
+    recognition = SimulatedRecognition(call_overhead_ms=0, per_kpixel_us=0)
+    legacy = ocr_per_line(image, FakeDetection(polygons), recognition)
+    assert ocr(image, FakeDetection(polygons), recognition, batch_size=8) == legacy
+    assert ocr(image, FakeDetection(polygons), recognition, batch_size=1) == legacy
+
+
+def test_fast_crop_is_opt_in():
+    image, polygons = synthetic_screen(40)
+    recognition = SimulatedRecognition(call_overhead_ms=0, per_kpixel_us=0)
+    legacy = ocr_per_line(image, FakeDetection(polygons), recognition)
+    # 切片得到的像素与透视变换不同；只有显式开启时才使用
+    assert ocr(image, FakeDetection(polygons), recognition, fast_crop=True) != legacy
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+from MobileAgentE.frame import Frame
+from MobileAgentE.perception_cache import PerceptionCache, perceptual_hash
+
+
+def screen(line):
+    image = np.full((2340, 1080, 3), 245, dtype=np.uint8)
+    cv2.putText(image, "Cart", (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (30, 30, 30), 3)
+    cv2.rectangle(image, (40, 300), (1040, 700), (200, 220, 240), -1)
+    cv2.putText(image, line, (80, 520), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    return Frame(array=image)
+
+
+def test_identical_screen_hits():
+    cache = PerceptionCache()
+    lookup, infos = cache.get(screen("Quantity: 3"))
+    assert infos is None
+    cache.put(lookup, [{"text": "text: Quantity: 3", "coordinates": [0, 0]}])
+    _, infos = cache.get(screen("Quantity: 3"))
+    assert infos == [{"text": "text: Quantity: 3", "coordinates": [0, 0]}]
+
+
+def test_small_text_edits_miss_even_when_hash_collides():
+    collisions = 0
+    for before in range(10):
+        cache = PerceptionCache()
+        lookup, _ = cache.get(screen(f"Quantity: {before}"))
+        cache.put(lookup, [{"text": f"text: Quantity: {before}", "coordinates": [0, 0]}])
+        for after in range(10):
+            if after == before:
+                continue
+            frame = screen(f"Quantity: {after}")
+            collisions += perceptual_hash(frame).tobytes().hex() == lookup[0][0]
+            assert cache.get(frame)[1] is None
+    # 哈希确实会碰撞：命中与否由缩略图决定
+    assert collisions > 0
+
+
+def test_word_change_misses_with_tolerance():
+    cache = PerceptionCache(tolerance=4)
+    lookup, _ = cache.get(screen("Search: sushi"))
+    cache.put(lookup, [])
+    assert cache.get(screen("Search: pizza"))[1] is None
+
+
+def test_persisted_entries_keep_verification(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = PerceptionCache(path=path)
+    lookup, _ = cache.get(screen("Quantity: 3"))
+    cache.put(lookup, [{"text": "text: Quantity: 3", "coordinates": [0, 0]}])
+    reloaded = PerceptionCache(path=path)
+    assert reloaded.get(screen("Quantity: 3"))[1] is not None
+    assert reloaded.get(screen("Quantity: 4"))[1] is None
@@ -0,0 +1,115 @@
+import time
+from dataclasses import replace
+
+import pytest
+
+from MobileAgentE import retry
+
+
+class Response:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+POLICY = replace(retry.CHAT_POLICY, budget_min_retries=10 ** 6, breaker_reset=3600)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    retry.reset()
+    yield
+    retry.reset()
+
+
+def scripted(*statuses):
+    responses = [Response(status) for status in statuses]
+    sent = []
+
+    def send():
+        sent.append(1)
+        return responses.pop(0) if responses else Response(200, "ok")
+    return send, sent
+
+
+def call(send, policy=POLICY):
+    return retry.call_with_retry("test", send, lambda res: res.text, policy=policy, sleep=lambda s: None)
+
+
+def test_retries_within_one_call_do_not_open_the_breaker():
+    # 阈值低于 max_attempts：调用自身的重试不应熔断
+    send, sent = scripted(*[503] * (POLICY.max_attempts - 1))
+    assert POLICY.breaker_threshold < POLICY.max_attempts
+    assert call(send) == "ok"
+    assert len(sent) == POLICY.max_attempts
+    assert retry.stats()["test"]["breaker"] == "closed"
+
+
+def test_breaker_opens_after_threshold_failed_calls():
+    for i in range(POLICY.breaker_threshold):
+        send, sent = scripted(*[503] * 100)
+        with pytest.raises(retry.RetryError) as e:
+            call(send)
+        assert e.value.category == retry.SERVER
+        assert len(sent) == POLICY.max_attempts
+    send, sent = scripted()
+    with pytest.raises(retry.RetryError) as e:
+        call(send)
+    assert e.value.category == "circuit_open" and not sent
+
+
+def test_success_resets_failed_call_count():
+    for _ in range(POLICY.breaker_threshold - 1):
+        with pytest.raises(retry.RetryError):
+            call(scripted(*[503] * 100)[0])
+    assert call(scripted()[0]) == "ok"
+    with pytest.raises(retry.RetryError):
+        call(scripted(*[503] * 100)[0])
+    assert retry.stats()["test"]["breaker"] == "closed"
+
+
+def test_failed_half_open_probe_reopens():
+    policy = replace(POLICY, breaker_reset=0.05)
+    for _ in range(policy.breaker_threshold):
+        with pytest.raises(retry.RetryError):
+            call(scripted(*[503] * 100)[0], policy)
+    time.sleep(policy.breaker_reset)
+    send, sent = scripted(*[503] * 100)
+    with pytest.raises(retry.RetryError) as e:
+        call(send, policy)
+    # 试探请求失败后立即重新熔断，不再重试
+    assert len(sent) == 1 and e.value.category == "circuit_open"
+
+
+class StreamingResponse:
+    """模拟 httpx 的流式响应：读取响应体之前访问 text 会抛出异常，并记录是否被关闭。"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.headers = {}
+        self._body = body
+        self._read = False
+        self.closed = False
+
+    @property
+    def text(self):
+        if not self._read:
+            raise RuntimeError("ResponseNotRead")
+        return self._body
+
+    def read(self):
+        self._read = True
+        return self._body.encode()
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_streaming_responses_are_read_and_closed():
+    failed = [StreamingResponse(503, "overloaded"), StreamingResponse(400, "invalid image")]
+    responses = list(failed)
+    with pytest.raises(retry.RetryError) as e:
+        call(lambda: responses.pop(0))
+    assert e.value.category == retry.CLIENT and "invalid image" in e.value.detail
+    assert all(response.closed for response in failed)
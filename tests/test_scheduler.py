@@ -0,0 +1,65 @@
+import threading
+import time
+
+from MobileAgentE.scheduler import DeviceScheduler, merge_tips
+
+BASE = "0. 不要添加任何付款信息。\n1. 默认情况下，后台没有打开任何应用。\n"
+
+
+def test_merge_tips_keeps_other_devices_tips():
+    # 设备 A 在本任务执行期间写入了提示 2；设备 B 的反思结果基于旧的提示并新增了另一条
+    current = BASE + "2. 搜索后需要按回车。\n"
+    updated = "0. 不要添加任何付款信息。\n1. 打开地图前先关闭弹窗。\n"
+    assert merge_tips(current, updated) == current + "3. 打开地图前先关闭弹窗。\n"
+
+
+def test_merge_tips_is_idempotent():
+    merged = merge_tips(BASE, BASE + "2. 新提示。")
+    assert merge_tips(merged, merged) == merged
+    assert merge_tips(merged, BASE) == merged
+
+
+def test_reset_runs_after_every_task_including_the_last():
+    resets, lock = [], threading.Lock()
+
+    def reset(adb_path, serial):
+        with lock:
+            resets.append(serial)
+
+    def run_task(serial, index, task):
+        if index == 2:
+            raise RuntimeError("boom")
+
+    scheduler = DeviceScheduler(["a", "b"], run_task, reset=reset)
+    errors = scheduler.run([{"instruction": str(i)} for i in range(5)])
+    assert [index for index, _ in errors] == [2]
+    assert len(resets) == 5
+
+
+def test_failed_reset_stops_only_that_device():
+    ran = []
+
+    def reset(adb_path, serial):
+        if serial == "a":
+            raise RuntimeError("adb: device offline")
+
+    def run_task(serial, index, task):
+        ran.append((serial, index))
+        time.sleep(0.05)  # 两台设备都能领到第一个任务
+
+    scheduler = DeviceScheduler(["a", "b"], run_task, reset=reset)
+    errors = scheduler.run([{"instruction": str(i)} for i in range(6)])
+    assert errors == []
+    assert scheduler.failed_devices == ["a"]
+    assert sorted(index for _, index in ran) == list(range(6))
+    assert sum(1 for serial, _ in ran if serial == "a") == 1
+
+
+def test_remaining_tasks_are_reported_when_no_device_is_left():
+    def reset(adb_path, serial):
+        raise EOFError("EOF when reading a line")
+
+    scheduler = DeviceScheduler([None], lambda serial, index, task: None, reset=reset)
+    errors = scheduler.run([{"instruction": str(i)} for i in range(3)])
+    assert [index for index, _ in errors] == [1, 2]
+    assert scheduler.failed_devices == [None]
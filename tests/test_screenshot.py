@@ -0,0 +1,28 @@
+import time
+
+import pytest
+
+from bench_type import FAKE_ADB
+from MobileAgentE.controller import capture_screenshot
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_ADB_STATE", str(tmp_path))
+    monkeypatch.setenv("FAKE_ADB_SIZE", "108x234")
+    monkeypatch.setenv("FAKE_ADB_LATENCY_MS", "0")
+    return tmp_path
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_capture_screenshot(state, raw):
+    assert capture_screenshot(FAKE_ADB, raw=raw).size == (108, 234)
+
+
+def test_hung_adb_times_out_and_retries(state, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_ADB_LATENCY_MS", "5000")
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        capture_screenshot(FAKE_ADB, retries=1, timeout=0.3)
+    assert time.perf_counter() - start < 3
+    assert "正在重试 (1/1)" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+
+from MobileAgentE.frame import Frame
+from MobileAgentE.settle import frame_difference, get_settle_config, low_res_gray
+
+
+def screen(spinner_angle=None, rgba=False):
+    image = np.full((2340, 1080, 3), 250, dtype=np.uint8)
+    cv2.putText(image, "Loading results", (300, 1000), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (40, 40, 40), 3)
+    if spinner_angle is not None:
+        # 48 像素的加载动画：一段转动的圆弧
+        cv2.ellipse(image, (540, 1170), (20, 20), spinner_angle, 0, 90, (30, 120, 230), 5)
+    if rgba:
+        image = np.dstack([image, np.full(image.shape[:2], 255, dtype=np.uint8)])
+    return Frame(array=image)
+
+
+@pytest.mark.parametrize("method", ["pixel", "hash"])
+@pytest.mark.parametrize("rgba", [False, True])
+def test_local_spinner_is_not_stable(method, rgba):
+    threshold = get_settle_config("Tap")["threshold"]
+    for angle in (0, 45, 90, 180):
+        a = low_res_gray(screen(angle, rgba))
+        b = low_res_gray(screen(angle + 45, rgba))
+        assert frame_difference(a, b, method) > threshold
+
+
+@pytest.mark.parametrize("method", ["pixel", "hash"])
+def test_identical_frames_are_stable(method):
+    threshold = get_settle_config("Tap")["threshold"]
+    assert frame_difference(low_res_gray(screen(30)), low_res_gray(screen(30)), method) <= threshold
+
+
+def test_load_actions_wait_longer():
+    tap = get_settle_config("Tap")["min_wait"]
+    for action in ("Open_App", "Enter", "Wait"):
+        assert get_settle_config(action)["min_wait"] > tap
+    assert get_settle_config("Wait", {"Wait": {"min_wait": 1}})["min_wait"] == 1
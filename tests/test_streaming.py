@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from bench_streaming import ACTION, CHAT, REPLY
+from fake_llm_server import FakeLLMServer
+from MobileAgentE import http_client
+from MobileAgentE.agents import OPERATOR_SECTIONS
+from MobileAgentE.api import inference_chat_stream
+from MobileAgentE.streaming import SectionParser, first_json_object
+
+
+@pytest.fixture
+def server():
+    server = FakeLLMServer(reply=REPLY).start()
+    yield server
+    server.shutdown()
+    http_client.close_all()
+
+
+def stream(server, path="/v1/chat/completions"):
+    return inference_chat_stream(CHAT, "claude-fake" if path.endswith("/messages") else "fake",
+                                 server.url.replace("/v1/chat/completions", path), "x")
+
+
+def test_section_parser_matches_full_text_at_every_prefix():
+    full = SectionParser(OPERATOR_SECTIONS).update(REPLY)
+    parser = SectionParser(OPERATOR_SECTIONS)
+    for n in range(len(REPLY) + 1):
+        parser.update(REPLY[:n])
+        for header in OPERATOR_SECTIONS:
+            if parser.closed(header):
+                assert parser.section(header) == full.section(header)
+    assert [parser.section(h) for h in OPERATOR_SECTIONS] == [full.section(h) for h in OPERATOR_SECTIONS]
+    assert parser.closed("### 操作 ###") and not parser.closed("### 描述 ###")
+
+
+def test_section_parser_missing_header():
+    parser = SectionParser(OPERATOR_SECTIONS).update("### 思考 ###\n还没有操作")
+    assert parser.section("### 操作 ###") is None
+    assert not parser.closed("### 思考 ###")
+
+
+@pytest.mark.parametrize("text, expected", [
+    (f"prefix {ACTION} suffix", ACTION),
+    ('{"text": "a}\\"{b"} tail', '{"text": "a}\\"{b"}'),
+    ('{"a": {"b": 1}', None),
+    ("no json here", None),
+])
+def test_first_json_object(text, expected):
+    assert first_json_object(text) == expected
+
+
+@pytest.mark.parametrize("path", ["/v1/chat/completions", "/v1/messages"])
+def test_stream_drains_full_reply(server, path):
+    chat_stream = stream(server, path)
+    assert chat_stream.result(timeout=10) == REPLY
+    assert chat_stream.error is None and chat_stream.done
+
+
+def test_cancel_stops_the_server(server):
+    server.token_delay = 0.01
+    chat_stream = stream(server)
+    assert chat_stream.wait_until(lambda text: ACTION in text, timeout=10)
+    chat_stream.cancel()
+    assert chat_stream.result(timeout=10) is None
+    deadline = time.time() + 5
+    while server.streams_cancelled == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert server.streams_cancelled == 1
+
+
+def test_result_timeout_does_not_block(server):
+    server.token_delay = 0.05
+    chat_stream = stream(server)
+    start = time.perf_counter()
+    assert chat_stream.result(timeout=0.2) is None
+    assert time.perf_counter() - start < 2
+    assert chat_stream.cancelled
+
+
+def test_empty_reply_finishes_without_error(server):
+    # inference_agent_E 在这种情况下改用非流式调用
+    server.reply = ""
+    chat_stream = stream(server)
+    assert chat_stream.result(timeout=10) == ""
+    assert chat_stream.error is None
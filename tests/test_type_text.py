@@ -0,0 +1,25 @@
+import pytest
+
+from bench_type import FAKE_ADB, SAMPLES, read_log, replay
+from MobileAgentE.adb_session import AdbSessionPool
+from MobileAgentE.controller import type_text
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_ADB_STATE", str(tmp_path))
+    monkeypatch.setenv("FAKE_ADB_LATENCY_MS", "0")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_type_text_subprocess(state, text):
+    type_text(FAKE_ADB, text)
+    assert replay(read_log(state)) == text
+
+
+def test_type_text_session_pool(state):
+    with AdbSessionPool(FAKE_ADB) as pool:
+        for text in SAMPLES:
+            type_text(pool, text)
+            assert replay(read_log(state)) == text